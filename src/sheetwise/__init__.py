@@ -16,28 +16,100 @@ Based on the research paper: "SpreadsheetLLM: Encoding Spreadsheets for Large La
 by Microsoft Research Team
 """
 
-from sheetwise.core.core_aggregator import SpreadsheetLLM, ChainOfSpreadsheet, SheetCompressor
-from sheetwise.encoding.encoding_aggregator import CellInfo,TableRegion,VanillaEncoder,FormulaParser, FormulaDependencyAnalyzer
-from sheetwise.utils.utils_aggregator import create_realistic_spreadsheet,CompressionVisualizer
-from sheetwise.workbook.workbook_aggregator import WorkbookManager
-from sheetwise.tables.tables_aggregator import SmartTableDetector, TableType, EnhancedTableRegion
-
-try:
-    from importlib.metadata import version
-    __version__ = version("sheetwise")
-except ImportError:
-    # Fallback for Python < 3.8
-    from importlib_metadata import version
-    __version__ = version("sheetwise")
-except Exception:
-    # Fallback if package not installed
-    __version__ = "2.1.0"
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from sheetwise.core.core_aggregator import (
+        AsyncSpreadsheetLLM,
+        ChainOfSpreadsheet,
+        SheetCompressor,
+        SpreadsheetLLM,
+    )
+    from sheetwise.encoding.encoding_aggregator import (
+        CellInfo,
+        FormulaDependencyAnalyzer,
+        FormulaParser,
+        TableRegion,
+        VanillaEncoder,
+    )
+    from sheetwise.tables.tables_aggregator import (
+        EnhancedTableRegion,
+        SmartTableDetector,
+        SparseSheet,
+        TableType,
+    )
+    from sheetwise.utils.utils_aggregator import (
+        CompressionVisualizer,
+        create_realistic_spreadsheet,
+    )
+    from sheetwise.workbook.workbook_aggregator import WorkbookManager, XlsxReader
+
+# Public names are imported from their aggregator module on first access,
+# so "import sheetwise" itself loads neither pandas nor matplotlib
+_LAZY_IMPORTS = {
+    "sheetwise.core.core_aggregator": [
+        "SpreadsheetLLM",
+        "AsyncSpreadsheetLLM",
+        "ChainOfSpreadsheet",
+        "SheetCompressor",
+    ],
+    "sheetwise.encoding.encoding_aggregator": [
+        "CellInfo",
+        "TableRegion",
+        "VanillaEncoder",
+        "FormulaParser",
+        "FormulaDependencyAnalyzer",
+    ],
+    "sheetwise.utils.utils_aggregator": [
+        "create_realistic_spreadsheet",
+        "CompressionVisualizer",
+    ],
+    "sheetwise.workbook.workbook_aggregator": ["WorkbookManager", "XlsxReader"],
+    "sheetwise.tables.tables_aggregator": [
+        "SmartTableDetector",
+        "TableType",
+        "EnhancedTableRegion",
+        "SparseSheet",
+    ],
+}
+_LAZY_MODULES = {
+    name: module for module, names in _LAZY_IMPORTS.items() for name in names
+}
+
+
+def _get_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("sheetwise")
+    except PackageNotFoundError:
+        # Not installed (e.g. imported from a source checkout): no metadata
+        return "unknown"
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_MODULES:
+        value = getattr(importlib.import_module(_LAZY_MODULES[name]), name)
+    elif name == "__version__":
+        value = _get_version()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Cache on the module so later lookups bypass __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__) | {"__version__"})
+
 
 __author__ = "Based on Microsoft Research SpreadsheetLLM"
 
 __all__ = [
     # Core components
     "SpreadsheetLLM",
+    "AsyncSpreadsheetLLM",
     "SheetCompressor",
     "VanillaEncoder",
     "ChainOfSpreadsheet",
@@ -54,9 +126,12 @@ __all__ = [
     
     # Multi-sheet support
     "WorkbookManager",
+    "XlsxReader",
     
     # Enhanced table detection
     "SmartTableDetector",
     "TableType",
     "EnhancedTableRegion",
+    # Sparse sheets
+    "SparseSheet",
 ]
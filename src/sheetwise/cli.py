@@ -2,23 +2,9 @@
 
 
 import argparse
+import json
 import sys
-import os
 from pathlib import Path
-import json
-import pandas as pd
-
-from sheetwise.core.core import SpreadsheetLLM
-from sheetwise.utils.visualizer import CompressionVisualizer
-from sheetwise.encoding.formula_parser import FormulaParser
-from sheetwise.workbook.workbook import WorkbookManager
-from sheetwise.tables.smart_tables import SmartTableDetector
-
-# Rich for colorized CLI output
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.progress import track
 
 
 def main():
@@ -39,6 +25,10 @@ def main():
         "--compression-ratio", type=float, default=None, help="Target compression ratio"
     )
 
+    parser.add_argument(
+        "--max-tokens", type=int, default=None, help="Target compressed token budget"
+    )
+
     parser.add_argument(
         "--vanilla",
         action="store_true",
@@ -82,6 +72,18 @@ def main():
 
     args = parser.parse_args()
 
+    # Imported only once the arguments are valid, so --help and usage
+    # errors return without loading pandas or rich; feature-specific
+    # modules are imported by the branches that use them
+    # Rich for colorized CLI output
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.progress import track
+    from rich.table import Table
+
+    from sheetwise.core.core import SpreadsheetLLM
+    from sheetwise.encoding.encoders import write_lines
+
     console = Console()
 
     # Handle demo mode
@@ -104,6 +106,12 @@ def main():
             console.print("[bold cyan]Using auto-configuration...[/]")
             encoded = sllm.compress_with_auto_config(df)
             encoding_type = "auto-compressed"
+        elif args.compression_ratio or args.max_tokens:
+            console.print("[bold cyan]Compressing to target budget...[/]")
+            encoded = sllm.compress_and_encode_to_budget(
+                df, max_tokens=args.max_tokens, compression_ratio=args.compression_ratio
+            )
+            encoding_type = "budget-compressed"
         else:
             encoded = sllm.compress_and_encode_for_llm(df)
             encoding_type = "compressed"
@@ -124,6 +132,8 @@ def main():
 
         # Handle visualization if requested
         if args.visualize:
+            from sheetwise.utils.visualizer import CompressionVisualizer
+
             console.print("[bold blue]Generating visualization...[/]")
             visualizer = CompressionVisualizer()
             compressed_result = sllm.compress_spreadsheet(df)
@@ -145,6 +155,8 @@ def main():
 
         # Handle table detection if requested
         if args.detect_tables:
+            from sheetwise.tables.smart_tables import SmartTableDetector
+
             console.print("[bold blue]Detecting tables...[/]")
             detector = SmartTableDetector()
             tables = list(track(detector.detect_tables(df), description="[yellow]Detecting tables..."))
@@ -220,6 +232,8 @@ def main():
         # Parallel processing for multi-sheet workbooks
         if args.multi_sheet:
             from concurrent.futures import ThreadPoolExecutor, as_completed
+
+            from sheetwise.workbook.workbook import WorkbookManager
             wb_manager = WorkbookManager()
             sheets = wb_manager.load_workbook(args.input_file)
             num_workers = args.jobs or len(sheets)
@@ -247,12 +261,21 @@ def main():
             console.print(table)
             return
 
-        # Generate encoding (single sheet)
+        # Generate encoding (single sheet) lazily, line by line
         if args.vanilla:
-            encoded = sllm.encode_vanilla(df)
+            lines = sllm.vanilla_encoder.iter_encode(df)
             encoding_type = "vanilla"
+        elif args.compression_ratio or args.max_tokens:
+            lines = sllm.iter_compressed_for_llm(
+                sllm.compress_to_budget(
+                    df,
+                    max_tokens=args.max_tokens,
+                    compression_ratio=args.compression_ratio,
+                )
+            )
+            encoding_type = "budget-compressed"
         else:
-            encoded = sllm.compress_and_encode_for_llm(df)
+            lines = sllm.iter_compressed_for_llm(sllm.compress_spreadsheet(df))
             encoding_type = "compressed"
 
         # Show statistics if requested
@@ -268,13 +291,13 @@ def main():
                     table.add_row(key, str(value))
             console.print(table)
 
-        # Output result
+        # Output result, streaming to the file so the text is never held whole
         if args.output:
             with open(args.output, "w") as f:
-                f.write(encoded)
+                write_lines(lines, f)
             console.print(Panel(f"Encoded output written to: {args.output}", title="[green]Success", style="bold green"))
         else:
-            console.print(encoded)
+            console.print("\n".join(lines))
 
     except Exception as e:
         console.print(Panel(f"{e}", title="[red]Error", style="bold red"))
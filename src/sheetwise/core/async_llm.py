@@ -0,0 +1,152 @@
+"""Asyncio interface to SpreadsheetLLM."""
+
+import asyncio
+import contextlib
+import functools
+import weakref
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Union
+
+import pandas as pd
+
+from sheetwise.core.cache import CompressionCache
+from sheetwise.core.core import SpreadsheetLLM
+from sheetwise.tables.sparse import Sheet, SparseSheet
+
+
+class AsyncSpreadsheetLLM:
+    """
+    Awaitable counterparts of the blocking SpreadsheetLLM entry points
+
+    Every stage (loading, compression, table detection, encoding) runs in an
+    executor so the event loop stays responsive, and a request awaits each
+    stage before starting the next. Cancelling a request therefore stops it
+    at the next stage boundary; a stage already running in a worker finishes
+    there and its result is discarded. At most max_concurrency requests run
+    at once, and since each request occupies at most one worker at a time a
+    single large sheet cannot take over the whole executor. The limit applies
+    per event loop, so one instance may be shared by several asyncio.run calls.
+    """
+
+    def __init__(
+        self,
+        compression_params: Optional[Dict[str, Any]] = None,
+        enable_logging: bool = False,
+        cache: Optional[CompressionCache] = None,
+        executor: Optional[Executor] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        """
+        Initialize the asyncio interface
+
+        Args:
+            compression_params: Parameters for SheetCompressor
+            enable_logging: Enable detailed logging for debugging
+            cache: On-disk cache for the LLM text of compress_and_encode_for_llm
+            executor: Executor running the blocking stages, defaults to the
+                event loop's default thread pool
+            max_concurrency: Maximum number of requests processed at once,
+                unlimited if None
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.llm = SpreadsheetLLM(compression_params, enable_logging, cache)
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        # Created inside the running loop: before Python 3.10 a semaphore binds
+        # to the loop current at construction, which asyncio.run replaces
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @contextlib.asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        """Hold one of the max_concurrency request slots"""
+        if self.max_concurrency is None:
+            yield
+            return
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        async with semaphore:
+            yield
+
+    async def _run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run one blocking stage in the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def load_from_file(
+        self, filepath: str, sparse: bool = False
+    ) -> Union[pd.DataFrame, SparseSheet]:
+        """
+        Load a spreadsheet without blocking the event loop
+
+        Args:
+            filepath: Path to a .csv, .xlsx or .xls file
+            sparse: Return a SparseSheet holding only the non-empty cells
+
+        Returns:
+            The sheet as a DataFrame, or as a SparseSheet if sparse is set
+        """
+        async with self._slot():
+            return await self._run(self.llm.load_from_file, filepath, sparse=sparse)
+
+    async def compress_spreadsheet(self, df: Sheet) -> Dict[str, Any]:
+        """
+        Compress a spreadsheet without blocking the event loop
+
+        Args:
+            df: Input DataFrame or SparseSheet
+
+        Returns:
+            Output of SheetCompressor.compress
+        """
+        async with self._slot():
+            return await self._run(self.llm.compress_spreadsheet, df)
+
+    async def compress_and_encode_for_llm(self, df: Sheet) -> str:
+        """
+        Compress a spreadsheet and return LLM-ready text
+
+        Args:
+            df: Input DataFrame or SparseSheet
+
+        Returns:
+            Text identical to SpreadsheetLLM.compress_and_encode_for_llm(df)
+        """
+        llm = self.llm
+        async with self._slot():
+            key = None
+            if llm.cache is not None:
+                key = await self._run(llm._llm_text_key, df)
+                text = await self._run(llm.cache.get, key)
+                if text is not None:
+                    return text
+
+            compressed = await self._run(llm.compress_spreadsheet, df)
+            text = await self._run(llm.encode_compressed_for_llm, compressed)
+            if key is not None:
+                await self._run(llm.cache.set, key, text)
+            return text
+
+    async def process_qa_query(self, df: pd.DataFrame, query: str) -> Dict[str, Any]:
+        """
+        Process a QA query using Chain of Spreadsheet
+
+        Args:
+            df: Input DataFrame
+            query: Natural language query about the spreadsheet
+
+        Returns:
+            Result identical to SpreadsheetLLM.process_qa_query(df, query)
+        """
+        chain = self.llm.chain_processor
+        async with self._slot():
+            compressed = await self._run(chain.compressor.compress, df)
+            tables = await self._run(
+                chain.detector.detect_tables, compressed["compressed_data"]
+            )
+            return await self._run(chain.answer_query, compressed, tables, query)
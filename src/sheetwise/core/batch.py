@@ -0,0 +1,202 @@
+"""Batch compression of many sheets on a persistent process pool."""
+
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from sheetwise.core.cache import CompressionCache
+from sheetwise.core.core import SpreadsheetLLM
+from sheetwise.tables.sparse import Sheet, SparseSheet
+
+BatchItem = Union[Sheet, str, os.PathLike]
+
+# SpreadsheetLLM of the current worker process, built once by _init_worker
+_worker_llm: Optional[SpreadsheetLLM] = None
+
+
+def _init_worker(
+    compression_params: Optional[Dict[str, Any]], cache: Optional[CompressionCache]
+) -> None:
+    global _worker_llm
+    _worker_llm = SpreadsheetLLM(compression_params, cache=cache)
+
+
+def _process_item(item: BatchItem) -> str:
+    """Load (if given a path), compress and encode one sheet in a worker"""
+    if not isinstance(item, (pd.DataFrame, SparseSheet)):
+        item = _worker_llm.load_from_file(os.fspath(item))
+    return _worker_llm.compress_and_encode_for_llm(item)
+
+
+@dataclass
+class BatchResult:
+    """Outcome of compressing one item of a batch"""
+
+    index: int
+    source: Optional[str]
+    text: Optional[str] = None
+    error: Optional[str] = None
+    traceback: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the item was compressed successfully"""
+        return self.error is None
+
+
+class BatchCompressor:
+    """
+    Compresses many sheets in parallel on a reusable process pool
+
+    Each worker process builds its own SpreadsheetLLM once and keeps it for
+    the lifetime of the pool, so repeated calls to run() pay the process
+    start-up cost only once. Paths are sent to the workers as-is and loaded
+    there, which keeps the parent process from parsing every file itself.
+    At most max_in_flight items are submitted at any time, so arbitrarily
+    long (or lazy) iterables are consumed with bounded memory.
+    """
+
+    def __init__(
+        self,
+        compression_params: Optional[Dict[str, Any]] = None,
+        max_workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        cache: Optional[CompressionCache] = None,
+    ):
+        """
+        Initialize the batch compressor
+
+        Args:
+            compression_params: Parameters for each worker's SheetCompressor
+            max_workers: Number of worker processes, defaults to the CPU count
+            max_in_flight: Items submitted but not yet yielded, defaults to
+                twice max_workers
+            cache: On-disk cache shared by the workers
+        """
+        self.compression_params = dict(compression_params or {})
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.max_workers
+        if self.max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.cache = cache
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use and reuse it afterwards"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.compression_params, self.cache),
+            )
+        return self._pool
+
+    def close(self) -> None:
+        """Shut down the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "BatchCompressor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def run(self, items: Iterable[BatchItem]) -> Iterator[BatchResult]:
+        """
+        Compress and encode every item, yielding results as they complete
+
+        Args:
+            items: DataFrames, SparseSheets and/or paths to .csv, .xlsx or .xls
+                files
+
+        Returns:
+            Iterator of BatchResult in completion order; index gives the
+            position of the item in items. Failures are reported on the
+            result instead of being raised.
+        """
+        items = enumerate(items)
+        running: Dict[Future, tuple] = {}
+        exhausted = False
+        try:
+            while running or not exhausted:
+                while not exhausted and len(running) < self.max_in_flight:
+                    try:
+                        index, item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    try:
+                        source = (
+                            None
+                            if isinstance(item, (pd.DataFrame, SparseSheet))
+                            else os.fspath(item)
+                        )
+                    except TypeError as error:
+                        # Neither a sheet nor a path: fail this item only
+                        yield self._failed(BatchResult(index, None), error)
+                        continue
+                    pool = self._get_pool()
+                    future = pool.submit(_process_item, item)
+                    running[future] = (index, source, pool, time.perf_counter())
+
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index, source, pool, started = running.pop(future)
+                    yield self._result(future, index, source, pool, started)
+        finally:
+            for future in running:
+                future.cancel()
+
+    def _result(
+        self,
+        future: Future,
+        index: int,
+        source: Optional[str],
+        pool: ProcessPoolExecutor,
+        started: float,
+    ) -> BatchResult:
+        """Convert a finished future into a BatchResult"""
+        result = BatchResult(index, source, elapsed=time.perf_counter() - started)
+        error = future.exception()
+        if error is None:
+            result.text = future.result()
+        else:
+            if isinstance(error, BrokenProcessPool) and pool is self._pool:
+                # A worker died; start a fresh pool for the items still to come
+                pool.shutdown(wait=False)
+                self._pool = None
+            self._failed(result, error)
+        return result
+
+    @staticmethod
+    def _failed(result: BatchResult, error: BaseException) -> BatchResult:
+        """Record error and its traceback on result"""
+        result.error = f"{type(error).__name__}: {error}"
+        result.traceback = "".join(
+            traceback.format_exception(type(error), error, error.__traceback__)
+        )
+        return result
+
+    def compress_all(self, items: Iterable[BatchItem]) -> List[BatchResult]:
+        """
+        Compress and encode every item and return the results in input order
+
+        Args:
+            items: DataFrames, SparseSheets and/or paths to .csv, .xlsx or .xls
+                files
+
+        Returns:
+            List of BatchResult, one per item
+        """
+        return sorted(self.run(items), key=lambda result: result.index)
@@ -0,0 +1,257 @@
+"""Content-addressed on-disk cache for compression results."""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from sheetwise.tables.sparse import SparseSheet
+
+# Bump when the layout of cached results changes
+_FORMAT_VERSION = 1
+_SUFFIX = ".pkl"
+_TMP_PREFIX = ".tmp-"
+# Temporary files older than this were left behind by a crashed writer
+_STALE_TMP_SECONDS = 3600
+
+
+class CompressionCache:
+    """
+    Size-bounded on-disk cache keyed by sheet contents and compressor parameters
+
+    Entries are pickled into one file each. Writes go to a temporary file that
+    is atomically renamed into place, so concurrent processes sharing the
+    directory never observe a partial entry. Reads refresh an entry's
+    modification time and the least recently used entries are evicted once
+    the directory exceeds max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            directory: Directory holding the cache files, created if needed
+            max_bytes: Total size of cache files to keep before evicting
+        """
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def sheet_key(
+        df: Union[pd.DataFrame, SparseSheet],
+        params: Dict[str, Any],
+        kind: str = "compress",
+    ) -> str:
+        """
+        Hash a sheet's contents together with the parameters applied to it
+
+        Args:
+            df: Sheet to hash, dense or sparse
+            params: JSON-serializable parameters that affect the result
+            kind: Name of the cached operation
+
+        Returns:
+            Hex digest identifying the (sheet, params, kind) combination
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        if isinstance(df, SparseSheet):
+            return CompressionCache._sparse_key(digest, df, params, kind)
+
+        header = {
+            "version": _FORMAT_VERSION,
+            "kind": kind,
+            "params": params,
+            "shape": df.shape,
+            "columns": [repr(column) for column in df.columns],
+            "dtypes": [str(dtype) for dtype in df.dtypes],
+        }
+        digest.update(json.dumps(header, sort_keys=True, default=str).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+
+        # Object columns hash their values as strings, so also record each
+        # cell's type to keep e.g. 1 and "1" apart
+        for j, dtype in enumerate(df.dtypes):
+            if dtype == object:
+                CompressionCache._update_types(digest, df.iloc[:, j])
+        return digest.hexdigest()
+
+    @staticmethod
+    def _update_types(digest: Any, values: pd.Series) -> None:
+        """Hash the type of every value, cell by cell only for mixed columns"""
+        # Missing values already hash differently from each other and from
+        # strings, so a column whose other values share one kind is settled
+        kind = pd.api.types.infer_dtype(values, skipna=True)
+        digest.update(kind.encode())
+        if kind.startswith("mixed"):
+            codes, types = pd.factorize(values.map(type))
+            digest.update(json.dumps([t.__qualname__ for t in types]).encode())
+            digest.update(codes.astype(np.int64, copy=False).tobytes())
+
+    @staticmethod
+    def _sparse_key(
+        digest: Any, sheet: SparseSheet, params: Dict[str, Any], kind: str
+    ) -> str:
+        """sheet_key() of a SparseSheet, hashing only its non-empty cells"""
+        header = {
+            "version": _FORMAT_VERSION,
+            "kind": kind,
+            "layout": "sparse",
+            "params": params,
+            "shape": sheet.shape,
+            "columns": [repr(column) for column in sheet.columns],
+        }
+        digest.update(json.dumps(header, sort_keys=True, default=str).encode())
+        digest.update(pd.util.hash_pandas_object(sheet.index).to_numpy().tobytes())
+        digest.update(sheet.rows.tobytes())
+        digest.update(sheet.cols.tobytes())
+        digest.update(pd.util.hash_array(sheet.values).tobytes())
+        CompressionCache._update_types(digest, pd.Series(sheet.values, dtype=object))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up an entry
+
+        Args:
+            key: Entry key, usually from sheet_key()
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            value = None
+        except (
+            EOFError,
+            pickle.UnpicklingError,
+            AttributeError,
+            ImportError,
+            ValueError,
+            TypeError,
+        ):
+            # Unreadable entry, e.g. truncated or written by an incompatible version
+            self._remove(path)
+            value = None
+        else:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store an entry atomically and evict old entries if over budget
+
+        Args:
+            key: Entry key, usually from sheet_key()
+            value: Picklable value to cache
+        """
+        fd, tmp_path = tempfile.mkstemp(prefix=_TMP_PREFIX, dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self._evict()
+
+    def _entries(self):
+        """(mtime, size, path) of every cache file, removing stale temp files"""
+        entries = []
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.startswith(_TMP_PREFIX):
+                if now - stat.st_mtime > _STALE_TMP_SECONDS:
+                    self._remove(entry.path)
+            elif entry.name.endswith(_SUFFIX):
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until under max_bytes"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                with self._lock:
+                    self.evictions += 1
+            total -= size
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        # Another process may have removed it already
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters"""
+        for _, _, path in self._entries():
+            self._remove(path)
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache effectiveness counters
+
+        Returns:
+            Dictionary with hits, misses, evictions, entries, size_bytes,
+            max_bytes and hit_rate (counters are per process)
+        """
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "size_bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
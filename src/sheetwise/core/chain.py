@@ -37,6 +37,25 @@ class ChainOfSpreadsheet:
         # Detect tables in compressed spreadsheet
         detected_tables = self.detector.detect_tables(compressed_df)
 
+        return self.answer_query(compressed_result, detected_tables, query)
+
+    def answer_query(
+        self,
+        compressed_result: Dict[str, Any],
+        detected_tables: List[TableRegion],
+        query: str,
+    ) -> Dict[str, Any]:
+        """
+        Second stage of process_query(), given the outputs of the first
+
+        Args:
+            compressed_result: Output of the compressor for the sheet
+            detected_tables: Tables detected in its compressed data
+            query: Natural language query about the spreadsheet
+
+        Returns:
+            Dictionary containing identified regions and processing steps
+        """
         # Stage 2: Process query with identified table regions
         # This would typically involve LLM inference
         relevant_regions = self._identify_relevant_regions(detected_tables, query)
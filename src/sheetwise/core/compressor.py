@@ -1,14 +1,112 @@
 """Main compression framework combining all modules."""
 
-from typing import Any, Dict, Optional
+import dataclasses
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+from sheetwise.core.cache import CompressionCache
+from sheetwise.core.scheduler import (
+    StageMetrics,
+    StageScheduler,
+    measure,
+    trace_allocations,
+)
+from sheetwise.tables.context import CompressionContext
 from sheetwise.tables.extractors import (
+    ChunkedSkeletonExtractor,
     DataFormatAggregator,
     InvertedIndexTranslator,
     StructuralAnchorExtractor,
 )
+from sheetwise.tables.sparse import Sheet
+
+
+class CompressionResult(dict):
+    """
+    Compression result whose expensive entries are built on first access
+
+    Entries registered with set_lazy() look like ordinary keys but are only
+    computed when read (through indexing, get(), items(), copying, pickling
+    and so on), so callers that never read them never pay for them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._factories: Dict[Any, Callable[[], Any]] = {}
+
+    def set_lazy(self, key: Any, factory: Callable[[], Any]) -> None:
+        """Register key to be computed by factory() on first access"""
+        super().__setitem__(key, None)
+        self._factories[key] = factory
+
+    def _resolve(self, key: Any) -> None:
+        factory = self._factories.pop(key, None)
+        if factory is not None:
+            super().__setitem__(key, factory())
+
+    def _resolve_all(self) -> None:
+        for key in list(self._factories):
+            self._resolve(key)
+
+    def __getitem__(self, key: Any) -> Any:
+        self._resolve(key)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._factories.pop(key, None)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        self._factories.pop(key, None)
+        super().__delitem__(key)
+
+    def __iter__(self):
+        # Overriding __iter__ makes dict(), ** and update() go through
+        # keys() and __getitem__ instead of reading the raw storage
+        return super().__iter__()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        self._resolve(key)
+        return super().pop(key, *default)
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        self._resolve(key)
+        return super().setdefault(key, default)
+
+    def items(self):
+        self._resolve_all()
+        return super().items()
+
+    def values(self):
+        self._resolve_all()
+        return super().values()
+
+    def copy(self) -> "CompressionResult":
+        self._resolve_all()
+        return CompressionResult(super().items())
+
+    def __eq__(self, other: Any) -> bool:
+        self._resolve_all()
+        if isinstance(other, CompressionResult):
+            other._resolve_all()
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        self._resolve_all()
+        return super().__repr__()
+
+    def __reduce__(self):
+        self._resolve_all()
+        return (self.__class__, (dict(super().items()),))
 
 
 class SheetCompressor:
@@ -25,6 +123,11 @@ class SheetCompressor:
         use_extraction: bool = True,
         use_translation: bool = True,
         use_aggregation: bool = True,
+        executor: Optional[Union[str, Executor]] = None,
+        max_workers: Optional[int] = None,
+        cache: Optional[CompressionCache] = None,
+        trace_memory: bool = False,
+        hooks: Optional[Iterable[Callable[[StageMetrics], None]]] = None,
     ):
         """
         Initialize SheetCompressor with module options
@@ -34,56 +137,420 @@ class SheetCompressor:
             use_extraction: Whether to use structural anchor extraction
             use_translation: Whether to use inverted index translation
             use_aggregation: Whether to use data format aggregation
+            executor: Run the stages after extraction concurrently: "thread",
+                "process", or an existing Executor. None runs them in turn.
+                Translation mostly holds the GIL, so "process" overlaps it
+                better, at the cost of shipping the skeleton to the workers.
+            max_workers: Pool size when executor is "thread" or "process"
+            cache: On-disk cache consulted by compress() before compressing
+            trace_memory: Record each stage's peak allocated bytes with
+                tracemalloc, which slows allocation-heavy stages down. Stages
+                run on a thread pool report None, since the peak tracemalloc
+                tracks is shared by the whole process
+            hooks: Callables receiving the StageMetrics of every stage run
         """
+        if not (
+            executor in (None, "thread", "process") or isinstance(executor, Executor)
+        ):
+            raise ValueError(
+                "executor must be None, 'thread', 'process' or an Executor"
+            )
+
         self.k = k
         self.use_extraction = use_extraction
         self.use_translation = use_translation
         self.use_aggregation = use_aggregation
+        self.executor = executor
+        self.max_workers = max_workers
+        self._pool: Optional[Executor] = None
+        self.cache = cache
+        self.trace_memory = trace_memory
+        self.hooks: List[Callable[[StageMetrics], None]] = list(hooks or [])
 
         self.extractor = StructuralAnchorExtractor(k) if use_extraction else None
         self.translator = InvertedIndexTranslator() if use_translation else None
         self.aggregator = DataFormatAggregator() if use_aggregation else None
 
-    def compress(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def cache_params(self) -> Dict[str, Any]:
+        """Parameters that determine the compression result, for cache keys"""
+        return {
+            "k": self.k,
+            "use_extraction": self.use_extraction,
+            "use_translation": self.use_translation,
+            "use_aggregation": self.use_aggregation,
+        }
+
+    def add_hook(self, hook: Callable[[StageMetrics], None]) -> None:
+        """
+        Register a callable to receive the StageMetrics of every stage run
+
+        Hooks are called in the calling process once a stage finishes, e.g.
+        to forward timings to a metrics system. They are not called when
+        compress() returns a cached result.
+
+        Args:
+            hook: Callable taking a StageMetrics
+        """
+        self.hooks.append(hook)
+
+    def _record_step(
+        self, result: Dict[str, Any], step: Dict[str, Any], metrics: StageMetrics
+    ) -> None:
+        """Append a compression step with its metrics and notify the hooks"""
+        metrics = dataclasses.replace(metrics, stage=step["step"])
+        step.update(metrics.as_dict())
+        result["compression_steps"].append(step)
+        for hook in self.hooks:
+            hook(metrics)
+
+    def _get_executor(self) -> Optional[Executor]:
+        """Executor for concurrent stages, creating the owned pool on first use"""
+        if self.executor is None or isinstance(self.executor, Executor):
+            return self.executor
+        if self._pool is None:
+            pool_class = (
+                ThreadPoolExecutor if self.executor == "thread" else ProcessPoolExecutor
+            )
+            self._pool = pool_class(max_workers=self.max_workers)
+        return self._pool
+
+    def close(self) -> None:
+        """Shut down the worker pool created for concurrent stages, if any"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "SheetCompressor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Worker pools cannot be pickled; a copy creates its own when needed
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        if isinstance(self.executor, Executor):
+            state["executor"] = None
+        return state
+
+    def compress(
+        self, df: Sheet, context: Optional[CompressionContext] = None
+    ) -> Dict[str, Any]:
         """
         Apply compression pipeline to spreadsheet data
 
         Args:
-            df: Input DataFrame
+            df: Input DataFrame or SparseSheet
+            context: Precomputed cell facts for df, shared by every stage and
+                built if not given
 
         Returns:
-            Compressed representation
+            Compressed representation. Each entry of compression_steps
+            records the stage's wall_time and cpu_time in seconds and its
+            peak_bytes (None unless trace_memory is set).
         """
+        if self.cache is None:
+            return self._compress(df, context)
+
+        key = self.cache.sheet_key(df, self.cache_params())
+        result = self.cache.get(key)
+        if result is None:
+            result = self._compress(df, context)
+            self.cache.set(key, result)
+        return result
+
+    def _compress(
+        self, df: Sheet, context: Optional[CompressionContext]
+    ) -> Dict[str, Any]:
+        """Run the compression pipeline without consulting the cache"""
         result = {"original_shape": df.shape, "compression_steps": []}
 
-        current_df = df.copy()
+        # No stage mutates its input, so every stage reads df in place and the
+        # skeleton is only materialized if compressed_data is read
+        context = context or CompressionContext(df)
+
+        with trace_allocations(self.trace_memory):
+            # Step 1: Structural anchor extraction
+            if self.use_extraction and self.extractor:
+
+                def extract() -> CompressionContext:
+                    sorted_rows, sorted_cols = self.extractor.select_skeleton(
+                        df, context
+                    )
+                    return context.subset(sorted_rows, sorted_cols)
+
+                context, metrics = measure(
+                    "structural_extraction", extract, trace_memory=self.trace_memory
+                )
+                self._record_step(
+                    result,
+                    {"step": "structural_extraction", "shape_after": context.shape},
+                    metrics,
+                )
+
+            return self._encode_skeleton(result, df.shape, context)
+
+    def compress_chunked(
+        self,
+        source: Union[str, "os.PathLike[str]", Iterable[pd.DataFrame]],
+        chunksize: int = 100_000,
+    ) -> Dict[str, Any]:
+        """
+        Apply the compression pipeline to a sheet read in row blocks
 
-        # Step 1: Structural anchor extraction
-        if self.use_extraction and self.extractor:
-            current_df = self.extractor.extract_skeleton(current_df)
-            result["compression_steps"].append(
-                {"step": "structural_extraction", "shape_after": current_df.shape}
+        Structural extraction runs block by block, so peak memory is bounded by
+        the block size plus the extracted skeleton rather than the sheet size.
+        The result matches compress() on the concatenated blocks: when a block
+        was classified with dtypes pandas promotes once later blocks are seen
+        (an integer column meeting its first missing value, say), the blocks
+        are read again and classified with the concatenated sheet's dtypes.
+        A one-shot iterator of blocks cannot be read again, so with dtype
+        drift its skeleton follows each block's own dtypes.
+
+        Args:
+            source: Path to a CSV file, or an iterable of row-block DataFrames
+            chunksize: Rows per block when reading a CSV file
+
+        Returns:
+            Compressed representation
+        """
+        if isinstance(source, (str, os.PathLike)):
+            replayable = True
+
+            def read_blocks() -> Iterator[pd.DataFrame]:
+                return pd.read_csv(source, chunksize=chunksize)
+
+        else:
+            blocks = iter(source)
+            # Re-iterables such as lists give a fresh iterator on each call
+            replayable = blocks is not source
+
+            def read_blocks() -> Iterator[pd.DataFrame]:
+                nonlocal blocks
+                blocks, current = None, blocks
+                return current if current is not None else iter(source)
+
+        if not (self.use_extraction and self.extractor):
+            # Translation needs every cell, so there is nothing to stream
+            return self.compress(pd.concat(read_blocks()))
+
+        def extract() -> Tuple[pd.DataFrame, ChunkedSkeletonExtractor]:
+            extractor = ChunkedSkeletonExtractor(self.k)
+            skeleton_rows = list(extractor.iter_skeleton(read_blocks()))
+            if extractor.dtype_drift and replayable:
+                extractor = ChunkedSkeletonExtractor(self.k, extractor.samples)
+                skeleton_rows = list(extractor.iter_skeleton(read_blocks()))
+            skeleton = pd.concat(skeleton_rows).iloc[:, extractor.important_cols]
+            return skeleton, extractor
+
+        with trace_allocations(self.trace_memory):
+            # Reading the blocks is included in the extraction stage
+            (current_df, extractor), metrics = measure(
+                "structural_extraction", extract, trace_memory=self.trace_memory
             )
 
-        # Step 2: Inverted index translation
+            original_shape = (extractor.n_rows, len(extractor.columns))
+            result = {"original_shape": original_shape, "compression_steps": []}
+            self._record_step(
+                result,
+                {"step": "structural_extraction", "shape_after": current_df.shape},
+                metrics,
+            )
+
+            context = CompressionContext(current_df)
+            return self._encode_skeleton(result, original_shape, context)
+
+    def compress_to_budget(
+        self,
+        df: Sheet,
+        max_tokens: Optional[int] = None,
+        min_ratio: Optional[float] = None,
+        k_max: Optional[int] = None,
+        context: Optional[CompressionContext] = None,
+    ) -> Dict[str, Any]:
+        """
+        Compress with the least lossy settings that meet a token budget
+
+        Candidate settings are tried from most to least detailed: no
+        extraction, then extraction with k = k_max down to 0, each with and
+        then without aggregation (aggregation is only tried if enabled on this
+        compressor). The first candidate whose token count fits max_tokens and
+        whose compression ratio reaches min_ratio is used. The sheet is
+        classified and its values factorized once; each trial only slices
+        those facts and counts values, the addresses they cover and regions,
+        without formatting any text. Token counts follow count_tokens().
+
+        Args:
+            df: Input DataFrame or SparseSheet
+            max_tokens: Maximum compressed token count
+            min_ratio: Minimum compression ratio (original / kept cells)
+            k_max: Largest k to consider, defaults to this compressor's k
+            context: Precomputed cell facts for df, built if not given
+
+        Returns:
+            Compressed representation with a "budget" entry describing the
+            chosen settings, the trials run and whether the target was met.
+            If nothing fits, the most compact candidate is returned.
+        """
+        if max_tokens is None and min_ratio is None:
+            raise ValueError("Pass max_tokens and/or min_ratio")
+
+        context = context or CompressionContext(df)
+        k_max = self.k if k_max is None else k_max
+        aggregation_options = (True, False) if self.use_aggregation else (False,)
+        candidates = [(None, use_agg) for use_agg in aggregation_options]
+        candidates += [
+            (k, use_agg)
+            for k in range(k_max, -1, -1)
+            for use_agg in aggregation_options
+        ]
+
+        # Facts shared by every trial
+        context.type_codes
+        if self.use_translation:
+            context.values
+
+        trials = []
+        # (k, skeleton rows, skeleton cols, context) of the previous trial
+        skeleton = (None, None, None, context)
+        for k, use_aggregation in candidates:
+            if k != skeleton[0]:
+                skeleton = self._skeleton_context(df, context, k, skeleton)
+            tokens, ratio = self._measure_candidate(df, skeleton[3], use_aggregation)
+            fits = (max_tokens is None or tokens <= max_tokens) and (
+                min_ratio is None or ratio >= min_ratio
+            )
+            trials.append(
+                {
+                    "k": k,
+                    "use_aggregation": use_aggregation,
+                    "tokens": tokens,
+                    "compression_ratio": ratio,
+                    "fits": fits,
+                }
+            )
+            if fits:
+                break
+
+        chosen = trials[-1]
+        compressor = SheetCompressor(
+            k=self.k if chosen["k"] is None else chosen["k"],
+            use_extraction=chosen["k"] is not None,
+            use_translation=self.use_translation,
+            use_aggregation=chosen["use_aggregation"],
+            executor=self._get_executor(),
+            trace_memory=self.trace_memory,
+            hooks=self.hooks,
+        )
+        result = compressor._compress(df, context)
+        result["budget"] = {
+            "max_tokens": max_tokens,
+            "min_ratio": min_ratio,
+            "k": chosen["k"],
+            "use_extraction": chosen["k"] is not None,
+            "use_aggregation": chosen["use_aggregation"],
+            "tokens": chosen["tokens"],
+            "fits": chosen["fits"],
+            "trials": trials,
+        }
+        return result
+
+    @staticmethod
+    def _skeleton_context(
+        df: Sheet, context: CompressionContext, k: int, previous: tuple
+    ) -> tuple:
+        """Skeleton of one k, reusing the previous trial's subset if it is the same"""
+        rows, cols = StructuralAnchorExtractor(k).select_skeleton(df, context)
+        _, previous_rows, previous_cols, previous_context = previous
+        if (
+            previous_rows is not None
+            and np.array_equal(rows, previous_rows)
+            and np.array_equal(cols, previous_cols)
+        ):
+            return k, rows, cols, previous_context
+        return k, rows, cols, context.subset(rows, cols)
+
+    def _measure_candidate(
+        self, df: Sheet, context: CompressionContext, use_aggregation: bool
+    ) -> Tuple[int, float]:
+        """Token count and compression ratio of a skeleton, without encoding"""
+        tokens = 0
+        if self.use_translation:
+            tokens += self.translator.count_tokens(context)
+        if use_aggregation:
+            tokens += len(DataFormatAggregator.find_context_regions(context))
+
+        kept_cells = context.shape[0] * context.shape[1]
+        ratio = df.shape[0] * df.shape[1] / kept_cells if kept_cells else float("inf")
+        return tokens, ratio
+
+    @staticmethod
+    def count_tokens(result: Dict[str, Any]) -> int:
+        """
+        Count the meaningful entries of a compressed result
+
+        Args:
+            result: Output of compress()
+
+        Returns:
+            Number of inverted-index values and of the addresses and ranges
+            listed for them, plus number of format regions
+        """
+        tokens = 0
+        if "inverted_index" in result:
+            for addresses in result["inverted_index"].values():
+                tokens += 1 + len(addresses)
+        if "format_aggregation" in result:
+            for regions in result["format_aggregation"].values():
+                tokens += len(regions)
+        return tokens
+
+    def _encode_skeleton(
+        self, result: Dict[str, Any], original_shape: tuple, context: CompressionContext
+    ) -> Dict[str, Any]:
+        """Run translation and aggregation on the extracted skeleton"""
+        result = CompressionResult(result)
+
+        # Translation and aggregation only depend on the skeleton's context
+        scheduler = StageScheduler(self._get_executor(), self.trace_memory)
         if self.use_translation and self.translator:
-            inverted_index = self.translator.translate(current_df)
+            scheduler.add(
+                "inverted_index", self.translator.translate_context, ("context",)
+            )
+        if self.use_aggregation and self.aggregator:
+            scheduler.add(
+                "format_aggregation", self.aggregator.aggregate_context, ("context",)
+            )
+        if scheduler.executor is not None:
+            # Build the shared mask once instead of in each concurrent stage
+            context.mask
+        outputs = scheduler.run({"context": context})
+
+        # Step 2: Inverted index translation
+        if "inverted_index" in outputs:
+            inverted_index = outputs["inverted_index"]
             result["inverted_index"] = inverted_index
-            result["compression_steps"].append(
-                {"step": "inverted_translation", "unique_values": len(inverted_index)}
+            self._record_step(
+                result,
+                {"step": "inverted_translation", "unique_values": len(inverted_index)},
+                scheduler.metrics["inverted_index"],
             )
 
         # Step 3: Data format aggregation
-        if self.use_aggregation and self.aggregator:
-            format_groups = self.aggregator.aggregate(current_df)
+        if "format_aggregation" in outputs:
+            format_groups = outputs["format_aggregation"]
             result["format_aggregation"] = format_groups
-            result["compression_steps"].append(
-                {"step": "format_aggregation", "format_types": len(format_groups)}
+            self._record_step(
+                result,
+                {"step": "format_aggregation", "format_types": len(format_groups)},
+                scheduler.metrics["format_aggregation"],
             )
 
-        result["compressed_data"] = current_df
-        result["compression_ratio"] = (df.shape[0] * df.shape[1]) / (
-            current_df.shape[0] * current_df.shape[1]
+        # The skeleton is only materialized when a caller reads it
+        result.set_lazy("compressed_data", lambda: context.df)
+        result["compression_ratio"] = (original_shape[0] * original_shape[1]) / (
+            context.shape[0] * context.shape[1]
         )
 
         return result
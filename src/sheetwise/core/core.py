@@ -1,13 +1,29 @@
 """Main SpreadsheetLLM class integrating all components."""
 
-from typing import Any, Dict, Optional, Union
 import logging
+from typing import Any, Dict, Iterator, Optional, TextIO, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+from sheetwise.core.cache import CompressionCache
 from sheetwise.core.chain import ChainOfSpreadsheet
 from sheetwise.core.compressor import SheetCompressor
-from sheetwise.encoding.encoders import VanillaEncoder, JSONEncoder
+from sheetwise.encoding.classifiers import non_empty_mask
+from sheetwise.encoding.encoders import JSONEncoder, VanillaEncoder, write_lines
+from sheetwise.tables.context import CompressionContext
+from sheetwise.tables.sparse import Sheet, SparseSheet
+from sheetwise.workbook.xlsx_reader import read_xlsx
+
+# Sparsity values at which auto_configure() changes its choices
+_SPARSITY_THRESHOLDS = (0.5, 0.7, 0.9, 0.95)
+# Dense sheets with at least this many cells are configured from a sample
+_SAMPLE_MIN_CELLS = 1_000_000
+# Row strata and total cells of that sample
+_SAMPLE_BLOCKS = 32
+_SAMPLE_CELLS = 100_000
+# Width of the confidence bound, in standard errors
+_SAMPLE_Z = 3.0
 
 
 class SpreadsheetLLM:
@@ -15,16 +31,23 @@ class SpreadsheetLLM:
     Main class integrating all SpreadsheetLLM components
     """
 
-    def __init__(self, compression_params: Dict[str, Any] = None, enable_logging: bool = False):
+    def __init__(
+        self,
+        compression_params: Dict[str, Any] = None,
+        enable_logging: bool = False,
+        cache: Optional[CompressionCache] = None,
+    ):
         """
         Initialize SpreadsheetLLM framework
 
         Args:
             compression_params: Parameters for SheetCompressor
             enable_logging: Enable detailed logging for debugging
+            cache: On-disk cache for the LLM text of compress_and_encode_for_llm
         """
         params = compression_params or {}
         self.compressor = SheetCompressor(**params)
+        self.cache = cache
         self.vanilla_encoder = VanillaEncoder()
         self.json_encoder = JSONEncoder()
         self.chain_processor = ChainOfSpreadsheet(self.compressor)
@@ -43,19 +66,34 @@ class SpreadsheetLLM:
             self.logger.addHandler(handler)
             self.logger.setLevel(logging.INFO)
 
-    def auto_configure(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def auto_configure(
+        self, df: Sheet, context: Optional[CompressionContext] = None
+    ) -> Dict[str, Any]:
         """
         Auto-configure compression parameters based on spreadsheet characteristics
-        
+
+        Sparsity of large dense sheets is estimated from a sample of row
+        blocks; the whole sheet is only scanned when the estimate's
+        confidence bound contains one of the thresholds below.
+
         Args:
-            df: Input DataFrame to analyze
-            
+            df: Input DataFrame or SparseSheet to analyze
+            context: Precomputed cell facts for df, built if not given
+
         Returns:
             Optimized compression parameters
         """
-        total_cells = df.shape[0] * df.shape[1]
-        non_empty = self._count_non_empty_cells(df)
-        sparsity = 1 - (non_empty / total_cells) if total_cells > 0 else 0
+        sparsity = None
+        if isinstance(df, pd.DataFrame) and df.size >= _SAMPLE_MIN_CELLS:
+            estimate, margin = self._sample_sparsity(df)
+            if not any(abs(estimate - t) <= margin for t in _SPARSITY_THRESHOLDS):
+                sparsity = estimate
+                if hasattr(self, "logger"):
+                    self.logger.info(
+                        f"Sampled sparsity {estimate:.1%} (+/- {margin:.1%})"
+                    )
+        if sparsity is None:
+            sparsity = (context or CompressionContext(df)).sparsity
         
         # Auto-tune parameters
         config = {}
@@ -82,28 +120,85 @@ class SpreadsheetLLM:
             
         return config
 
-    def compress_with_auto_config(self, df: pd.DataFrame) -> str:
+    @staticmethod
+    def _sample_sparsity(df: pd.DataFrame, seed: int = 0) -> Tuple[float, float]:
         """
-        Automatically configure and compress spreadsheet
-        
+        Estimate a sheet's sparsity from one random row block per stratum
+
         Args:
             df: Input DataFrame
-            
+            seed: Seed for the block positions, fixed so results are repeatable
+
+        Returns:
+            (estimate, margin) where the true sparsity lies within
+            estimate +/- margin with high confidence
+        """
+        n_rows, n_cols = df.shape
+        n_blocks = min(_SAMPLE_BLOCKS, n_rows)
+        block_rows = max(1, _SAMPLE_CELLS // (n_blocks * n_cols))
+        bounds = np.linspace(0, n_rows, n_blocks + 1).astype(np.int64)
+        lengths = np.diff(bounds)
+        sizes = np.minimum(block_rows, lengths)
+        rng = np.random.default_rng(seed)
+        starts = bounds[:-1] + rng.integers(0, lengths - sizes + 1)
+
+        positions = np.concatenate([np.arange(a, a + n) for a, n in zip(starts, sizes)])
+        row_counts = non_empty_mask(df.iloc[positions]).sum(axis=1)
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        fill = np.add.reduceat(row_counts, offsets) / (sizes * n_cols)
+
+        # Each stratum is weighted by its share of the rows
+        density = float(lengths @ fill) / n_rows
+        # The spread between blocks stands in for the spread within strata,
+        # which one block per stratum cannot measure; the binomial term keeps
+        # the bound from vanishing when every block looks alike
+        variance = np.var(fill, ddof=1) / n_blocks if n_blocks > 1 else 0.0
+        variance += density * (1 - density) / len(positions) / n_cols
+        return 1 - density, _SAMPLE_Z * float(np.sqrt(variance))
+
+    def compress_with_auto_config(self, df: Sheet) -> str:
+        """
+        Automatically configure and compress spreadsheet
+
+        Args:
+            df: Input DataFrame or SparseSheet
+
         Returns:
             LLM-ready text with optimal compression
         """
-        # Get optimal configuration
-        auto_config = self.auto_configure(df)
+        # Get optimal configuration; the cell facts gathered to measure
+        # sparsity are reused by the compression stages
+        context = CompressionContext(df)
+        auto_config = self.auto_configure(df, context)
         
         # Create new compressor with optimal settings
         optimal_compressor = SheetCompressor(**auto_config)
         
         # Compress and encode
-        compressed = optimal_compressor.compress(df)
+        compressed = optimal_compressor.compress(df, context)
         return self.encode_compressed_for_llm(compressed)
 
-    def load_from_file(self, filepath: str) -> pd.DataFrame:
-        """Load spreadsheet from file"""
+    def load_from_file(
+        self, filepath: str, sparse: bool = False
+    ) -> Union[pd.DataFrame, SparseSheet]:
+        """
+        Load spreadsheet from file
+
+        Args:
+            filepath: Path to a .xlsx, .xls or .csv file
+            sparse: Return a SparseSheet holding only the non-empty cells;
+                CSV and .xlsx files are then streamed and never held densely,
+                and .xlsx sheets span their <dimension> used range
+
+        Returns:
+            The sheet as a DataFrame, or as a SparseSheet if sparse is set
+        """
+        if sparse:
+            if filepath.endswith(".csv"):
+                return SparseSheet.read_csv(filepath)
+            if filepath.endswith(".xlsx"):
+                return read_xlsx(filepath)
+            return SparseSheet.from_dataframe(self.load_from_file(filepath))
         if filepath.endswith(".xlsx") or filepath.endswith(".xls"):
             return pd.read_excel(filepath)
         elif filepath.endswith(".csv"):
@@ -119,7 +214,7 @@ class SpreadsheetLLM:
         """Encode with json encoding"""
         return self.json_encoder.encode(df)
 
-    def compress_spreadsheet(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def compress_spreadsheet(self, df: Sheet) -> Dict[str, Any]:
         """Compress spreadsheet using SheetCompressor"""
         return self.compressor.compress(df)
 
@@ -138,71 +233,165 @@ class SpreadsheetLLM:
         Returns:
             Clean, minimal text representation for LLM consumption
         """
-        lines = []
+        return "\n".join(self.iter_compressed_for_llm(compressed_result))
+
+    def iter_compressed_for_llm(
+        self, compressed_result: Dict[str, Any]
+    ) -> Iterator[str]:
+        """
+        Generate the lines of encode_compressed_for_llm() one at a time
+
+        Args:
+            compressed_result: Output from compress_spreadsheet()
 
+        Returns:
+            Iterator over the lines of the LLM-ready text
+        """
         # Add compression metadata
-        lines.append(
-            f"# Spreadsheet Data (Compressed {compressed_result['compression_ratio']:.1f}x)"
-        )
-        lines.append("")
+        ratio = compressed_result["compression_ratio"]
+        yield f"# Spreadsheet Data (Compressed {ratio:.1f}x)"
+        yield ""
 
         # Use inverted index if available (most efficient)
         if "inverted_index" in compressed_result:
-            lines.append("## Cell Data (value|addresses):")
+            yield "## Cell Data (value|addresses):"
             for value, addresses in compressed_result["inverted_index"].items():
                 addr_str = ",".join(addresses)
-                lines.append(f"{value}|{addr_str}")
+                yield f"{value}|{addr_str}"
 
         # Add format information compactly
         if "format_aggregation" in compressed_result:
-            lines.append("\n## Data Types:")
-            for data_type, cells in compressed_result["format_aggregation"].items():
-                if len(cells) > 5:  # Only show significant type groups
-                    lines.append(f"{data_type}: {len(cells)} cells")
+            yield "\n## Data Types:"
+            for data_type, regions in compressed_result["format_aggregation"].items():
+                cell_count = int(regions[:, -1].sum())
+                if cell_count > 5:  # Only show significant type groups
+                    yield f"{data_type}: {cell_count} cells in {len(regions)} regions"
+
+    def write_compressed_for_llm(
+        self, compressed_result: Dict[str, Any], sink: TextIO
+    ) -> int:
+        """
+        Write the LLM-ready text of a compressed result to a file-like sink
+
+        Only one line is held in memory at a time, so the output of very
+        large sheets can be written without building the whole string.
+
+        Args:
+            compressed_result: Output from compress_spreadsheet()
+            sink: Writable text file or stream
 
-        return "\n".join(lines)
+        Returns:
+            Number of characters written
+        """
+        return write_lines(self.iter_compressed_for_llm(compressed_result), sink)
 
-    def compress_and_encode_for_llm(self, df: pd.DataFrame) -> str:
+    def compress_and_encode_for_llm(self, df: Sheet) -> str:
         """
         One-step function: compress spreadsheet and return LLM-ready text
         This is the main function users will call
 
         Args:
-            df: Input DataFrame
+            df: Input DataFrame or SparseSheet
 
         Returns:
             Text ready to paste into ChatGPT/Claude
         """
-        compressed = self.compress_spreadsheet(df)
-        return self.encode_compressed_for_llm(compressed)
+        if self.cache is None:
+            return self.encode_compressed_for_llm(self.compress_spreadsheet(df))
+
+        key = self._llm_text_key(df)
+        text = self.cache.get(key)
+        if text is None:
+            text = self.encode_compressed_for_llm(self.compress_spreadsheet(df))
+            self.cache.set(key, text)
+        return text
+
+    def _llm_text_key(self, df: Sheet) -> str:
+        """Cache key of the LLM text of df under the current compressor settings"""
+        return self.cache.sheet_key(df, self.compressor.cache_params(), kind="llm_text")
+
+    def compress_and_encode_to_budget(
+        self,
+        df: Sheet,
+        max_tokens: Optional[int] = None,
+        compression_ratio: Optional[float] = None,
+    ) -> str:
+        """
+        Compress to fit a token budget or compression ratio and return LLM-ready text
 
-    def get_encoding_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Get statistics about the spreadsheet encoding"""
-        vanilla_encoding = self.encode_vanilla(df)
-        compressed_result = self.compress_spreadsheet(df)
-        json_encoding = self.encode_json(df)
+        Args:
+            df: Input DataFrame or SparseSheet
+            max_tokens: Maximum compressed token count
+            compression_ratio: Minimum compression ratio
+
+        Returns:
+            Text of the least lossy compression that meets the target
+        """
+        return self.encode_compressed_for_llm(
+            self.compress_to_budget(df, max_tokens, compression_ratio)
+        )
+
+    def compress_to_budget(
+        self,
+        df: Sheet,
+        max_tokens: Optional[int] = None,
+        compression_ratio: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Compress to fit a token budget or compression ratio
 
-        # Count actual tokens recieved via vanilla encoding
-        vanilla_tokens = self.vanilla_encoder.estimate_tokens(vanilla_encoding) 
+        Args:
+            df: Input DataFrame or SparseSheet
+            max_tokens: Maximum compressed token count
+            compression_ratio: Minimum compression ratio
 
-        # Count estimated tokens recieved via json encoding
-        json_tokens = self.json_encoder.estimate_tokens(json_encoding)
+        Returns:
+            The least lossy compression result that meets the target
+        """
+        compressed = self.compressor.compress_to_budget(
+            df, max_tokens=max_tokens, min_ratio=compression_ratio
+        )
+        if hasattr(self, "logger"):
+            budget = compressed["budget"]
+            self.logger.info(
+                f"Budget compression chose k={budget['k']}, "
+                f"aggregation={budget['use_aggregation']}, fits={budget['fits']}"
+            )
+        return compressed
+
+    def get_encoding_stats(self, df: Sheet) -> Dict[str, Any]:
+        """Get statistics about the spreadsheet encoding"""
+        context = CompressionContext(df)
+        compressed_result = self.compressor.compress(df, context)
+        non_empty = context.non_empty_count
+
+        # Token counts of the vanilla and JSON encodings, computed from the
+        # cells without building either text (or a dense copy of a sparse sheet)
+        vanilla_tokens = self.vanilla_encoder.estimate_sheet_tokens(df)
+        json_tokens = self.json_encoder.estimate_sheet_tokens(df)
+
+        # Skeleton shape from the extraction step, so the lazy compressed_data
+        # DataFrame is never built
+        compressed_shape = df.shape
+        for step in compressed_result["compression_steps"]:
+            if step["step"] == "structural_extraction":
+                compressed_shape = step["shape_after"]
 
         # For compressed data, count meaningful entries
-        compressed_tokens = 0
-        if "inverted_index" in compressed_result:
-            compressed_tokens += len(compressed_result["inverted_index"])
-        if "format_aggregation" in compressed_result:
-            for data_type, cells in compressed_result["format_aggregation"].items():
-                compressed_tokens += len(cells)
+        compressed_tokens = SheetCompressor.count_tokens(compressed_result)
 
-        # Fallback token count
+        # Without translation and aggregation the skeleton itself is the
+        # output; count the cell separators of its vanilla encoding
         if compressed_tokens == 0:
-            compressed_tokens = len(str(compressed_result).split())
+            if compressed_shape == df.shape:
+                compressed_tokens = vanilla_tokens
+            else:
+                n_rows, n_cols = compressed_shape
+                compressed_tokens = n_rows * max(n_cols - 1, 0) + 1
 
         return {
             "original_shape": df.shape,
-            "compressed_shape": compressed_result["compressed_data"].shape,
+            "compressed_shape": compressed_shape,
             "vanilla_tokens_estimate": vanilla_tokens,
             "json_tokens_estimate":json_tokens,
             "compressed_tokens_estimate": compressed_tokens,
@@ -210,16 +399,18 @@ class SpreadsheetLLM:
             "token_reduction_ratio": vanilla_tokens / compressed_tokens
             if compressed_tokens > 0
             else 0,
-            "sparsity_percentage": self._calculate_sparsity(df),
-            "non_empty_cells": self._count_non_empty_cells(df),
+            "sparsity_percentage": context.sparsity * 100,
+            "non_empty_cells": non_empty,
         }
 
-    def _calculate_sparsity(self, df: pd.DataFrame) -> float:
+    def _calculate_sparsity(
+        self, df: Sheet, context: Optional[CompressionContext] = None
+    ) -> float:
         """Calculate percentage of empty cells"""
-        total_cells = df.shape[0] * df.shape[1]
-        non_empty = self._count_non_empty_cells(df)
-        return ((total_cells - non_empty) / total_cells) * 100
+        return (context or CompressionContext(df)).sparsity * 100
 
-    def _count_non_empty_cells(self, df: pd.DataFrame) -> int:
+    def _count_non_empty_cells(
+        self, df: Sheet, context: Optional[CompressionContext] = None
+    ) -> int:
         """Count non-empty cells"""
-        return df.map(lambda x: x != "" and pd.notna(x)).sum().sum()
+        return (context or CompressionContext(df)).non_empty_count
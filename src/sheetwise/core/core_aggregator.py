@@ -1,5 +1,18 @@
-from sheetwise.core.core import SpreadsheetLLM
+from sheetwise.core.async_llm import AsyncSpreadsheetLLM
+from sheetwise.core.batch import BatchCompressor, BatchResult
+from sheetwise.core.cache import CompressionCache
 from sheetwise.core.chain import ChainOfSpreadsheet
 from sheetwise.core.compressor import SheetCompressor
+from sheetwise.core.core import SpreadsheetLLM
+from sheetwise.core.scheduler import StageMetrics
 
-__all__ = ["SpreadsheetLLM","ChainOfSpreadsheet","SheetCompressor"]
+__all__ = [
+    "SpreadsheetLLM",
+    "ChainOfSpreadsheet",
+    "SheetCompressor",
+    "CompressionCache",
+    "BatchCompressor",
+    "BatchResult",
+    "StageMetrics",
+    "AsyncSpreadsheetLLM",
+]
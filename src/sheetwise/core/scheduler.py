@@ -0,0 +1,238 @@
+"""Dependency-ordered execution of compression stages."""
+
+import time
+import tracemalloc
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class Stage:
+    """A named unit of work and the names of the values it consumes"""
+
+    name: str
+    func: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageMetrics:
+    """Resources used by one run of a stage"""
+
+    stage: str
+    wall_time: float
+    cpu_time: float
+    peak_bytes: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Metric values keyed by name, without the stage name"""
+        return {
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "peak_bytes": self.peak_bytes,
+        }
+
+
+@contextmanager
+def trace_allocations(enabled: bool = True) -> Iterator[None]:
+    """
+    Keep tracemalloc tracing for the duration of the block
+
+    Tracing is started on entry and stopped on exit unless it was already
+    running, so nested and concurrent measurements share one trace.
+
+    Args:
+        enabled: Do nothing when False
+    """
+    started = enabled and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def measure(
+    name: str, func: Callable[..., Any], args: tuple = (), trace_memory: bool = False
+) -> Tuple[Any, StageMetrics]:
+    """
+    Call func(*args) and record the resources it used
+
+    CPU time is that of the calling thread. Peak bytes are the largest
+    amount of memory allocated through Python above the level at the start
+    of the call. tracemalloc's peak is process-wide, so they are only
+    meaningful while no other thread of the process is being measured.
+
+    Args:
+        name: Stage name to record
+        func: Callable to run
+        args: Positional arguments for func
+        trace_memory: Record peak allocated bytes with tracemalloc
+
+    Returns:
+        Tuple of (func's return value, StageMetrics)
+    """
+    peak_bytes = None
+    with trace_allocations(trace_memory):
+        if trace_memory:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        value = func(*args)
+        cpu_time = time.thread_time() - cpu_start
+        wall_time = time.perf_counter() - wall_start
+        if trace_memory:
+            peak_bytes = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+    return value, StageMetrics(name, wall_time, cpu_time, peak_bytes)
+
+
+class _MeasuredStage:
+    """Picklable wrapper that runs a stage through measure()"""
+
+    def __init__(self, stage: Stage, trace_memory: bool):
+        self.stage = stage
+        self.trace_memory = trace_memory
+
+    def __call__(self, *args: Any) -> Tuple[Any, StageMetrics]:
+        return measure(self.stage.name, self.stage.func, args, self.trace_memory)
+
+
+class StageScheduler:
+    """
+    Runs stages once all of their inputs are available
+
+    Each stage receives its declared inputs as positional arguments and its
+    return value becomes available to later stages under the stage's name.
+    Without an executor stages run one after another in dependency order;
+    with one, every stage whose inputs are ready is submitted at once, so
+    independent stages overlap. The wall time, CPU time and (optionally)
+    peak allocated bytes of every stage are recorded in metrics. Peak bytes
+    are only recorded when stages run in the caller or on a process pool;
+    stages on any other executor may share a process with concurrent
+    stages, which would reset each other's peaks, so they report None.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, trace_memory: bool = False):
+        """
+        Initialize the scheduler
+
+        Args:
+            executor: Pool to run stages on, or None to run them in the caller
+            trace_memory: Record each stage's peak allocated bytes
+        """
+        self.executor = executor
+        self.trace_memory = trace_memory and (
+            executor is None or isinstance(executor, ProcessPoolExecutor)
+        )
+        self.stages: Dict[str, Stage] = {}
+        self.metrics: Dict[str, StageMetrics] = {}
+
+    def add(
+        self, name: str, func: Callable[..., Any], inputs: Tuple[str, ...] = ()
+    ) -> "StageScheduler":
+        """
+        Register a stage
+
+        Args:
+            name: Name under which the stage's result is published
+            func: Callable invoked with the values of inputs, in order
+            inputs: Names of initial values or other stages it depends on
+
+        Returns:
+            The scheduler, for chaining
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already registered")
+        self.stages[name] = Stage(name, func, tuple(inputs))
+        return self
+
+    def order(self, available: Tuple[str, ...] = ()) -> List[str]:
+        """
+        Topologically sort the stages
+
+        Args:
+            available: Names of values provided before any stage runs
+
+        Returns:
+            Stage names in an order that satisfies every dependency
+        """
+        done = set(available)
+        remaining = dict(self.stages)
+        ordered = []
+        while remaining:
+            ready = [
+                name
+                for name, stage in remaining.items()
+                if all(dependency in done for dependency in stage.inputs)
+            ]
+            if not ready:
+                missing = {
+                    dependency
+                    for stage in remaining.values()
+                    for dependency in stage.inputs
+                    if dependency not in done and dependency not in remaining
+                }
+                if missing:
+                    raise ValueError(f"Unknown stage inputs: {sorted(missing)}")
+                raise ValueError(f"Cyclic stage dependencies: {sorted(remaining)}")
+            for name in ready:
+                ordered.append(name)
+                done.add(name)
+                del remaining[name]
+        return ordered
+
+    def run(self, initial: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Execute every stage
+
+        Args:
+            initial: Values available to stages before any stage runs
+
+        Returns:
+            Dictionary of stage results keyed by stage name
+        """
+        values = dict(initial or {})
+        ordered = self.order(tuple(values))
+        self.metrics = {}
+
+        if self.executor is None:
+            for name in ordered:
+                stage = self.stages[name]
+                args = [values[dep] for dep in stage.inputs]
+                values[name], self.metrics[name] = _MeasuredStage(
+                    stage, self.trace_memory
+                )(*args)
+            return {name: values[name] for name in ordered}
+
+        pending = list(ordered)
+        running: Dict[Future, str] = {}
+        try:
+            while pending or running:
+                for name in list(pending):
+                    stage = self.stages[name]
+                    if all(dep in values for dep in stage.inputs):
+                        args = [values[dep] for dep in stage.inputs]
+                        call = _MeasuredStage(stage, self.trace_memory)
+                        running[self.executor.submit(call, *args)] = name
+                        pending.remove(name)
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    values[name], self.metrics[name] = future.result()
+        finally:
+            for future in running:
+                future.cancel()
+
+        return {name: values[name] for name in ordered}
@@ -1,20 +1,234 @@
 """Data type classification utilities for spreadsheet cells."""
 
+import datetime
 import re
-from typing import Any
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
 
+import numpy as np
 import pandas as pd
 
+# Type codes used by the batch classifier. The position of a name in this tuple
+# is its int8 code in the matrix returned by DataTypeClassifier.classify_frame.
+TYPE_NAMES = (
+    "Empty",
+    "Year",
+    "Integer",
+    "Float",
+    "Percentage",
+    "Date",
+    "Time",
+    "Currency",
+    "Email",
+    "Scientific",
+    "Others",
+)
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+# Vectorized equivalents of the checks in classify_cell_type. The integer and
+# float patterns mirror the grammar accepted by int() and float() so that both
+# paths agree on every input.
+_DIGITS = r"\d(?:_?\d)*"
+_INT_PATTERN = rf"\s*[+-]?{_DIGITS}\s*"
+_FLOAT_PATTERN = (
+    rf"\s*[+-]?(?:(?:{_DIGITS}(?:\.(?:{_DIGITS})?)?|\.{_DIGITS})"
+    rf"(?:[eE][+-]?{_DIGITS})?|(?i:inf(?:inity)?|nan))\s*"
+)
+_YEAR_PATTERN = r"\d{4}"
+_SCIENTIFIC_PATTERN = r"-?\d+\.?\d*[eE][+-]?\d+"
+_DATE_PATTERNS = [
+    r"\d{4}[-/]\d{1,2}[-/]\d{1,2}",
+    r"\d{1,2}[-/]\d{1,2}[-/]\d{4}",
+    r"\d{1,2}-\w{3}-\d{4}",
+]
+_TIME_PATTERN = re.compile(r"\d{1,2}:\d{2}(:\d{2})?(\s?(AM|PM))?", re.IGNORECASE)
+_CURRENCY_PATTERN = r"[$€£¥₹]"
+_EMAIL_PATTERN = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
+
+# Native date values; pd.Timestamp and datetime.datetime subclass datetime.date
+_DATE_TYPES = (datetime.date, np.datetime64)
+# infer_dtype results for object arrays that cannot hold native date values
+_DATE_FREE_INFERENCES = {
+    "string",
+    "bytes",
+    "integer",
+    "floating",
+    "mixed-integer-float",
+    "decimal",
+    "complex",
+    "boolean",
+    "empty",
+}
+
+
+def _non_empty(values: np.ndarray) -> np.ndarray:
+    """Boolean mask of cells that are neither missing nor the empty string"""
+    if values.dtype != object:
+        return ~pd.isna(values)
+
+    # Comparing first leaves far fewer cells for the slower missing-value check
+    try:
+        present = np.asarray(values != "", dtype=bool)
+    except (TypeError, ValueError):
+        # pd.NA (and array-valued cells) cannot be compared with a string
+        present = ~pd.isna(values)
+        present[present] = [value != "" for value in values[present]]
+        return present
+    present[present] = ~pd.isna(values[present])
+    return present
+
+
+def non_empty_mask(df: pd.DataFrame) -> np.ndarray:
+    """Boolean (rows, cols) matrix marking cells that hold a value"""
+    mask = np.zeros(df.shape, dtype=bool)
+    for j in range(df.shape[1]):
+        mask[:, j] = _non_empty(df.iloc[:, j].to_numpy())
+    return mask
+
+
+def cell_strings(series: pd.Series, present: np.ndarray) -> np.ndarray:
+    """
+    str(value).strip() for the non-empty cells of a column
+
+    Numeric columns are factorized first so each distinct number is formatted
+    once.
+
+    Args:
+        series: Column of a sheet
+        present: Non-empty mask of the column
+
+    Returns:
+        Object array of strings, one per non-empty cell
+    """
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        values = series.to_numpy()[present]
+        # Factorize bit patterns so that -0.0 and 0.0 stay distinct
+        keys = values.view(np.int64) if dtype == np.float64 else values
+        codes, uniques = pd.factorize(keys)
+        if dtype == np.float64:
+            uniques = uniques.view(np.float64)
+        strings = np.array([str(value) for value in uniques] + [""], dtype=object)
+        return strings[codes]
+
+    strings = series[present].map(str).str.strip()
+    return strings.to_numpy(dtype=object)
+
+
+class ClassificationCache:
+    """Bounded LRU cache of cell classifications keyed by value and value type"""
+
+    # Types whose equal values of the same type always classify alike
+    cacheable_types = (str, int, float, np.generic)
+
+    def __init__(self, maxsize: int = 4096):
+        """
+        Initialize the cache
+
+        Args:
+            maxsize: Maximum number of cached classifications
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Any, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def classify(self, value: Any, classify_fn: Callable[[Any], str]) -> str:
+        """
+        Return the cached classification of value, computing it on a miss
+
+        Unhashable values and values of other types are classified without
+        touching the cache. Missing values (NaN, NaT, NA) are never cached since
+        they do not compare equal to themselves.
+
+        Args:
+            value: Cell value
+            classify_fn: Classifier used on a cache miss
+
+        Returns:
+            Data type name
+        """
+        if not isinstance(value, self.cacheable_types) or value != value:
+            return classify_fn(value)
+
+        key = (type(value), value)
+        with self._lock:
+            data_type = self._entries.get(key)
+            if data_type is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data_type
+            self.misses += 1
+
+        data_type = classify_fn(value)
+        with self._lock:
+            self._entries[key] = data_type
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return data_type
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and eviction counters for sizing the cache"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
 
 class DataTypeClassifier:
     """Rule-based classifier for identifying data types in spreadsheet cells"""
 
+    # Shared memoization cache for classify_cell_type; None disables caching
+    cache: Optional[ClassificationCache] = ClassificationCache()
+
+    @classmethod
+    def configure_cache(cls, maxsize: Optional[int]) -> None:
+        """
+        Resize the classification cache
+
+        Args:
+            maxsize: Maximum number of cached values; 0 or None disables caching
+        """
+        cls.cache = ClassificationCache(maxsize) if maxsize else None
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Any]:
+        """Statistics of the classification cache (empty when disabled)"""
+        return cls.cache.stats() if cls.cache is not None else {}
+
     @staticmethod
     def classify_cell_type(value: Any) -> str:
         """Classify cell value into predefined data types"""
+        cache = DataTypeClassifier.cache
+        if cache is None:
+            return DataTypeClassifier._classify_cell_type(value)
+        return cache.classify(value, DataTypeClassifier._classify_cell_type)
+
+    @staticmethod
+    def _classify_cell_type(value: Any) -> str:
+        """Apply the classification rules to a single value"""
         if pd.isna(value) or value == "" or value is None:
             return "Empty"
 
+        # Native date/datetime values (e.g. from Excel date cells)
+        if isinstance(value, _DATE_TYPES):
+            return "Date"
+
         str_value = str(value).strip()
 
         # Check if value is effectively empty after stripping
@@ -72,3 +286,167 @@ class DataTypeClassifier:
             return "Email"
 
         return "Others"
+
+    @staticmethod
+    def classify_frame(
+        df: pd.DataFrame, mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Classify every cell of a DataFrame in one batch
+
+        Args:
+            df: Input DataFrame
+            mask: Precomputed non_empty_mask(df), if the caller already has it
+
+        Returns:
+            int8 matrix of shape df.shape holding codes from TYPE_NAMES
+        """
+        type_codes = np.zeros(df.shape, dtype=np.int8)
+        for j in range(df.shape[1]):
+            present = mask[:, j] if mask is not None else None
+            type_codes[:, j] = DataTypeClassifier.classify_series(
+                df.iloc[:, j], present
+            )
+        return type_codes
+
+    @staticmethod
+    def classify_series(
+        series: pd.Series, present: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Classify one column, using its dtype to skip string inspection
+
+        Numeric, boolean and datetime columns are assigned codes in bulk from
+        their values; only object and extension dtypes are stringified.
+
+        Args:
+            series: Column to classify
+            present: Precomputed non-empty mask of the column
+
+        Returns:
+            int8 array of type codes
+        """
+        dtype = series.dtype
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            return np.where(
+                series.isna().to_numpy(), TYPE_CODES["Empty"], TYPE_CODES["Date"]
+            ).astype(np.int8)
+
+        fast_path = isinstance(dtype, np.dtype) and (
+            dtype.kind in "biu" or dtype == np.float64
+        )
+        if not fast_path:
+            return DataTypeClassifier.classify_values(
+                series.to_numpy(dtype=object), present
+            )
+
+        values = series.to_numpy()
+        if dtype.kind == "b":
+            # str(True) is "True", which no rule matches
+            return np.full(len(values), TYPE_CODES["Others"], dtype=np.int8)
+
+        if dtype.kind in "iu":
+            is_year = (values >= 1900) & (values <= 2100)
+            return np.where(is_year, TYPE_CODES["Year"], TYPE_CODES["Integer"]).astype(
+                np.int8
+            )
+
+        # str() of a float switches to exponent notation outside [1e-4, 1e16)
+        with np.errstate(invalid="ignore"):
+            magnitude = np.abs(values)
+            scientific = (magnitude >= 1e16) & np.isfinite(values)
+            scientific |= (magnitude < 1e-4) & (magnitude > 0)
+        type_codes = np.where(scientific, TYPE_CODES["Scientific"], TYPE_CODES["Float"])
+        type_codes[np.isnan(values)] = TYPE_CODES["Empty"]
+        return type_codes.astype(np.int8)
+
+    @staticmethod
+    def classify_values(
+        values: np.ndarray, present: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Classify a 1-D array of raw cell values
+
+        Each distinct string form is classified once, so repeated values cost a
+        hash lookup rather than a full pass through the rules.
+
+        Args:
+            values: Array of cell values
+            present: Precomputed non-empty mask of the values
+
+        Returns:
+            int8 array of type codes
+        """
+        values = np.asarray(values, dtype=object)
+        type_codes = np.zeros(len(values), dtype=np.int8)
+        if present is None:
+            present = _non_empty(values)
+        if not present.any():
+            return type_codes
+
+        present_values = values[present]
+        inferred = pd.api.types.infer_dtype(present_values, skipna=False)
+        if inferred not in _DATE_FREE_INFERENCES:
+            is_date = np.fromiter(
+                (isinstance(v, _DATE_TYPES) for v in present_values),
+                dtype=bool,
+                count=len(present_values),
+            )
+        else:
+            is_date = np.zeros(len(present_values), dtype=bool)
+
+        classified = np.full(len(present_values), TYPE_CODES["Date"], dtype=np.int8)
+        if not is_date.all():
+            strings = pd.Series(present_values[~is_date], dtype=object)
+            codes, uniques = pd.factorize(strings.map(str).str.strip())
+            classified[~is_date] = DataTypeClassifier.classify_strings(uniques)[codes]
+
+        type_codes[present] = classified
+        return type_codes
+
+    @staticmethod
+    def classify_strings(strings: Any) -> np.ndarray:
+        """
+        Classify stripped string values with vectorized string operations
+
+        Applies the same rules, in the same order, as classify_cell_type.
+
+        Args:
+            strings: Sequence of already-stripped strings
+
+        Returns:
+            int8 array of type codes
+        """
+        s = pd.Series(np.asarray(strings, dtype=object), dtype=object)
+        type_codes = np.full(len(s), TYPE_CODES["Others"], dtype=np.int8)
+        undecided = np.ones(len(s), dtype=bool)
+
+        def assign(matches: Any, type_name: str) -> None:
+            hit = np.asarray(matches, dtype=bool) & undecided
+            type_codes[hit] = TYPE_CODES[type_name]
+            undecided[hit] = False
+
+        assign(s == "", "Empty")
+
+        year = s.str.fullmatch(_YEAR_PATTERN).to_numpy(dtype=bool)
+        if year.any():
+            years = s[year].map(int).to_numpy()
+            year[year] = (years >= 1900) & (years <= 2100)
+        assign(year, "Year")
+
+        assign(s.str.fullmatch(_SCIENTIFIC_PATTERN), "Scientific")
+
+        without_commas = s.str.replace(",", "", regex=False)
+        assign(without_commas.str.fullmatch(_INT_PATTERN), "Integer")
+        assign(without_commas.str.fullmatch(_FLOAT_PATTERN), "Float")
+
+        assign(s.str.endswith("%"), "Percentage")
+
+        for pattern in _DATE_PATTERNS:
+            assign(s.str.fullmatch(pattern), "Date")
+
+        assign(s.str.fullmatch(_TIME_PATTERN), "Time")
+        assign(s.str.contains(_CURRENCY_PATTERN, regex=True), "Currency")
+        assign(s.str.fullmatch(_EMAIL_PATTERN), "Email")
+
+        return type_codes
@@ -1,8 +1,69 @@
 """Encoding utilities for spreadsheet data."""
-from abc import ABC, abstractmethod
-import pandas as pd
 import json
 import re
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Iterable, Iterator, TextIO
+
+import numpy as np
+import pandas as pd
+
+from sheetwise.encoding.addresses import column_letter, to_excel_address
+from sheetwise.encoding.classifiers import _non_empty
+from sheetwise.tables.sparse import Sheet, SparseSheet
+
+# Characters JSONEncoder.estimate_tokens counts as structural tokens
+_JSON_STRUCTURAL = "{}[]:,"
+_JSON_SEPARATORS = re.compile(r'[{}[\]":,]')
+# Structural and content tokens of the fixed part of a JSONEncoder document:
+# the braces, keys and colons, the two separating commas and the dimensions
+_JSON_SKELETON_TOKENS = 43
+
+
+def _json_tokens(text: str) -> int:
+    """JSONEncoder.estimate_tokens of a piece of JSON text"""
+    structural = (
+        sum(text.count(char) for char in _JSON_STRUCTURAL) + text.count('"') * 2
+    )
+    return structural + len(_JSON_SEPARATORS.sub(" ", text).split())
+
+
+def _sum_per_value(values: np.ndarray, func: Callable[[Any], int]) -> int:
+    """Sum of func(value) over an object array, calling func once per distinct value"""
+    try:
+        codes, uniques = pd.factorize(values)
+    except TypeError:
+        # Unhashable cells, e.g. lists
+        return sum(func(value) for value in values)
+    counts = np.array([func(value) for value in uniques], dtype=np.int64)
+    return int(np.bincount(codes, minlength=len(uniques)) @ counts)
+
+
+def _json_value_tokens(value: Any) -> int:
+    return _json_tokens(json.dumps(value))
+
+
+def _pipe_count(value: Any) -> int:
+    return str(value).count("|")
+
+
+def write_lines(lines: Iterable[str], sink: TextIO) -> int:
+    """
+    Write newline-separated lines to a text sink one line at a time
+
+    Args:
+        lines: Lines of text, without trailing newlines
+        sink: Writable text file or stream
+
+    Returns:
+        Number of characters written
+    """
+    written = 0
+    for i, line in enumerate(lines):
+        if i:
+            line = "\n" + line
+        sink.write(line)
+        written += len(line)
+    return written
 
 class Encoder(ABC):
     """Base class for implementing different Encoders"""
@@ -13,13 +74,7 @@ class Encoder(ABC):
 
     def _to_excel_address(self, row: int, col: int) -> str:
         """Convert row, column indices to Excel address"""
-        col_letter = ""
-        col_num = col + 1
-        while col_num > 0:
-            col_num -= 1
-            col_letter = chr(col_num % 26 + ord("A")) + col_letter
-            col_num //= 26
-        return f"{col_letter}{row + 1}"
+        return to_excel_address(row, col)
     
         
 
@@ -37,13 +92,28 @@ class VanillaEncoder(Encoder):
         Returns:
             Markdown-style string representation
         """
-        lines = []
+        return "\n".join(self.iter_encode(df, include_format))
+
+    def iter_encode(
+        self, df: pd.DataFrame, include_format: bool = False
+    ) -> Iterator[str]:
+        """
+        Encode spreadsheet one row at a time
+
+        Args:
+            df: Input DataFrame
+            include_format: Whether to include format information
+
+        Returns:
+            Iterator over the lines of encode(df)
+        """
+        col_letters = [column_letter(j) for j in range(len(df.columns))]
 
         for i, row in df.iterrows():
             row_parts = []
             for j, col in enumerate(df.columns):
                 cell_value = row[col]
-                cell_addr = self._to_excel_address(i, j)
+                cell_addr = f"{col_letters[j]}{i + 1}"
 
                 if pd.isna(cell_value) or cell_value == "":
                     cell_repr = f"{cell_addr}, "
@@ -52,14 +122,45 @@ class VanillaEncoder(Encoder):
 
                 row_parts.append(cell_repr)
 
-            lines.append("|".join(row_parts))
-
-        return "\n".join(lines)
+            yield "|".join(row_parts)
     
     def estimate_tokens(self,encoded_data: str) -> int:
         """Markdown Specific token estimation"""
         return len(encoded_data.split("|")) # Each cell as a token
 
+    def estimate_sheet_tokens(self, df: Sheet) -> int:
+        """
+        Token estimate of encode(df) computed without building the string
+
+        Every cell adds one "|" separator except the last of each row, and
+        a value adds one more per "|" it contains, so only the non-empty
+        cells of text columns are inspected.
+
+        Args:
+            df: Input DataFrame or SparseSheet
+
+        Returns:
+            estimate_tokens(encode(df)), for a SparseSheet that of its dense form
+        """
+        n_rows, n_cols = df.shape
+        tokens = n_rows * max(n_cols - 1, 0) + 1
+
+        if isinstance(df, SparseSheet):
+            columns = [df.values]
+        else:
+            # Numbers, booleans and dates never format with a "|"
+            columns = [
+                df.iloc[:, j].to_numpy(dtype=object)
+                for j in range(n_cols)
+                if not (
+                    isinstance(df.dtypes.iloc[j], np.dtype)
+                    and df.dtypes.iloc[j].kind in "biufcmM"
+                )
+            ]
+        for values in columns:
+            tokens += _sum_per_value(values[_non_empty(values)], _pipe_count)
+        return tokens
+
 class JSONEncoder(Encoder):
     """Encoder for JSON format with JSON-specific token estimation"""
     
@@ -91,6 +192,50 @@ class JSONEncoder(Encoder):
         content_tokens = len(content_str.split())
         
         return structural_tokens + content_tokens
+
+    def estimate_sheet_tokens(self, df: Sheet) -> int:
+        """
+        Token estimate of encode(df) computed without building the string
+
+        Every element of the indented document sits on its own line, so the
+        estimate is the sum of a fixed skeleton, the brackets and commas of
+        the lists and the tokens of each element's own JSON text. Numbers,
+        booleans and nulls are a single token each; text values are
+        serialized once per distinct value.
+
+        Args:
+            df: Input DataFrame or SparseSheet
+
+        Returns:
+            estimate_tokens(encode(df)), for a SparseSheet that of its dense form
+        """
+        n_rows, n_cols = df.shape
+        tokens = _JSON_SKELETON_TOKENS
+        tokens += sum(_json_tokens(json.dumps(label)) for label in list(df.columns))
+        # Commas between column names, brackets and commas of the data rows
+        tokens += (
+            max(n_cols - 1, 0) + n_rows * (2 + max(n_cols - 1, 0)) + max(n_rows - 1, 0)
+        )
+
+        if isinstance(df, SparseSheet):
+            # Empty cells of the dense form encode as null
+            return (
+                tokens
+                + (n_rows * n_cols - df.nnz)
+                + _sum_per_value(df.values, _json_value_tokens)
+            )
+
+        for j in range(n_cols):
+            dtype = df.dtypes.iloc[j]
+            if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+                tokens += n_rows
+                continue
+            values = df.iloc[:, j].to_numpy(dtype=object)
+            present = pd.notna(values)
+            tokens += int(np.count_nonzero(~present)) + _sum_per_value(
+                values[present], _json_value_tokens
+            )
+        return tokens
         
         
         
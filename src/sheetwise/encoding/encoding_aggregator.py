@@ -1,12 +1,22 @@
-from sheetwise.encoding.data_types import CellInfo, TableRegion
-from sheetwise.encoding.encoders import VanillaEncoder
-from sheetwise.encoding.formula_parser import FormulaParser,FormulaDependencyAnalyzer
+from sheetwise.encoding.addresses import (
+    column_letter,
+    parse_excel_address,
+    to_excel_address,
+)
 from sheetwise.encoding.classifiers import DataTypeClassifier
+from sheetwise.encoding.data_types import CellInfo, TableRegion
+from sheetwise.encoding.encoders import VanillaEncoder, write_lines
+from sheetwise.encoding.formula_parser import FormulaDependencyAnalyzer, FormulaParser
 
-__all__ = ["CellInfo",
-           "TableRegion",
-           "VanillaEncoder",
-           "FormulaParser",
-           "FormulaDependencyAnalyzer",
-           "DataTypeClassifier"
-           ]
\ No newline at end of file
+__all__ = [
+    "CellInfo",
+    "TableRegion",
+    "VanillaEncoder",
+    "FormulaParser",
+    "FormulaDependencyAnalyzer",
+    "DataTypeClassifier",
+    "column_letter",
+    "to_excel_address",
+    "parse_excel_address",
+    "write_lines",
+]
@@ -0,0 +1,281 @@
+"""Per-call cell facts shared by the SheetCompressor stages."""
+
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from sheetwise.encoding.classifiers import (
+    DataTypeClassifier,
+    cell_strings,
+    non_empty_mask,
+)
+from sheetwise.tables.sparse import SparseSheet
+
+
+class CompressionContext:
+    """
+    Cell-level facts about one sheet, computed at most once per compression
+
+    Every fact is built lazily on first use and then shared by all stages:
+    the non-empty mask, the type-code matrix, the integer coordinates of
+    non-empty cells and their factorized (stripped) string values. A context
+    for an extracted skeleton is derived with subset(), which slices whatever
+    has already been computed instead of inspecting the cells again, and
+    refers to the parent sheet by row/column positions until its DataFrame
+    is actually requested.
+
+    A context for a SparseSheet keeps every fact per non-empty cell
+    (coordinates, cell_types, value codes), so stages that use those instead
+    of the dense mask and type_codes matrices do work proportional to the
+    number of values rather than to the sheet's area.
+    """
+
+    def __init__(self, df: Union[pd.DataFrame, SparseSheet]):
+        """
+        Initialize a context for one sheet
+
+        Args:
+            df: Sheet the context describes, dense or sparse
+        """
+        self._sheet: Optional[SparseSheet] = None
+        if isinstance(df, SparseSheet):
+            self._sheet, df = df, None
+        self._df: Optional[pd.DataFrame] = df
+        self._source = df
+        self._rows: Optional[np.ndarray] = None
+        self._cols: Optional[np.ndarray] = None
+        self._mask: Optional[np.ndarray] = None
+        self._type_codes: Optional[np.ndarray] = None
+        self._cell_types: Optional[np.ndarray] = None
+        self._non_empty_count: Optional[int] = None
+        self._value_codes: Optional[np.ndarray] = None
+        self._values: Optional[np.ndarray] = None
+
+    @property
+    def is_sparse(self) -> bool:
+        """Whether the context describes a SparseSheet"""
+        return self._sheet is not None
+
+    @property
+    def sheet(self) -> Optional[SparseSheet]:
+        """The SparseSheet the context describes, if any"""
+        return self._sheet
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """
+        The sheet, materialized from the parent on first access for subsets
+
+        For a sparse sheet this builds the dense DataFrame, at a cost
+        proportional to the sheet's area.
+        """
+        if self._df is None:
+            if self._sheet is not None:
+                self._df = self._sheet.to_dataframe()
+            else:
+                self._df = self._source.iloc[self._rows, self._cols]
+        return self._df
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Shape of the sheet"""
+        if self._sheet is not None:
+            return self._sheet.shape
+        if self._df is None:
+            return len(self._rows), len(self._cols)
+        return self._df.shape
+
+    @property
+    def index(self) -> pd.Index:
+        """Row labels of the sheet"""
+        if self._sheet is not None:
+            return self._sheet.index
+        if self._df is None:
+            return self._source.index[self._rows]
+        return self._df.index
+
+    def column(self, j: int) -> pd.Series:
+        """Column j of the sheet, without materializing the other columns"""
+        if self._df is None and self._sheet is None:
+            return self._source.iloc[:, self._cols[j]].iloc[self._rows]
+        return self.df.iloc[:, j]
+
+    @property
+    def mask(self) -> np.ndarray:
+        """(rows, cols) boolean matrix of non-empty cells"""
+        if self._mask is None:
+            if self._sheet is not None:
+                self._mask = np.zeros(self.shape, dtype=bool)
+                self._mask[self._sheet.rows, self._sheet.cols] = True
+            else:
+                self._mask = non_empty_mask(self.df)
+        return self._mask
+
+    @property
+    def type_codes(self) -> np.ndarray:
+        """(rows, cols) int8 matrix of type codes (see TYPE_NAMES)"""
+        if self._type_codes is None:
+            if self._sheet is not None:
+                self._type_codes = np.zeros(self.shape, dtype=np.int8)
+                self._type_codes[self._sheet.rows, self._sheet.cols] = self.cell_types
+            else:
+                self._type_codes = DataTypeClassifier.classify_frame(self.df, self.mask)
+        return self._type_codes
+
+    @property
+    def cell_types(self) -> np.ndarray:
+        """Type code of every non-empty cell, aligned with coordinates"""
+        if self._sheet is None:
+            return self.type_codes[self.mask]
+        if self._cell_types is None:
+            values = self._sheet.values
+            self._cell_types = DataTypeClassifier.classify_values(
+                values, np.ones(len(values), dtype=bool)
+            )
+        return self._cell_types
+
+    @property
+    def non_empty_count(self) -> int:
+        """Number of non-empty cells"""
+        if self._non_empty_count is None:
+            if self._sheet is not None:
+                self._non_empty_count = self._sheet.nnz
+            else:
+                self._non_empty_count = int(np.count_nonzero(self.mask))
+        return self._non_empty_count
+
+    @property
+    def sparsity(self) -> float:
+        """Fraction of cells that are empty, 0 for a sheet without cells"""
+        total_cells = self.shape[0] * self.shape[1]
+        return 1 - self.non_empty_count / total_cells if total_cells > 0 else 0
+
+    @property
+    def coordinates(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Row and column positions of non-empty cells, in row-major order"""
+        if self._sheet is not None:
+            return self._sheet.rows, self._sheet.cols
+        return np.nonzero(self.mask)
+
+    def line_counts(self, axis: int) -> np.ndarray:
+        """
+        Number of non-empty cells in every row (axis=1) or column (axis=0)
+
+        Args:
+            axis: Axis to count along, as in mask.sum(axis)
+
+        Returns:
+            int64 array with one count per row or column
+        """
+        if self._sheet is None:
+            return self.mask.sum(axis=axis)
+        positions = self._sheet.rows if axis == 1 else self._sheet.cols
+        return np.bincount(positions, minlength=self.shape[1 - axis])
+
+    @property
+    def row_numbers(self) -> np.ndarray:
+        """Row indices used in addresses: integer index labels, else positions"""
+        index = self.index
+        if pd.api.types.is_integer_dtype(index):
+            return index.to_numpy(dtype=np.int64)
+        return np.arange(len(index))
+
+    @property
+    def value_codes(self) -> np.ndarray:
+        """Code into values of every non-empty cell, in row-major order"""
+        if self._value_codes is None:
+            self._factorize_values()
+        return self._value_codes
+
+    @property
+    def values(self) -> np.ndarray:
+        """Distinct stripped cell strings, in order of first appearance"""
+        if self._values is None:
+            self._factorize_values()
+        return self._values
+
+    def _factorize_values(self) -> None:
+        """Stringify non-empty cells column by column and factorize them"""
+        if self._sheet is not None:
+            values = pd.Series(self._sheet.values, dtype=object)
+            strings = cell_strings(values, np.ones(len(values), dtype=bool))
+            self._value_codes, self._values = pd.factorize(strings)
+            return
+
+        mask = self.mask
+        n_cols = mask.shape[1]
+
+        # Stringify column by column, then restore row-major cell order so that
+        # values are numbered in order of first appearance
+        cols, rows = np.nonzero(mask.T)
+        strings = np.concatenate(
+            [np.empty(0, dtype=object)]
+            + [cell_strings(self.column(j), mask[:, j]) for j in range(n_cols)]
+        )
+        strings = strings[np.argsort(rows * n_cols + cols, kind="stable")]
+        self._value_codes, self._values = pd.factorize(strings)
+
+    def __getstate__(self) -> dict:
+        # Ship only the sheet this context describes, not the parent it slices
+        state = self.__dict__.copy()
+        if self._sheet is not None:
+            return state
+        state["_df"] = state["_source"] = self.df
+        state["_rows"] = state["_cols"] = None
+        return state
+
+    def subset(
+        self, row_positions: np.ndarray, col_positions: np.ndarray
+    ) -> "CompressionContext":
+        """
+        Derive the context of df.iloc[row_positions, col_positions]
+
+        Args:
+            row_positions: Row positions to keep
+            col_positions: Column positions to keep
+
+        Returns:
+            Context for the sub-sheet, reusing every fact computed so far
+        """
+        row_positions = np.asarray(row_positions, dtype=np.int64)
+        col_positions = np.asarray(col_positions, dtype=np.int64)
+        if self._sheet is not None:
+            return self._sparse_subset(row_positions, col_positions)
+
+        sub = CompressionContext(self._source)
+        sub._df = None
+        if self._df is None:
+            sub._rows, sub._cols = self._rows[row_positions], self._cols[col_positions]
+        else:
+            sub._source = self._df
+            sub._rows, sub._cols = row_positions, col_positions
+
+        window = np.ix_(row_positions, col_positions)
+        if self._mask is not None:
+            sub._mask = self._mask[window]
+        if self._type_codes is not None:
+            sub._type_codes = self._type_codes[window]
+        if self._value_codes is not None:
+            # value_codes follow the row-major order of the non-empty cells, so
+            # a kept cell's code sits at its rank among the parent's cells
+            sub_rows, sub_cols = np.nonzero(sub._mask)
+            n_cols = self._mask.shape[1]
+            cells = row_positions[sub_rows] * n_cols + col_positions[sub_cols]
+            ranks = np.searchsorted(np.flatnonzero(self._mask), cells)
+            sub._value_codes, kept = pd.factorize(self._value_codes[ranks])
+            sub._values = self._values[kept]
+        return sub
+
+    def _sparse_subset(
+        self, row_positions: np.ndarray, col_positions: np.ndarray
+    ) -> "CompressionContext":
+        """subset() for a sparse sheet, in time proportional to its cells"""
+        sheet, taken = self._sheet._subset_cells(row_positions, col_positions)
+        sub = CompressionContext(sheet)
+        if self._cell_types is not None:
+            sub._cell_types = self._cell_types[taken]
+        if self._value_codes is not None:
+            sub._value_codes, kept = pd.factorize(self._value_codes[taken])
+            sub._values = self._values[kept]
+        return sub
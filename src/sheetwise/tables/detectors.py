@@ -1,10 +1,12 @@
 """Table detection utilities."""
 
-from typing import List
+from typing import List, Union
 
 import pandas as pd
 
+from sheetwise.encoding.addresses import to_excel_address
 from sheetwise.encoding.data_types import TableRegion
+from sheetwise.tables.sparse import SparseSheet
 
 
 class TableDetector:
@@ -13,12 +15,12 @@ class TableDetector:
     def __init__(self, min_table_size: int = 2):
         self.min_table_size = min_table_size
 
-    def detect_tables(self, df: pd.DataFrame) -> List[TableRegion]:
+    def detect_tables(self, df: Union[pd.DataFrame, SparseSheet]) -> List[TableRegion]:
         """
         Detect table regions in the spreadsheet
 
         Args:
-            df: Input DataFrame
+            df: Input DataFrame or SparseSheet
 
         Returns:
             List of detected table regions
@@ -26,11 +28,14 @@ class TableDetector:
         tables = []
 
         # Simple heuristic: find rectangular regions with data
-        non_empty_cells = []
-        for i, row in df.iterrows():
-            for j, col in enumerate(df.columns):
-                if pd.notna(row[col]) and row[col] != "":
-                    non_empty_cells.append((i, j))
+        if isinstance(df, SparseSheet):
+            non_empty_cells = list(zip(df.index[df.rows], df.cols.tolist()))
+        else:
+            non_empty_cells = []
+            for i, row in df.iterrows():
+                for j, col in enumerate(df.columns):
+                    if pd.notna(row[col]) and row[col] != "":
+                        non_empty_cells.append((i, j))
 
         if not non_empty_cells:
             return tables
@@ -58,10 +63,4 @@ class TableDetector:
 
     def _to_excel_address(self, row: int, col: int) -> str:
         """Convert row, column indices to Excel address"""
-        col_letter = ""
-        col_num = col + 1
-        while col_num > 0:
-            col_num -= 1
-            col_letter = chr(col_num % 26 + ord("A")) + col_letter
-            col_num //= 26
-        return f"{col_letter}{row + 1}"
+        return to_excel_address(row, col)
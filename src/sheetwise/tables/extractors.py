@@ -1,11 +1,20 @@
 """Compression modules for SpreadsheetLLM framework."""
 
-from collections import defaultdict
-from typing import Any, Dict, List, Tuple
+import warnings
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
-from sheetwise.encoding.classifiers import DataTypeClassifier
+from sheetwise.encoding.addresses import (
+    parse_excel_addresses,
+    to_excel_address,
+    to_excel_addresses,
+    to_excel_ranges,
+)
+from sheetwise.encoding.classifiers import TYPE_CODES, TYPE_NAMES
+from sheetwise.tables.context import CompressionContext
+from sheetwise.tables.sparse import Sheet, SparseSheet
 
 
 class StructuralAnchorExtractor:
@@ -20,328 +29,860 @@ class StructuralAnchorExtractor:
         """
         self.k = k
 
-    def find_structural_anchors(self, df: pd.DataFrame) -> Tuple[List[int], List[int]]:
+    def find_structural_anchors(
+        self, df: Sheet, context: Optional[CompressionContext] = None
+    ) -> Tuple[List[int], List[int]]:
         """
         Identify heterogeneous rows and columns that serve as structural anchors
 
+        A row or column is heterogeneous if it holds more than two distinct data
+        types or lies on the sheet boundary. Types are classified once for the
+        whole sheet and counted per row and per column.
+
         Args:
-            df: Input DataFrame
+            df: Input DataFrame or SparseSheet
+            context: Precomputed cell facts for df, built if not given
 
         Returns:
             Tuple of (anchor_rows, anchor_cols)
         """
-        anchor_rows = []
-        anchor_cols = []
-
-        # Find heterogeneous rows (rows with significant changes)
-        for i in range(len(df)):
-            if self._is_heterogeneous_row(df, i):
-                anchor_rows.append(i)
-
-        # Find heterogeneous columns
-        for j in range(len(df.columns)):
-            if self._is_heterogeneous_col(df, j):
-                anchor_cols.append(j)
+        anchor_rows, anchor_cols = self._anchor_flags(context or CompressionContext(df))
+        return (
+            np.flatnonzero(anchor_rows).tolist(),
+            np.flatnonzero(anchor_cols).tolist(),
+        )
+
+    def _anchor_flags(
+        self, context: CompressionContext
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Boolean anchor flags for every row and column of the sheet"""
+        if context.is_sparse:
+            # Build the per-line type tables from the non-empty cells only
+            rows, cols = context.coordinates
+            cell_types = context.cell_types
+            n_rows, n_cols = context.shape
+            row_types = self._cell_type_presence(
+                rows, cell_types, context.line_counts(1), n_cols
+            )
+            col_types = self._cell_type_presence(
+                cols, cell_types, context.line_counts(0), n_rows
+            )
+            return self._flag_heterogeneous(row_types), self._flag_heterogeneous(
+                col_types
+            )
 
-        return anchor_rows, anchor_cols
+        type_codes = context.type_codes
+        return self._heterogeneous(type_codes), self._heterogeneous(type_codes.T)
+
+    @staticmethod
+    def _type_presence(type_codes: np.ndarray) -> np.ndarray:
+        """(lines, types) table of which type codes occur in each matrix row"""
+        n_lines = type_codes.shape[0]
+        present = np.zeros((n_lines, len(TYPE_NAMES)), dtype=bool)
+        present[np.arange(n_lines)[:, None], type_codes] = True
+        return present
+
+    @staticmethod
+    def _cell_type_presence(
+        positions: np.ndarray,
+        cell_types: np.ndarray,
+        counts: np.ndarray,
+        line_length: int,
+    ) -> np.ndarray:
+        """_type_presence() from the line position and type of each non-empty cell"""
+        present = np.zeros((len(counts), len(TYPE_NAMES)), dtype=bool)
+        present[positions, cell_types] = True
+        # Lines that are not completely filled also hold empty cells
+        present[:, TYPE_CODES["Empty"]] |= counts < line_length
+        return present
+
+    @staticmethod
+    def _flag_heterogeneous(presence: np.ndarray) -> np.ndarray:
+        """Flag lines of a type-presence table that are heterogeneous or boundaries"""
+        heterogeneous = presence.sum(axis=1) > 2
+        if len(heterogeneous):
+            heterogeneous[[0, -1]] = True
+        return heterogeneous
+
+    @staticmethod
+    def _heterogeneous(type_codes: np.ndarray) -> np.ndarray:
+        """Flag rows of a type-code matrix that are heterogeneous or on the boundary"""
+        return StructuralAnchorExtractor._flag_heterogeneous(
+            StructuralAnchorExtractor._type_presence(type_codes)
+        )
+
+    @staticmethod
+    def _dilate(flags: np.ndarray, k: int) -> np.ndarray:
+        """Mark every position within distance k of a flagged position"""
+        counts = np.concatenate(([0], np.cumsum(flags)))
+        positions = np.arange(len(flags))
+        low = np.clip(positions - k, 0, len(flags))
+        high = np.clip(positions + k + 1, 0, len(flags))
+        return counts[high] > counts[low]
+
+    def _keep(self, content: np.ndarray, anchors: np.ndarray) -> np.ndarray:
+        """Content lines plus the k-neighborhoods of anchors near content"""
+        anchors_near_content = anchors & self._dilate(content, self.k)
+        keep = content | self._dilate(anchors_near_content, self.k)
 
-    def _is_heterogeneous_row(self, df: pd.DataFrame, row_idx: int) -> bool:
-        """Check if a row is heterogeneous (contains diverse data types/formats)"""
-        if row_idx >= len(df):
-            return False
+        # If no content found, keep minimal structure
+        if not keep.any() and len(keep):
+            keep[[0, min(5, len(keep) - 1)]] = True
+        return keep
 
-        row_data = df.iloc[row_idx]
-        data_types = [DataTypeClassifier.classify_cell_type(val) for val in row_data]
-        unique_types = set(data_types)
+    def select_skeleton(
+        self, df: Sheet, context: Optional[CompressionContext] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Select the structurally important rows and columns of a sheet
 
-        # Consider row heterogeneous if it has multiple data types or is at boundary
-        return len(unique_types) > 2 or row_idx in [0, len(df) - 1]
+        Args:
+            df: Input DataFrame or SparseSheet
+            context: Precomputed cell facts for df, built if not given
 
-    def _is_heterogeneous_col(self, df: pd.DataFrame, col_idx: int) -> bool:
-        """Check if a column is heterogeneous"""
-        if col_idx >= len(df.columns):
-            return False
+        Returns:
+            Tuple of sorted (row_positions, col_positions)
+        """
+        context = context or CompressionContext(df)
+        anchor_rows, anchor_cols = self._anchor_flags(context)
 
-        col_data = df.iloc[:, col_idx]
-        data_types = [DataTypeClassifier.classify_cell_type(val) for val in col_data]
-        unique_types = set(data_types)
+        keep_rows = self._keep(context.line_counts(1) > 0, anchor_rows)
+        keep_cols = self._keep(context.line_counts(0) > 0, anchor_cols)
 
-        return len(unique_types) > 2 or col_idx in [0, len(df.columns) - 1]
+        return np.flatnonzero(keep_rows), np.flatnonzero(keep_cols)
 
-    def extract_skeleton(self, df: pd.DataFrame) -> pd.DataFrame:
+    def extract_skeleton(
+        self, df: Sheet, context: Optional[CompressionContext] = None
+    ) -> pd.DataFrame:
         """
         Extract spreadsheet skeleton by keeping only structurally important rows/columns
         More aggressive compression by removing homogeneous empty regions
 
         Args:
-            df: Input DataFrame
+            df: Input DataFrame or SparseSheet
+            context: Precomputed cell facts for df, built if not given
 
         Returns:
             Compressed DataFrame with structural skeleton
         """
-        # Find rows and columns with actual content
-        rows_with_content = []
-        cols_with_content = []
+        sorted_rows, sorted_cols = self.select_skeleton(df, context)
 
-        for i in range(len(df)):
-            row_has_content = any(
-                pd.notna(df.iloc[i, j]) and df.iloc[i, j] != ""
-                for j in range(len(df.columns))
-            )
-            if row_has_content:
-                rows_with_content.append(i)
+        if isinstance(df, SparseSheet):
+            return df.subset(sorted_rows, sorted_cols)
+        return df.iloc[sorted_rows, sorted_cols]
+
+
+class ChunkedSkeletonExtractor(StructuralAnchorExtractor):
+    """
+    Structural-anchor extraction over a sheet that arrives in row blocks
+
+    Row selection only depends on rows within 2k of each other, so every block
+    is classified on its own and rows are emitted once the rows that could
+    still affect them have been seen. Only the undecided tail of the stream
+    (at most one block plus 2k rows) and per-column summaries are held in
+    memory. The result matches extract_skeleton on the concatenated blocks.
+
+    Cell types depend on column dtypes, which pandas infers per block, so
+    every block is cast to the dtypes pd.concat would give its columns. Those
+    are only known up to the current block unless dtype_samples of the whole
+    sheet are given; dtype_drift tells whether an earlier block was
+    classified with a dtype the concatenated sheet does not have.
+    """
+
+    def __init__(self, k: int = 4, dtype_samples: Optional[pd.DataFrame] = None):
+        """
+        Initialize with k parameter controlling neighborhood retention
+
+        Args:
+            k: Number of rows/columns to retain around anchor points
+            dtype_samples: samples of a previous pass over the same blocks,
+                fixing every block's dtypes to those of the concatenated sheet
+        """
+        super().__init__(k)
+        self._fixed_dtypes = dtype_samples is not None
+        # One row per block that pd.concat promotes like the block itself
+        self.samples: Optional[pd.DataFrame] = dtype_samples
+        self.dtype_drift = False
+        self._block_dtypes: List[pd.Series] = []
+        self.n_rows = 0
+        self.columns: Optional[pd.Index] = None
+        self.important_cols: Optional[np.ndarray] = None
+        self._reach = max(k, 0)
+        self._pending: Optional[pd.DataFrame] = None
+        # Content/anchor flags for the pending rows, preceded by up to 2k
+        # already-decided rows whose flags can still affect them
+        self._content = np.zeros(0, dtype=bool)
+        self._anchors = np.zeros(0, dtype=bool)
+        self._history = 0
+        self._head: Optional[pd.DataFrame] = None
+        self._any_content = False
+        self._col_content: Optional[np.ndarray] = None
+        self._col_types: Optional[np.ndarray] = None
+
+    def iter_skeleton(self, blocks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        Yield the skeleton rows of a sheet block by block
+
+        Yielded frames keep every column. Once the iterator is exhausted,
+        important_cols holds the column positions to keep.
+
+        Args:
+            blocks: Row blocks of the sheet, in order, with identical columns
+
+        Yields:
+            DataFrames of selected rows
+        """
+        for block in blocks:
+            selected = self.feed(block)
+            if len(selected):
+                yield selected
+        selected = self.finish()
+        if len(selected):
+            yield selected
+
+    def feed(self, block: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add the next row block and return the rows whose selection is now final
+
+        Args:
+            block: Next row block of the sheet
 
-        for j in range(len(df.columns)):
-            col_has_content = any(
-                pd.notna(df.iloc[i, j]) and df.iloc[i, j] != "" for i in range(len(df))
+        Returns:
+            Selected rows that can no longer be affected by later blocks
+        """
+        if self.columns is None:
+            self.columns = block.columns
+            self._col_content = np.zeros(block.shape[1], dtype=bool)
+            self._col_types = np.zeros((block.shape[1], len(TYPE_NAMES)), dtype=bool)
+        elif block.shape[1] != len(self.columns):
+            raise ValueError("All row blocks must have the same number of columns")
+
+        block = self._conform(block)
+        context = CompressionContext(block)
+        mask, type_codes = context.mask, context.type_codes
+        content = mask.any(axis=1)
+        anchors = self._type_presence(type_codes).sum(axis=1) > 2
+        if self.n_rows == 0 and len(anchors):
+            anchors[0] = True
+
+        self._col_content |= mask.any(axis=0)
+        self._col_types |= self._type_presence(type_codes.T)
+
+        # Remember the first rows in case the sheet turns out to be empty
+        if self._head is None:
+            self._head = block.iloc[:6]
+        elif len(self._head) < 6:
+            self._head = pd.concat([self._head, block.iloc[: 6 - len(self._head)]])
+
+        self._any_content |= bool(content.any())
+        self.n_rows += len(block)
+        self._content = np.concatenate([self._content, content])
+        self._anchors = np.concatenate([self._anchors, anchors])
+        self._pending = (
+            block if self._pending is None else pd.concat([self._pending, block])
+        )
+
+        # A row is final once the rows up to 2k below it have been seen
+        return self._emit(len(self._pending) - 2 * self._reach - 1)
+
+    def finish(self) -> pd.DataFrame:
+        """
+        Close the stream, returning the remaining selected rows
+
+        Also computes important_cols from the per-column summaries.
+
+        Returns:
+            Selected rows that were still pending
+        """
+        if self.columns is None:
+            raise ValueError("No row blocks were provided")
+
+        if self.samples is not None:
+            final = self.samples.dtypes
+            self.dtype_drift = any(
+                not dtypes.equals(final) for dtypes in self._block_dtypes
             )
-            if col_has_content:
-                cols_with_content.append(j)
 
-        # Find structural anchors among content rows/columns
-        anchor_rows, anchor_cols = self.find_structural_anchors(df)
+        if len(self._anchors) > self._history:
+            self._anchors[-1] = True  # last row of the sheet
+        selected = self._emit(len(self._pending))
 
-        # Combine content-based and anchor-based selection
-        important_rows = set(rows_with_content)
-        important_cols = set(cols_with_content)
+        col_anchors = self._col_types.sum(axis=1) > 2
+        if len(col_anchors):
+            col_anchors[[0, -1]] = True
+        self.important_cols = np.flatnonzero(self._keep(self._col_content, col_anchors))
 
-        # Add anchors and their neighborhoods (but only if they have nearby content)
-        for anchor in anchor_rows:
-            if any(
-                abs(anchor - content_row) <= self.k for content_row in rows_with_content
-            ):
-                for i in range(
-                    max(0, anchor - self.k), min(len(df), anchor + self.k + 1)
-                ):
-                    important_rows.add(i)
-
-        for anchor in anchor_cols:
-            if any(
-                abs(anchor - content_col) <= self.k for content_col in cols_with_content
-            ):
-                for j in range(
-                    max(0, anchor - self.k), min(len(df.columns), anchor + self.k + 1)
-                ):
-                    important_cols.add(j)
+        if not self._any_content:
+            keep = sorted({0, min(5, self.n_rows - 1)})
+            return self._head.iloc[keep]
+        return selected
 
-        # If no content found, keep minimal structure
-        if not important_rows:
-            important_rows = {0, min(5, len(df) - 1)}
-        if not important_cols:
-            important_cols = {0, min(5, len(df.columns) - 1)}
+    @staticmethod
+    def dtype_sample(block: pd.DataFrame) -> pd.DataFrame:
+        """
+        One row per column of block that pd.concat promotes like the whole block
 
-        # Extract skeleton
-        sorted_rows = sorted(list(important_rows))
-        sorted_cols = sorted(list(important_cols))
+        Each column contributes its first non-missing value, or a missing one
+        if it has none, so all-missing columns stay all-missing.
 
-        skeleton_df = df.iloc[sorted_rows, sorted_cols].copy()
+        Args:
+            block: Non-empty row block
 
-        return skeleton_df
+        Returns:
+            Single-row DataFrame with the block's columns and dtypes
+        """
+        positions = block.notna().to_numpy().argmax(axis=0)
+        sample = pd.concat(
+            [
+                block.iloc[[position], j].reset_index(drop=True)
+                for j, position in enumerate(positions)
+            ],
+            axis=1,
+        )
+        sample.columns = block.columns
+        return sample
+
+    def _conform(self, block: pd.DataFrame) -> pd.DataFrame:
+        """Cast block to the dtypes its columns have in the concatenated sheet"""
+        with warnings.catch_warnings():
+            # pd.concat's exclusion of all-missing columns from dtype
+            # resolution is deprecated, but it is what the sheet would get
+            warnings.simplefilter("ignore", FutureWarning)
+            if not self._fixed_dtypes and len(block):
+                sample = self.dtype_sample(block)
+                self.samples = (
+                    sample
+                    if self.samples is None
+                    else pd.concat([self.samples, sample], ignore_index=True)
+                )
+            if self.samples is not None and not block.dtypes.equals(
+                self.samples.dtypes
+            ):
+                samples = self.samples.set_axis(block.columns, axis=1)
+                block = pd.concat([samples, block]).iloc[len(samples) :]
+        self._block_dtypes.append(block.dtypes)
+        return block
+
+    def _emit(self, n_final: int) -> pd.DataFrame:
+        """Return the kept rows among the first n_final pending rows and drop them"""
+        n_final = max(n_final, 0)
+        near_content = self._dilate(self._content, self.k)
+        keep = self._content | self._dilate(self._anchors & near_content, self.k)
+        selected = self._pending.iloc[
+            np.flatnonzero(keep[self._history : self._history + n_final])
+        ]
+
+        self._pending = self._pending.iloc[n_final:]
+        start = max(self._history + n_final - 2 * self._reach, 0)
+        self._content = self._content[start:]
+        self._anchors = self._anchors[start:]
+        self._history = self._history + n_final - start
+        return selected
 
 
 class InvertedIndexTranslator:
     """Implements inverted-index translation for token efficiency"""
 
-    def translate(self, df: pd.DataFrame) -> Dict[str, List[str]]:
+    def translate(
+        self, df: Sheet, context: Optional[CompressionContext] = None
+    ) -> Dict[str, List[str]]:
         """
         Convert spreadsheet to inverted index format
         More efficient by grouping empty cells and deduplicating values
 
         Args:
-            df: Input DataFrame
+            df: Input DataFrame or SparseSheet
+            context: Precomputed cell facts for df, built if not given
 
         Returns:
             Dictionary with cell values as keys and cell addresses as values
         """
-        inverted_index = defaultdict(list)
-        empty_cells = []
+        return self.translate_context(context or CompressionContext(df))
 
-        for i, row in df.iterrows():
-            for j, col in enumerate(df.columns):
-                cell_value = row[col]
-                cell_addr = self._to_excel_address(i, j)
+    def translate_context(self, context: CompressionContext) -> Dict[str, List[str]]:
+        """
+        Convert the sheet described by a context to inverted index format
+
+        Only the context's cell facts are read, so a skeleton context is never
+        materialized as a DataFrame.
+
+        Args:
+            context: Cell facts of the sheet
+
+        Returns:
+            Dictionary with cell values as keys and cell addresses as values
+        """
+        keys, rows, cols, values = self._value_cells(context)
+        address_lists = self._group_addresses(keys, rows, cols, len(values))
+        return dict(zip(values.tolist(), address_lists))
 
-                if pd.isna(cell_value) or cell_value == "":
-                    empty_cells.append(cell_addr)
-                else:
-                    str_value = str(cell_value).strip()
-                    inverted_index[str_value].append(cell_addr)
+    def count_tokens(self, context: CompressionContext) -> int:
+        """
+        Count the values and addresses translate_context would emit
+
+        The covering rectangles are computed but never formatted as text.
+
+        Args:
+            context: Cell facts of the sheet
+
+        Returns:
+            Number of distinct values plus number of addresses and ranges
+        """
+        keys, rows, cols, values = self._value_cells(context)
+        if len(keys) == 0:
+            return len(values)
+        return len(values) + len(self._cover(keys, rows, cols)[0])
+
+    @staticmethod
+    def _value_cells(
+        context: CompressionContext,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Value codes, sheet rows and columns of the non-blank cells, and values"""
+        rows, cols = context.coordinates
+        keys, values = context.value_codes, context.values
 
         # Don't include empty cells in final output (major token savings)
-        # Only keep non-empty values
-        final_index = {}
-        for value, addresses in inverted_index.items():
-            if value and value.strip():  # Skip empty/whitespace values
-                if len(addresses) > 1:
-                    # Try to create ranges for contiguous cells
-                    final_index[value] = self._merge_address_ranges(addresses)
-                else:
-                    final_index[value] = addresses
-
-        return final_index
+        # Skip values that are empty after stripping whitespace
+        blank = np.asarray(values == "", dtype=bool)
+        if blank.any():
+            kept = ~blank[keys]
+            keys = (np.cumsum(~blank) - 1)[keys[kept]]
+            rows, cols = rows[kept], cols[kept]
+            values = values[~blank]
+        return keys, context.row_numbers[rows], cols, values
+
+    def _group_addresses(
+        self, keys: np.ndarray, rows: np.ndarray, cols: np.ndarray, n_keys: int
+    ) -> List[List[str]]:
+        """
+        Cover each key's cells with rectangles and format them as addresses
+
+        Rectangles of 3+ cells are written as ranges (e.g. B2:F40), smaller
+        ones as individual addresses.
+
+        Args:
+            keys: Key code of every cell, in [0, n_keys)
+            rows: Row index of every cell
+            cols: Column index of every cell
+            n_keys: Number of distinct keys
+
+        Returns:
+            One list of addresses/ranges per key, ordered by column then row
+        """
+        if len(keys) == 0:
+            return [[] for _ in range(n_keys)]
+
+        token_key, top, left, bottom, right = self._cover(keys, rows, cols)
+        is_range = (top != bottom) | (left != right)
+        tokens = np.empty(len(token_key), dtype=object)
+        tokens[~is_range] = to_excel_addresses(top[~is_range], left[~is_range])
+        tokens[is_range] = to_excel_ranges(
+            top[is_range], left[is_range], bottom[is_range], right[is_range]
+        )
+
+        token_order = np.lexsort((top, left, token_key))
+        tokens = tokens[token_order].tolist()
+        bounds = np.searchsorted(token_key[token_order], np.arange(n_keys + 1))
+        return [tokens[bounds[i] : bounds[i + 1]] for i in range(n_keys)]
+
+    @staticmethod
+    def _cover(
+        keys: np.ndarray, rows: np.ndarray, cols: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Address tokens covering each key's cells
+
+        Runs of consecutive rows within a column are found first; runs that span
+        the same rows in adjacent columns are then merged, so a filled block
+        becomes a single range. Rectangles of fewer than 3 cells are split back
+        into their cells.
+
+        Args:
+            keys: Key code of every cell
+            rows: Row index of every cell
+            cols: Column index of every cell
+
+        Returns:
+            Key, top, left, bottom and right of every token; single cells have
+            top == bottom and left == right
+        """
+        order = np.lexsort((rows, cols, keys))
+        keys, rows, cols = keys[order], rows[order], cols[order]
+
+        # Vertical runs: same key and column, consecutive rows
+        run_start = np.ones(len(keys), dtype=bool)
+        run_start[1:] = (
+            (keys[1:] != keys[:-1]) | (cols[1:] != cols[:-1]) | (np.diff(rows) != 1)
+        )
+        run_ids = np.cumsum(run_start) - 1
+        run_first = np.flatnonzero(run_start)
+        run_last = np.append(run_first[1:] - 1, len(keys) - 1)
+        run_key, run_col = keys[run_first], cols[run_first]
+        run_top, run_bottom = rows[run_first], rows[run_last]
+
+        # Rectangles: runs with the same key and rows in adjacent columns
+        run_order = np.lexsort((run_col, run_bottom, run_top, run_key))
+        sorted_key, sorted_col = run_key[run_order], run_col[run_order]
+        sorted_top, sorted_bottom = run_top[run_order], run_bottom[run_order]
+        rect_start = np.ones(len(run_order), dtype=bool)
+        rect_start[1:] = (
+            (sorted_key[1:] != sorted_key[:-1])
+            | (sorted_top[1:] != sorted_top[:-1])
+            | (sorted_bottom[1:] != sorted_bottom[:-1])
+            | (np.diff(sorted_col) != 1)
+        )
+        rect_of_run = np.empty(len(run_order), dtype=np.int64)
+        rect_of_run[run_order] = np.cumsum(rect_start) - 1
+        rect_first = np.flatnonzero(rect_start)
+        rect_last = np.append(rect_first[1:] - 1, len(run_order) - 1)
+        rect_key = sorted_key[rect_first]
+        rect_top, rect_bottom = sorted_top[rect_first], sorted_bottom[rect_first]
+        rect_left, rect_right = sorted_col[rect_first], sorted_col[rect_last]
+        is_range = (rect_bottom - rect_top + 1) * (rect_right - rect_left + 1) >= 3
+
+        # One token per range, plus one per cell of the small rectangles
+        single = ~is_range[rect_of_run[run_ids]]
+        return (
+            np.concatenate([keys[single], rect_key[is_range]]),
+            np.concatenate([rows[single], rect_top[is_range]]),
+            np.concatenate([cols[single], rect_left[is_range]]),
+            np.concatenate([rows[single], rect_bottom[is_range]]),
+            np.concatenate([cols[single], rect_right[is_range]]),
+        )
 
     def _to_excel_address(self, row: int, col: int) -> str:
         """Convert row, column indices to Excel address (e.g., A1)"""
-        col_letter = ""
-        col_num = col + 1
-        while col_num > 0:
-            col_num -= 1
-            col_letter = chr(col_num % 26 + ord("A")) + col_letter
-            col_num //= 26
-        return f"{col_letter}{row + 1}"
+        return to_excel_address(row, col)
 
     def _merge_address_ranges(self, addresses: List[str]) -> List[str]:
         """Attempt to merge contiguous cell addresses into ranges"""
         if len(addresses) <= 1:
             return addresses
-            
-        # Parse addresses and sort them
-        parsed = []
-        for addr in addresses:
-            col_match = ""
-            row_match = ""
-            i = 0
-            while i < len(addr) and addr[i].isalpha():
-                col_match += addr[i]
-                i += 1
-            row_match = addr[i:]
-            
-            # Convert column letters to numbers
-            col_num = 0
-            for char in col_match:
-                col_num = col_num * 26 + (ord(char) - ord('A') + 1)
-            
-            parsed.append((col_num, int(row_match), addr))
-        
-        parsed.sort()
-        
-        # Group contiguous addresses
-        ranges = []
-        current_range = [parsed[0]]
-        
-        for i in range(1, len(parsed)):
-            prev_col, prev_row, _ = current_range[-1]
-            curr_col, curr_row, _ = parsed[i]
-            
-            # Check if addresses are contiguous
-            if (curr_col == prev_col and curr_row == prev_row + 1) or \
-               (curr_row == prev_row and curr_col == prev_col + 1):
-                current_range.append(parsed[i])
-            else:
-                # Process current range
-                if len(current_range) >= 3:  # Only create ranges for 3+ cells
-                    start_addr = current_range[0][2]
-                    end_addr = current_range[-1][2]
-                    ranges.append(f"{start_addr}:{end_addr}")
-                else:
-                    ranges.extend([cell[2] for cell in current_range])
-                current_range = [parsed[i]]
-        
-        # Process final range
-        if len(current_range) >= 3:
-            start_addr = current_range[0][2]
-            end_addr = current_range[-1][2]
-            ranges.append(f"{start_addr}:{end_addr}")
-        else:
-            ranges.extend([cell[2] for cell in current_range])
-        
-        return ranges
+
+        rows, cols = parse_excel_addresses(addresses)
+        keys = np.zeros(len(addresses), dtype=np.int64)
+        return self._group_addresses(keys, rows, cols, 1)[0]
 
 
 class DataFormatAggregator:
     """Implements data-format-aware aggregation for numerical cells"""
 
-    def aggregate(self, df: pd.DataFrame) -> Dict[str, Any]:
+    # Columns of a region array
+    REGION_FIELDS = ("type", "r0", "c0", "r1", "c1", "count")
+
+    def aggregate(
+        self, df: Sheet, context: Optional[CompressionContext] = None
+    ) -> Dict[str, np.ndarray]:
         """
         Aggregate cells by data format and type
 
         Args:
-            df: Input DataFrame
+            df: Input DataFrame or SparseSheet
+            context: Precomputed cell facts for df, built if not given
 
         Returns:
-            Dictionary containing aggregated format information
-        """
-        format_groups = defaultdict(list)
-
-        for i, row in df.iterrows():
-            for j, col in enumerate(df.columns):
-                cell_value = row[col]
-                if pd.notna(cell_value) and cell_value != "":
-                    data_type = DataTypeClassifier.classify_cell_type(cell_value)
-                    cell_addr = InvertedIndexTranslator()._to_excel_address(i, j)
-
-                    format_groups[data_type].append(
-                        {"address": cell_addr, "value": cell_value, "row": i, "col": j}
-                    )
-
-        # Aggregate contiguous regions with same format
-        aggregated = {}
-        for data_type, cells in format_groups.items():
-            if len(cells) > 1:
-                # Group cells by proximity
-                regions = self._group_contiguous_cells(cells)
-                aggregated[data_type] = regions
-            else:
-                aggregated[data_type] = cells
+            Dictionary mapping each data type to an int64 array of its regions,
+            one row of REGION_FIELDS per connected group of cells
+        """
+        return self.aggregate_context(context or CompressionContext(df))
+
+    def aggregate_context(self, context: CompressionContext) -> Dict[str, np.ndarray]:
+        """
+        Aggregate the cells of the sheet described by a context
+
+        Args:
+            context: Cell facts of the sheet
+
+        Returns:
+            Dictionary mapping each data type to an int64 array of its regions
+        """
+        regions = self.find_context_regions(context)
+        bounds = np.flatnonzero(np.diff(regions[:, 0])) + 1
+        return {
+            TYPE_NAMES[group[0, 0]]: group
+            for group in np.split(regions, bounds)
+            if len(group)
+        }
+
+    @staticmethod
+    def find_context_regions(context: CompressionContext) -> np.ndarray:
+        """
+        find_regions() for the sheet described by a context
+
+        Sparse sheets are labelled from their non-empty cells, without
+        building the dense mask and type-code matrices.
+
+        Args:
+            context: Cell facts of the sheet
+
+        Returns:
+            Array of shape (regions, 6) with REGION_FIELDS per row
+        """
+        if context.is_sparse:
+            rows, cols = context.coordinates
+            return DataFormatAggregator.find_cell_regions(
+                rows, cols, context.cell_types, context.row_numbers
+            )
+        return DataFormatAggregator.find_regions(
+            context.type_codes, context.mask, context.row_numbers
+        )
+
+    @staticmethod
+    def find_cell_regions(
+        rows: np.ndarray,
+        cols: np.ndarray,
+        cell_types: np.ndarray,
+        row_numbers: np.ndarray,
+    ) -> np.ndarray:
+        """
+        find_regions() for a sheet given as a list of non-empty cells
+
+        Args:
+            rows: Row position of every non-empty cell
+            cols: Column position of every non-empty cell
+            cell_types: Type code of every non-empty cell
+            row_numbers: Row index of every row of the sheet
+
+        Returns:
+            Array of shape (regions, 6) with REGION_FIELDS per row, identical
+            to find_regions() on the equivalent matrices
+        """
+        row_numbers = np.asarray(row_numbers, dtype=np.int64)
+        runs = DataFormatAggregator._label_cell_runs(
+            np.asarray(rows, dtype=np.int64),
+            np.asarray(cols, dtype=np.int64),
+            np.asarray(cell_types, dtype=np.int8),
+            row_numbers,
+        )
+        return DataFormatAggregator._summarise_runs(*runs[:5], row_numbers)
+
+    @staticmethod
+    def find_regions(
+        type_codes: np.ndarray,
+        mask: np.ndarray,
+        row_numbers: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Summarise 4-connected groups of non-empty cells sharing a type code
+
+        Args:
+            type_codes: (rows, cols) matrix of type codes
+            mask: (rows, cols) boolean matrix of non-empty cells
+            row_numbers: Row index of every matrix row, defaults to positions;
+                rows are only adjacent if their row indices are consecutive
+
+        Returns:
+            Array of shape (regions, 6) with REGION_FIELDS per row, ordered by
+            type, then top row, then left column
+        """
+        if row_numbers is None:
+            row_numbers = np.arange(mask.shape[0])
+        row_numbers = np.asarray(row_numbers, dtype=np.int64)
+
+        runs = DataFormatAggregator._label_runs(type_codes, mask, row_numbers)
+        return DataFormatAggregator._summarise_runs(*runs[:5], row_numbers)
+
+    @staticmethod
+    def _summarise_runs(
+        component: np.ndarray,
+        run_type: np.ndarray,
+        run_col: np.ndarray,
+        run_top: np.ndarray,
+        run_bottom: np.ndarray,
+        row_numbers: np.ndarray,
+    ) -> np.ndarray:
+        """Collapse labelled runs into one REGION_FIELDS row per component"""
+        if len(component) == 0:
+            return np.empty(
+                (0, len(DataFormatAggregator.REGION_FIELDS)), dtype=np.int64
+            )
+
+        by_component = np.argsort(component, kind="stable")
+        starts = np.flatnonzero(np.diff(component[by_component], prepend=-1))
+        run_col = run_col[by_component]
+        run_top, run_bottom = run_top[by_component], run_bottom[by_component]
+        regions = np.column_stack(
+            [
+                run_type[by_component][starts],
+                np.minimum.reduceat(row_numbers[run_top], starts),
+                np.minimum.reduceat(run_col, starts),
+                np.maximum.reduceat(row_numbers[run_bottom], starts),
+                np.maximum.reduceat(run_col, starts),
+                np.add.reduceat(run_bottom - run_top + 1, starts),
+            ]
+        ).astype(np.int64)
+        return regions[np.lexsort((regions[:, 2], regions[:, 1], regions[:, 0]))]
+
+    @staticmethod
+    def _label_runs(
+        type_codes: np.ndarray, mask: np.ndarray, row_numbers: np.ndarray
+    ) -> Tuple[np.ndarray, ...]:
+        """
+        Label 4-connected groups of non-empty cells sharing a type code
 
-        return aggregated
+        Cells are first joined into vertical runs; runs are then linked to the
+        runs of the same type beside them and labelled by min-label propagation
+        with pointer jumping. Cell-level work uses int8/bool (cols, rows)
+        matrices only, so memory stays a few bytes per cell.
+
+        Args:
+            type_codes: (rows, cols) matrix of type codes
+            mask: (rows, cols) boolean matrix of non-empty cells
+            row_numbers: Row index of every matrix row
+
+        Returns:
+            Tuple of (component, type, col, top, bottom, offset) arrays with one
+            entry per run: top/bottom are row positions and offset is the flat
+            position of the run's first cell in column-major order
+        """
+        # Column-major layout so that vertical runs are contiguous
+        codes = np.where(mask, type_codes, np.int8(-1)).astype(np.int8, copy=False)
+        codes = np.ascontiguousarray(codes.T)
+        present = codes >= 0
+        row_break = np.diff(row_numbers) != 1
+
+        # A run starts/ends where the neighbouring cell in the column differs
+        start = present.copy()
+        start[:, 1:] &= (codes[:, 1:] != codes[:, :-1]) | row_break
+        end = present.copy()
+        end[:, :-1] &= (codes[:, :-1] != codes[:, 1:]) | row_break
+        run_offset = np.flatnonzero(start)
+        run_col, run_top = np.divmod(run_offset, codes.shape[1])
+        run_bottom = np.nonzero(end)[1]
+        run_type = codes[run_col, run_top]
+
+        # Link runs to the runs of their right-hand neighbours, once per pair
+        linked = present[:-1] & (codes[:-1] == codes[1:])
+        repeat = np.zeros_like(linked)
+        repeat[:, 1:] = linked[:, :-1] & ~start[:-1, 1:] & ~start[1:, 1:]
+        edges = np.flatnonzero(linked & ~repeat)
+        del codes, present, start, end, linked, repeat
+        left = np.searchsorted(run_offset, edges, side="right") - 1
+        right = np.searchsorted(run_offset, edges + len(row_numbers), side="right") - 1
+
+        component = DataFormatAggregator._connect(len(run_top), left, right)
+        return component, run_type, run_col, run_top, run_bottom, run_offset
+
+    @staticmethod
+    def _label_cell_runs(
+        rows: np.ndarray,
+        cols: np.ndarray,
+        cell_types: np.ndarray,
+        row_numbers: np.ndarray,
+    ) -> Tuple[np.ndarray, ...]:
+        """
+        _label_runs() for a sheet given as a list of non-empty cells
+
+        Works on per-cell arrays only, so time and memory are proportional to
+        the number of non-empty cells rather than to the sheet's area.
+
+        Args:
+            rows: Row position of every non-empty cell
+            cols: Column position of every non-empty cell
+            cell_types: Type code of every non-empty cell
+            row_numbers: Row index of every row of the sheet
+
+        Returns:
+            Tuple of (component, type, col, top, bottom, offset) arrays, as
+            returned by _label_runs()
+        """
+        n_rows = len(row_numbers)
+        # Column-major order, in which vertical runs are contiguous
+        offset = cols * n_rows + rows
+        order = np.argsort(offset, kind="stable")
+        offset, rows, cell_types = offset[order], rows[order], cell_types[order]
+
+        # A cell continues the run above it if it is the next row of the same
+        # column, holds the same type and the row indices are consecutive
+        continues = np.diff(offset) == 1
+        continues &= rows[1:] != 0
+        continues &= cell_types[1:] == cell_types[:-1]
+        continues &= row_numbers[rows[1:]] - row_numbers[rows[1:] - 1] == 1
+        start = np.concatenate(([True], ~continues))[: len(offset)]
+        run_id = np.cumsum(start) - 1
+        run_starts = np.flatnonzero(start)
+        run_ends = np.append(run_starts[1:], len(offset))[: len(run_starts)] - 1
+
+        run_offset = offset[run_starts]
+        run_col, run_top = np.divmod(run_offset, max(n_rows, 1))
+        run_bottom = rows[run_ends]
+        run_type = cell_types[run_starts]
+
+        # Link every cell to the cell on its right if both share a type
+        neighbour = np.searchsorted(offset, offset + n_rows)
+        neighbour = np.minimum(neighbour, len(offset) - 1)
+        linked = (offset[neighbour] == offset + n_rows) & (
+            cell_types[neighbour] == cell_types
+        )
+        pairs = np.unique(run_id[linked] * len(run_starts) + run_id[neighbour[linked]])
+        left, right = np.divmod(pairs, max(len(run_starts), 1))
+
+        component = DataFormatAggregator._connect(len(run_starts), left, right)
+        return component, run_type, run_col, run_top, run_bottom, run_offset
+
+    @staticmethod
+    def _connect(n_runs: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """Dense component label of every run, given the linked pairs of runs"""
+        labels = np.arange(n_runs)
+        while len(left):
+            lowest = np.minimum(labels[left], labels[right])
+            updated = labels.copy()
+            np.minimum.at(updated, left, lowest)
+            np.minimum.at(updated, right, lowest)
+            updated = updated[updated]
+            if np.array_equal(updated, labels):
+                break
+            labels = updated
+
+        return np.unique(labels, return_inverse=True)[1]
 
     def _group_contiguous_cells(self, cells: List[Dict]) -> List[Dict]:
         """Group contiguous cells with same data type"""
         if len(cells) <= 1:
             return cells
-            
+
         # Sort cells by position
-        cells.sort(key=lambda x: (x['row'], x['col']))
-        
+        cells.sort(key=lambda x: (x["row"], x["col"]))
+        row_numbers, row_positions = np.unique(
+            [cell["row"] for cell in cells], return_inverse=True
+        )
+        cols = np.array([cell["col"] for cell in cells], dtype=np.int64)
+        cols -= cols.min()
+        mask = np.zeros((len(row_numbers), cols.max() + 1), dtype=bool)
+        mask[row_positions, cols] = True
+
+        component, _, _, _, _, run_offset = self._label_runs(
+            np.zeros(mask.shape, dtype=np.int8), mask, row_numbers
+        )
+        cell_offset = cols * len(row_numbers) + row_positions
+        cell_components = component[
+            np.searchsorted(run_offset, cell_offset, side="right") - 1
+        ]
+
+        members_by_component = {}
+        for cell, label in zip(cells, cell_components.tolist()):
+            members_by_component.setdefault(label, []).append(cell)
+
         groups = []
-        current_group = [cells[0]]
-        
-        for i in range(1, len(cells)):
-            prev_cell = current_group[-1]
-            curr_cell = cells[i]
-            
-            # Check if cells are adjacent (same row, next column OR same column, next row)
-            is_adjacent = (
-                (prev_cell['row'] == curr_cell['row'] and 
-                 curr_cell['col'] == prev_cell['col'] + 1) or
-                (prev_cell['col'] == curr_cell['col'] and 
-                 curr_cell['row'] == prev_cell['row'] + 1)
-            )
-            
-            if is_adjacent:
-                current_group.append(curr_cell)
+        for members in members_by_component.values():
+            r0 = min(cell["row"] for cell in members)
+            c0 = min(cell["col"] for cell in members)
+            r1 = max(cell["row"] for cell in members)
+            c1 = max(cell["col"] for cell in members)
+            count = len(members)
+            if count >= 3:
+                # Create range representation
+                groups.append(
+                    {
+                        "type": "range",
+                        "start": to_excel_address(r0, c0),
+                        "end": to_excel_address(r1, c1),
+                        "count": count,
+                        "sample_value": members[0]["value"],
+                    }
+                )
             else:
-                # Finalize current group
-                if len(current_group) >= 3:
-                    # Create range representation
-                    start_addr = current_group[0]['address']
-                    end_addr = current_group[-1]['address']
-                    groups.append({
-                        'type': 'range',
-                        'start': start_addr,
-                        'end': end_addr,
-                        'count': len(current_group),
-                        'sample_value': current_group[0]['value']
-                    })
-                else:
-                    # Keep individual cells
-                    groups.extend(current_group)
-                
-                current_group = [curr_cell]
-        
-        # Handle final group
-        if len(current_group) >= 3:
-            start_addr = current_group[0]['address']
-            end_addr = current_group[-1]['address']
-            groups.append({
-                'type': 'range',
-                'start': start_addr,
-                'end': end_addr,
-                'count': len(current_group),
-                'sample_value': current_group[0]['value']
-            })
-        else:
-            groups.extend(current_group)
-        
+                # Keep individual cells
+                groups.extend(members)
+
         return groups
@@ -6,7 +6,9 @@ import numpy as np
 from enum import Enum
 from dataclasses import dataclass
 
+from sheetwise.encoding.addresses import to_excel_address
 from sheetwise.encoding.data_types import TableRegion
+from sheetwise.tables.sparse import SparseSheet
 
 
 class TableType(Enum):
@@ -78,35 +80,41 @@ class SmartTableDetector:
         self.min_table_size = min_table_size
         self.max_empty_ratio = max_empty_ratio
         self.header_detection = header_detection
-    
-    def detect_tables(self, df: pd.DataFrame) -> List[EnhancedTableRegion]:
+
+    def detect_tables(
+        self, df: Union[pd.DataFrame, SparseSheet]
+    ) -> List[EnhancedTableRegion]:
         """
         Detect multiple tables in a spreadsheet.
-        
+
         Args:
-            df: Input DataFrame
-            
+            df: Input DataFrame or SparseSheet
+
         Returns:
             List of detected enhanced table regions
         """
+        if isinstance(df, SparseSheet):
+            return self._detect_sparse_tables(df)
+
         # First pass: Create a binary mask of non-empty cells
         mask = ~df.isna() & (df != '')
         
         # If the whole sheet is mostly empty, treat the entire non-empty part as one table
         if mask.sum().sum() < (df.shape[0] * df.shape[1] * 0.1):
-            # Just get the bounding box of all non-empty cells
-            non_empty_rows = mask.any(axis=1)
-            non_empty_cols = mask.any(axis=0)
+            # Just get the bounding box of all non-empty cells (by position,
+            # since the labels need not be integers)
+            non_empty_rows = mask.any(axis=1).to_numpy()
+            non_empty_cols = mask.any(axis=0).to_numpy()
             
             if non_empty_rows.sum() >= self.min_table_size and non_empty_cols.sum() >= self.min_table_size:
-                start_row = non_empty_rows.idxmax()
-                end_row = non_empty_rows[::-1].idxmax()
-                start_col = non_empty_cols.idxmax()
-                end_col = non_empty_cols[::-1].idxmax()
+                start_row = int(np.argmax(non_empty_rows))
+                end_row = len(non_empty_rows) - 1 - int(np.argmax(non_empty_rows[::-1]))
+                start_col = int(np.argmax(non_empty_cols))
+                end_col = len(non_empty_cols) - 1 - int(np.argmax(non_empty_cols[::-1]))
                 
                 table_region = EnhancedTableRegion(
-                    top_left=f"{chr(65 + start_col)}{start_row + 1}",
-                    bottom_right=f"{chr(65 + end_col)}{end_row + 1}",
+                    top_left=to_excel_address(start_row, start_col),
+                    bottom_right=to_excel_address(end_row, end_col),
                     rows=range(start_row, end_row + 1),
                     cols=range(start_col, end_col + 1),
                     table_type=TableType.SPARSE,
@@ -152,10 +160,12 @@ class SmartTableDetector:
                             if density > max_density and density > (1 - self.max_empty_ratio):
                                 max_density = density
                                 best_table = EnhancedTableRegion(
-                                    top_left=f"{chr(65 + j)}{i + 1}",
-                                    bottom_right=f"{chr(65 + j+width-1)}{i+height}",
-                                    rows=range(i, i+height),
-                                    cols=range(j, j+width),
+                                    top_left=to_excel_address(i, j),
+                                    bottom_right=to_excel_address(
+                                        i + height - 1, j + width - 1
+                                    ),
+                                    rows=range(i, i + height),
+                                    cols=range(j, j + width),
                                     table_type=TableType.DATA_TABLE,
                                     confidence=density
                                 )
@@ -173,6 +183,83 @@ class SmartTableDetector:
             self._classify_table_type(df, table)
         
         return tables
+
+    def _detect_sparse_tables(self, sheet: SparseSheet) -> List[EnhancedTableRegion]:
+        """
+        Detect tables in a sparse sheet, working from its non-empty cells.
+
+        Args:
+            sheet: Input SparseSheet
+
+        Returns:
+            List of detected enhanced table regions, as detect_tables() would
+            return for the equivalent DataFrame
+        """
+        if sheet.nnz >= sheet.shape[0] * sheet.shape[1] * 0.1:
+            # Dense enough that the DataFrame is at most ten times the cells
+            return self.detect_tables(sheet.to_dataframe())
+
+        # Mostly empty: the bounding box of all non-empty cells is one table
+        if (
+            len(np.unique(sheet.rows)) < self.min_table_size
+            or len(np.unique(sheet.cols)) < self.min_table_size
+        ):
+            return []
+
+        start_row, end_row = int(sheet.rows.min()), int(sheet.rows.max())
+        start_col, end_col = int(sheet.cols.min()), int(sheet.cols.max())
+        table_region = EnhancedTableRegion(
+            top_left=to_excel_address(start_row, start_col),
+            bottom_right=to_excel_address(end_row, end_col),
+            rows=range(start_row, end_row + 1),
+            cols=range(start_col, end_col + 1),
+            table_type=TableType.SPARSE,
+            confidence=0.8,
+        )
+
+        if self.header_detection:
+            self._detect_sparse_headers(sheet, table_region)
+
+        return [table_region]
+
+    def _detect_sparse_headers(
+        self, sheet: SparseSheet, table: EnhancedTableRegion
+    ) -> None:
+        """
+        Detect header rows and columns of a table covering every cell of a sparse sheet.
+
+        Applies the string-ratio heuristics of _detect_headers() to the
+        non-empty cells only.
+
+        Args:
+            sheet: Input SparseSheet
+            table: Table region to analyze
+        """
+        is_string = np.fromiter(
+            (isinstance(value, str) for value in sheet.values),
+            dtype=bool,
+            count=sheet.nnz,
+        )
+
+        def string_ratio(cells: np.ndarray) -> float:
+            count = cells.sum()
+            return is_string[cells].sum() / count if count > 0 else 0
+
+        def is_header(first: np.ndarray) -> bool:
+            first_ratio = string_ratio(first)
+            return first_ratio > 0.6 and first_ratio > string_ratio(~first) * 1.2
+
+        header_rows = []
+        if len(table.rows) > 1 and is_header(sheet.rows == table.start_row):
+            header_rows.append(table.start_row)
+
+        header_cols = []
+        if len(table.cols) > 1 and is_header(sheet.cols == table.start_col):
+            header_cols.append(table.start_col)
+
+        table.header_rows = header_rows
+        table.header_cols = header_cols
+        table.has_headers = len(header_rows) > 0 or len(header_cols) > 0
     
     def _grow_table(self, df: pd.DataFrame, mask: pd.DataFrame, 
                    visited: np.ndarray, start_row: int, start_col: int) -> Optional[EnhancedTableRegion]:
@@ -235,8 +322,8 @@ class SmartTableDetector:
             
             if density >= (1 - self.max_empty_ratio):
                 # Convert row/col indices to cell references
-                top_left = f"{chr(65 + min_col)}{min_row + 1}"
-                bottom_right = f"{chr(65 + max_col)}{max_row + 1}"
+                top_left = to_excel_address(min_row, min_col)
+                bottom_right = to_excel_address(max_row, max_col)
                 
                 return EnhancedTableRegion(
                     top_left=top_left,
@@ -356,13 +443,15 @@ class SmartTableDetector:
         else:
             table.table_type = TableType.MIXED
     
-    def extract_tables_to_dataframes(self, df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    def extract_tables_to_dataframes(
+        self, df: Union[pd.DataFrame, SparseSheet]
+    ) -> Dict[str, pd.DataFrame]:
         """
         Extract all tables from a spreadsheet into separate dataframes.
-        
+
         Args:
-            df: Input DataFrame
-            
+            df: Input DataFrame or SparseSheet
+
         Returns:
             Dictionary mapping table names to extracted DataFrames
         """
@@ -371,8 +460,14 @@ class SmartTableDetector:
         
         for i, table in enumerate(tables):
             # Extract table data
-            table_df = df.iloc[table.start_row:table.end_row+1, table.start_col:table.end_col+1].copy()
-            
+            if isinstance(df, SparseSheet):
+                table_df = df.subset(table.rows, table.cols).to_dataframe()
+            else:
+                table_df = df.iloc[
+                    table.start_row : table.end_row + 1,
+                    table.start_col : table.end_col + 1,
+                ].copy()
+
             # Handle headers if present
             if table.has_headers and table.header_rows:
                 # Use first header row as column names
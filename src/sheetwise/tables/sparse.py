@@ -0,0 +1,265 @@
+"""Sparse (coordinate list) representation of a sheet."""
+
+import os
+from typing import Any, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from sheetwise.encoding.classifiers import _non_empty
+
+
+def _object_array(values: Iterable[Any]) -> np.ndarray:
+    """1-D object array of values, keeping sequence-valued cells intact"""
+    if not isinstance(values, (np.ndarray, pd.Series, pd.Index, list, tuple)):
+        values = list(values)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+class SparseSheet:
+    """
+    A sheet stored as parallel arrays of row, column and value
+
+    Only non-empty cells are stored, in row-major order, so memory and the
+    work done by the compression stages grow with the number of values
+    rather than with the sheet's area. Row and column positions are 0-based;
+    index and columns carry the labels a DataFrame of the sheet would have.
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[int],
+        cols: Iterable[int],
+        values: Iterable[Any],
+        shape: Optional[Tuple[int, int]] = None,
+        index: Optional[Iterable[Any]] = None,
+        columns: Optional[Iterable[Any]] = None,
+    ):
+        """
+        Initialize a sparse sheet
+
+        Args:
+            rows: Row position of every cell
+            cols: Column position of every cell
+            values: Value of every cell; None, NaN and "" cells are dropped
+            shape: (rows, cols) of the sheet, defaults to the smallest shape
+                holding every cell (or to the lengths of index and columns)
+            index: Row labels, defaults to a RangeIndex
+            columns: Column labels, defaults to a RangeIndex
+        """
+        rows = np.asarray(rows, dtype=np.int64).ravel()
+        cols = np.asarray(cols, dtype=np.int64).ravel()
+        values = _object_array(values)
+        if not len(rows) == len(cols) == len(values):
+            raise ValueError("rows, cols and values must have the same length")
+
+        index = None if index is None else pd.Index(index)
+        columns = None if columns is None else pd.Index(columns)
+        if shape is None:
+            shape = (
+                len(index) if index is not None else int(rows.max(initial=-1)) + 1,
+                len(columns) if columns is not None else int(cols.max(initial=-1)) + 1,
+            )
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.index = pd.RangeIndex(self.shape[0]) if index is None else index
+        self.columns = pd.RangeIndex(self.shape[1]) if columns is None else columns
+        if len(self.index) != self.shape[0] or len(self.columns) != self.shape[1]:
+            raise ValueError("index and columns must match the shape")
+
+        if len(rows) and (
+            rows.min() < 0
+            or cols.min() < 0
+            or rows.max() >= self.shape[0]
+            or cols.max() >= self.shape[1]
+        ):
+            raise ValueError(f"Cell positions must lie within the shape {self.shape}")
+
+        present = _non_empty(values)
+        rows, cols, values = rows[present], cols[present], values[present]
+        flat = rows * self.shape[1] + cols
+        order = np.argsort(flat, kind="stable")
+        flat = flat[order]
+        if len(flat) > 1 and (flat[1:] == flat[:-1]).any():
+            raise ValueError("Each cell may only be given once")
+
+        self.rows = rows[order]
+        self.cols = cols[order]
+        self.values = values[order]
+
+    @classmethod
+    def _from_sorted(
+        cls,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        values: np.ndarray,
+        shape: Tuple[int, int],
+        index: pd.Index,
+        columns: pd.Index,
+    ) -> "SparseSheet":
+        """Build a sheet from arrays already validated and in row-major order"""
+        sheet = cls.__new__(cls)
+        sheet.rows, sheet.cols, sheet.values = rows, cols, values
+        sheet.shape = shape
+        sheet.index, sheet.columns = index, columns
+        return sheet
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "SparseSheet":
+        """
+        Convert a dense DataFrame, dropping its empty cells
+
+        Args:
+            df: Sheet with NaN or "" for empty cells
+
+        Returns:
+            Sparse sheet with the same labels
+        """
+        rows, cols, values = [], [], []
+        for j in range(df.shape[1]):
+            column = df.iloc[:, j].to_numpy(dtype=object)
+            present = np.flatnonzero(_non_empty(column))
+            rows.append(present)
+            cols.append(np.full(len(present), j, dtype=np.int64))
+            values.append(column[present])
+
+        rows = np.concatenate([np.empty(0, dtype=np.int64)] + rows)
+        cols = np.concatenate([np.empty(0, dtype=np.int64)] + cols)
+        values = np.concatenate([np.empty(0, dtype=object)] + values)
+        order = np.lexsort((cols, rows))
+        return cls._from_sorted(
+            rows[order], cols[order], values[order], df.shape, df.index, df.columns
+        )
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[pd.DataFrame]) -> "SparseSheet":
+        """
+        Convert a sheet that arrives in row blocks, one block at a time
+
+        Args:
+            blocks: Row-block DataFrames with identical columns
+
+        Returns:
+            Sparse sheet of the concatenated blocks
+        """
+        parts, indexes = [], []
+        n_rows, columns = 0, None
+        for block in blocks:
+            if columns is None:
+                columns = block.columns
+            part = cls.from_dataframe(block)
+            parts.append((part.rows + n_rows, part.cols, part.values))
+            indexes.append(block.index)
+            n_rows += block.shape[0]
+
+        if columns is None:
+            return cls([], [], [], shape=(0, 0))
+        return cls._from_sorted(
+            np.concatenate([part[0] for part in parts]),
+            np.concatenate([part[1] for part in parts]),
+            np.concatenate([part[2] for part in parts]),
+            (n_rows, len(columns)),
+            indexes[0].append(indexes[1:]) if len(indexes) > 1 else indexes[0],
+            columns,
+        )
+
+    @classmethod
+    def read_csv(
+        cls,
+        path: Union[str, "os.PathLike[str]"],
+        chunksize: int = 100_000,
+        **kwargs: Any,
+    ) -> "SparseSheet":
+        """
+        Read a CSV file without ever holding it as a dense DataFrame
+
+        Args:
+            path: CSV file to read
+            chunksize: Rows parsed at a time
+            **kwargs: Further arguments for pandas.read_csv
+
+        Returns:
+            Sparse sheet of the file
+        """
+        return cls.from_blocks(pd.read_csv(path, chunksize=chunksize, **kwargs))
+
+    @property
+    def nnz(self) -> int:
+        """Number of non-empty cells"""
+        return len(self.values)
+
+    @property
+    def density(self) -> float:
+        """Fraction of the sheet's cells that are non-empty"""
+        area = self.shape[0] * self.shape[1]
+        return self.nnz / area if area else 0.0
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Materialize the sheet as a dense object DataFrame with NaN padding
+
+        Returns:
+            Dense DataFrame with the sheet's labels
+        """
+        data = {}
+        by_col = np.argsort(self.cols, kind="stable")
+        starts = np.searchsorted(self.cols[by_col], np.arange(self.shape[1] + 1))
+        for j in range(self.shape[1]):
+            cells = by_col[starts[j] : starts[j + 1]]
+            column = np.full(self.shape[0], np.nan, dtype=object)
+            column[self.rows[cells]] = self.values[cells]
+            data[j] = column
+        df = pd.DataFrame(data, index=self.index)
+        df.columns = self.columns
+        return df
+
+    def _subset_cells(
+        self, row_positions: np.ndarray, col_positions: np.ndarray
+    ) -> Tuple["SparseSheet", np.ndarray]:
+        """Sub-sheet and the positions of its cells in this sheet's arrays"""
+        row_positions = np.asarray(row_positions, dtype=np.int64)
+        col_positions = np.asarray(col_positions, dtype=np.int64)
+        row_map = np.full(self.shape[0], -1, dtype=np.int64)
+        row_map[row_positions] = np.arange(len(row_positions))
+        col_map = np.full(self.shape[1], -1, dtype=np.int64)
+        col_map[col_positions] = np.arange(len(col_positions))
+
+        new_rows, new_cols = row_map[self.rows], col_map[self.cols]
+        taken = np.flatnonzero((new_rows >= 0) & (new_cols >= 0))
+        new_rows, new_cols = new_rows[taken], new_cols[taken]
+        # Positions need not be increasing, so restore row-major order
+        order = np.lexsort((new_cols, new_rows))
+        taken = taken[order]
+
+        sheet = SparseSheet._from_sorted(
+            new_rows[order],
+            new_cols[order],
+            self.values[taken],
+            (len(row_positions), len(col_positions)),
+            self.index[row_positions],
+            self.columns[col_positions],
+        )
+        return sheet, taken
+
+    def subset(
+        self, row_positions: Iterable[int], col_positions: Iterable[int]
+    ) -> "SparseSheet":
+        """
+        Select rows and columns by position, like df.iloc[rows, cols]
+
+        Args:
+            row_positions: Row positions to keep, each at most once
+            col_positions: Column positions to keep, each at most once
+
+        Returns:
+            Sparse sheet of the selection
+        """
+        return self._subset_cells(row_positions, col_positions)[0]
+
+    def __repr__(self) -> str:
+        return f"SparseSheet(shape={self.shape}, nnz={self.nnz})"
+
+
+# Sheets accepted by the compression stages
+Sheet = Union[pd.DataFrame, SparseSheet]
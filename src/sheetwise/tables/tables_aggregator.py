@@ -1,4 +1,17 @@
-from sheetwise.tables.smart_tables import SmartTableDetector, TableType, EnhancedTableRegion
+from sheetwise.tables.context import CompressionContext
 from sheetwise.tables.detectors import TableDetector
+from sheetwise.tables.smart_tables import (
+    EnhancedTableRegion,
+    SmartTableDetector,
+    TableType,
+)
+from sheetwise.tables.sparse import SparseSheet
 
-__all__ = ["SmartTableDetector","TableType","EnhancedTableRegion","TableDetector"]
\ No newline at end of file
+__all__ = [
+    "SmartTableDetector",
+    "TableType",
+    "EnhancedTableRegion",
+    "TableDetector",
+    "CompressionContext",
+    "SparseSheet",
+]
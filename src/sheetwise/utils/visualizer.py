@@ -1,12 +1,20 @@
 """Visualization utilities for spreadsheet compression."""
 
-from typing import Dict, List, Tuple, Any, Optional
+from typing import TYPE_CHECKING, Dict, List, Tuple, Any, Optional
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import io
 from base64 import b64encode
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+
+def _pyplot():
+    """matplotlib.pyplot, imported on first use rather than with the package"""
+    import matplotlib.pyplot as plt
+    return plt
+
 
 class CompressionVisualizer:
     """
@@ -29,7 +37,7 @@ class CompressionVisualizer:
         self.enable_interactive = enable_interactive
         
     def create_data_density_heatmap(self, df: pd.DataFrame, 
-                                    title: str = "Data Density Heatmap") -> plt.Figure:
+                                    title: str = "Data Density Heatmap") -> "Figure":
         """
         Generate a heatmap showing data density in the spreadsheet.
         
@@ -40,6 +48,7 @@ class CompressionVisualizer:
         Returns:
             Matplotlib figure object
         """
+        plt = _pyplot()
         # Create a boolean mask of non-empty cells
         non_empty_mask = ~df.isna()
         
@@ -79,7 +88,7 @@ class CompressionVisualizer:
     
     def visualize_anchors(self, df: pd.DataFrame, 
                          anchors: Tuple[List[int], List[int]], 
-                         title: str = "Structural Anchors") -> plt.Figure:
+                         title: str = "Structural Anchors") -> "Figure":
         """
         Visualize structural anchors identified in the spreadsheet.
         
@@ -91,6 +100,7 @@ class CompressionVisualizer:
         Returns:
             Matplotlib figure object
         """
+        plt = _pyplot()
         row_anchors, col_anchors = anchors
         
         # Create a matrix for visualization
@@ -152,7 +162,7 @@ class CompressionVisualizer:
     
     def compare_original_vs_compressed(self, 
                                       original_df: pd.DataFrame, 
-                                      compressed_result: Dict[str, Any]) -> plt.Figure:
+                                      compressed_result: Dict[str, Any]) -> "Figure":
         """
         Create a visual comparison between original and compressed data.
         
@@ -163,6 +173,7 @@ class CompressionVisualizer:
         Returns:
             Matplotlib figure with comparison visualization
         """
+        plt = _pyplot()
         # Extract information
         compressed_df = compressed_result.get('compressed_data', pd.DataFrame())
         compression_ratio = compressed_result.get('compression_ratio', 1.0)
@@ -220,6 +231,7 @@ class CompressionVisualizer:
         Returns:
             HTML string with embedded visualizations
         """
+        plt = _pyplot()
         # Create visualizations
         density_fig = self.create_data_density_heatmap(original_df)
         
@@ -298,8 +310,9 @@ class CompressionVisualizer:
         
         return html
     
-    def _fig_to_base64(self, fig: plt.Figure) -> str:
+    def _fig_to_base64(self, fig: "Figure") -> str:
         """Convert matplotlib figure to base64 string."""
+        plt = _pyplot()
         buf = io.BytesIO()
         fig.savefig(buf, format='png', dpi=100)
         buf.seek(0)
@@ -307,7 +320,7 @@ class CompressionVisualizer:
         plt.close(fig)  # Close to prevent memory leaks
         return img_str
         
-    def save_visualization_to_file(self, fig: plt.Figure, 
+    def save_visualization_to_file(self, fig: "Figure", 
                                  filename: str) -> str:
         """
         Save visualization to file.
@@ -320,5 +333,5 @@ class CompressionVisualizer:
             Path to saved file
         """
         fig.savefig(filename, dpi=150, bbox_inches='tight')
-        plt.close(fig)  # Close to prevent memory leaks
+        _pyplot().close(fig)  # Close to prevent memory leaks
         return filename
@@ -1,9 +1,15 @@
 """Multi-sheet workbook handling and cross-sheet reference management."""
 
-from typing import Dict, List, Tuple, Any, Optional, Set
-import pandas as pd
 import os
 import re
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Set, TextIO, Tuple
+
+import pandas as pd
+
+from sheetwise.encoding.encoders import write_lines
+from sheetwise.tables.sparse import Sheet, SparseSheet
+from sheetwise.workbook.xlsx_reader import XlsxReader
 
 
 class WorkbookManager:
@@ -23,32 +29,57 @@ class WorkbookManager:
         self.sheet_metadata = {}  # Dict mapping sheet names to metadata
         self.cross_references = {}  # Dict mapping sheets to their references
         
-    def load_workbook(self, excel_path: str) -> Dict[str, pd.DataFrame]:
+    def load_workbook(self, excel_path: str, sparse: bool = False) -> Dict[str, Sheet]:
         """
         Load all sheets from an Excel workbook.
-        
+
         Args:
             excel_path: Path to the Excel file
-            
+            sparse: Stream .xlsx sheets into SparseSheets holding only their
+                non-empty cells instead of building dense dataframes
+
         Returns:
-            Dictionary mapping sheet names to dataframes
+            Dictionary mapping sheet names to dataframes (or SparseSheets)
         """
         if not os.path.exists(excel_path):
             raise FileNotFoundError(f"Excel file not found: {excel_path}")
             
         # Load all sheets into a dict of dataframes
-        sheet_dict = pd.read_excel(excel_path, sheet_name=None)
+        if sparse and excel_path.endswith(".xlsx"):
+            with XlsxReader(excel_path) as reader:
+                sheet_dict = {
+                    name: reader.read_sheet(name) for name in reader.sheet_names
+                }
+        else:
+            sheet_dict = pd.read_excel(excel_path, sheet_name=None)
+            if sparse:
+                sheet_dict = {
+                    name: SparseSheet.from_dataframe(df)
+                    for name, df in sheet_dict.items()
+                }
         self.sheets = sheet_dict
         
         # Initialize metadata for each sheet
-        for sheet_name in sheet_dict:
+        for sheet_name, sheet in sheet_dict.items():
+            head = sheet
+            if isinstance(sheet, SparseSheet):
+                head = sheet.subset(
+                    range(min(4, sheet.shape[0])), range(sheet.shape[1])
+                ).to_dataframe()
             self.sheet_metadata[sheet_name] = {
-                "shape": sheet_dict[sheet_name].shape,
-                "non_empty_cells": (~sheet_dict[sheet_name].isna()).sum().sum(),
-                "has_header_row": self._detect_header_row(sheet_dict[sheet_name])
+                "shape": sheet.shape,
+                "non_empty_cells": self._non_empty_cells(sheet),
+                "has_header_row": self._detect_header_row(head),
             }
         
         return sheet_dict
+
+    @staticmethod
+    def _non_empty_cells(sheet: Sheet) -> int:
+        """Number of non-missing cells of a dataframe or SparseSheet."""
+        if isinstance(sheet, SparseSheet):
+            return sheet.nnz
+        return (~sheet.isna()).sum().sum()
     
     def _detect_header_row(self, df: pd.DataFrame) -> bool:
         """
@@ -89,7 +120,7 @@ class WorkbookManager:
             
         try:
             import openpyxl
-            
+
             # We need to reopen the workbook to access formulas
             excel_path = getattr(self, "_last_loaded_path", None)
             if not excel_path or not os.path.exists(excel_path):
@@ -208,46 +239,84 @@ class WorkbookManager:
         Returns:
             LLM-ready text representation of the workbook
         """
+        return "\n".join(self.iter_workbook_for_llm(compression_results))
+
+    def iter_workbook_for_llm(
+        self, compression_results: Dict[str, Any]
+    ) -> Iterator[str]:
+        """
+        Generate the lines of encode_workbook_for_llm() one at a time.
+
+        Args:
+            compression_results: Output from compress_workbook
+
+        Returns:
+            Iterator over the lines of the LLM-ready text
+        """
         if "__workbook_summary__" not in compression_results:
             raise ValueError("Invalid compression results. Use output from compress_workbook.")
-            
-        lines = []
-        
+        return self._iter_workbook_lines(compression_results)
+
+    def _iter_workbook_lines(
+        self, compression_results: Dict[str, Any]
+    ) -> Iterator[str]:
         # Add workbook summary
         summary = compression_results["__workbook_summary__"]
-        lines.append(f"# Workbook Analysis (Compressed {summary['overall_compression_ratio']:.1f}x)")
-        lines.append(f"Contains {summary['total_sheets']} sheets with {summary['total_original_cells']} total cells")
-        lines.append("")
+        yield (
+            "# Workbook Analysis "
+            f"(Compressed {summary['overall_compression_ratio']:.1f}x)"
+        )
+        yield (
+            f"Contains {summary['total_sheets']} sheets with "
+            f"{summary['total_original_cells']} total cells"
+        )
+        yield ""
         
         # Add sheet relationship information if available
         if summary.get("sheet_relationships"):
-            lines.append("## Sheet Relationships")
+            yield "## Sheet Relationships"
             relationships = summary["sheet_relationships"]
             
             for edge in relationships["edges"]:
-                lines.append(f"- '{edge['source']}' references '{edge['target']}'")
+                yield f"- '{edge['source']}' references '{edge['target']}'"
             
-            lines.append("")
+            yield ""
         
         # Add each sheet's compression data
         for sheet_name, result in compression_results.items():
             if sheet_name == "__workbook_summary__":
                 continue
                 
-            lines.append(f"## Sheet: {sheet_name} (Compressed {result['compression_ratio']:.1f}x)")
+            ratio = result["compression_ratio"]
+            yield f"## Sheet: {sheet_name} (Compressed {ratio:.1f}x)"
             
             # Add inverted index data
             if "inverted_index" in result:
-                lines.append("### Values (value|addresses):")
-                for value, addresses in list(result["inverted_index"].items())[:15]:  # Limit to first 15
+                yield "### Values (value|addresses):"
+                for value, addresses in islice(
+                    result["inverted_index"].items(), 15
+                ):  # Limit to first 15
                     addr_str = ",".join(addresses[:5])
                     if len(addresses) > 5:
                         addr_str += f" (+{len(addresses)-5} more)"
-                    lines.append(f"{value}|{addr_str}")
+                    yield f"{value}|{addr_str}"
             
-            lines.append("")
-        
-        return "\n".join(lines)
+            yield ""
+
+    def write_workbook_for_llm(
+        self, compression_results: Dict[str, Any], sink: TextIO
+    ) -> int:
+        """
+        Write the LLM-ready encoding of the workbook to a file-like sink.
+
+        Args:
+            compression_results: Output from compress_workbook
+            sink: Writable text file or stream
+
+        Returns:
+            Number of characters written
+        """
+        return write_lines(self.iter_workbook_for_llm(compression_results), sink)
     
     def get_sheet_importance_ranking(self) -> List[Tuple[str, float]]:
         """
@@ -274,7 +343,7 @@ class WorkbookManager:
         # Calculate sheet complexity score
         complexity = {}
         for sheet, df in self.sheets.items():
-            non_empty = (~df.isna()).sum().sum()
+            non_empty = self._non_empty_cells(df)
             total = df.shape[0] * df.shape[1]
             density = non_empty / total if total > 0 else 0
             
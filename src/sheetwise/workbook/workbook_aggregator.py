@@ -1,3 +1,4 @@
 from sheetwise.workbook.workbook import WorkbookManager
+from sheetwise.workbook.xlsx_reader import XlsxCell, XlsxReader, read_xlsx
 
-__all__ = ["WorkbookManager"]
\ No newline at end of file
+__all__ = ["WorkbookManager", "XlsxReader", "XlsxCell", "read_xlsx"]
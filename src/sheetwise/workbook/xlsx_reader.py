@@ -0,0 +1,428 @@
+"""Streaming, read-only reader for .xlsx files."""
+
+import os
+import posixpath
+import zipfile
+from array import array
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+
+from sheetwise.encoding.addresses import (
+    column_index,
+    parse_excel_address,
+    to_excel_address,
+)
+from sheetwise.tables.sparse import SparseSheet, _object_array
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_ROW = _MAIN_NS + "row"
+_CELL = _MAIN_NS + "c"
+_VALUE = _MAIN_NS + "v"
+_FORMULA = _MAIN_NS + "f"
+_INLINE_STRING = _MAIN_NS + "is"
+_TEXT = _MAIN_NS + "t"
+_RUN = _MAIN_NS + "r"
+_STRING_ITEM = _MAIN_NS + "si"
+_DIMENSION = _MAIN_NS + "dimension"
+_SHEET_DATA = _MAIN_NS + "sheetData"
+_DIGITS = "0123456789"
+
+SheetRef = Union[int, str]
+
+
+class XlsxCell(NamedTuple):
+    """One non-empty cell; row and col are 0-based"""
+
+    row: int
+    col: int
+    value: Any
+    formula: Optional[str] = None
+
+
+def _string_content(element: ElementTree.Element) -> str:
+    """Plain text of a shared or inline string, without phonetic runs"""
+    text = element.findtext(_TEXT)
+    if text is not None:
+        return text
+    return "".join(run.findtext(_TEXT) or "" for run in element.iter(_RUN))
+
+
+def _cast_number(text: str) -> Union[int, float]:
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+    return int(text)
+
+
+class XlsxReader:
+    """
+    Reads cells straight from the XML parts of an .xlsx archive
+
+    Sheets are parsed incrementally with iterparse and every row is
+    discarded once its cells have been yielded, so memory holds the shared
+    strings table plus one row rather than a dense grid of the sheet. Cell
+    values are converted the way openpyxl converts them (numbers, booleans,
+    errors as text, dates and durations from the cell's number format).
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"]):
+        """
+        Open an .xlsx file
+
+        Args:
+            path: Path to the workbook
+        """
+        self.path = os.fspath(path)
+        self._zip = zipfile.ZipFile(self.path)
+        self._shared_strings: Optional[List[str]] = None
+        self._date_styles: Optional[Dict[int, bool]] = None
+        try:
+            self._workbook()
+        except BaseException:
+            self._zip.close()
+            raise
+
+    def close(self) -> None:
+        """Close the underlying archive"""
+        self._zip.close()
+
+    def __enter__(self) -> "XlsxReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _part_targets(self, rels_path: str, base: str) -> Dict[str, Tuple[str, str]]:
+        """Relationship id -> (type, archive path) from a .rels part"""
+        try:
+            root = ElementTree.fromstring(self._zip.read(rels_path))
+        except KeyError:
+            return {}
+        targets = {}
+        for rel in root.iter(_PACKAGE_REL_NS + "Relationship"):
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                target = target.lstrip("/")
+            else:
+                target = posixpath.normpath(posixpath.join(base, target))
+            targets[rel.get("Id")] = (rel.get("Type", ""), target)
+        return targets
+
+    def _workbook(self) -> None:
+        """Read sheet names, part locations and the date system of the workbook"""
+        root = ElementTree.fromstring(self._zip.read("xl/workbook.xml"))
+        targets = self._part_targets("xl/_rels/workbook.xml.rels", "xl")
+        self._sheet_paths = {
+            sheet.get("name"): targets[sheet.get(_REL_NS + "id")][1]
+            for sheet in root.iter(_MAIN_NS + "sheet")
+        }
+        self._parts = {kind.rsplit("/", 1)[-1]: path for kind, path in targets.values()}
+
+        from openpyxl.utils.datetime import MAC_EPOCH, WINDOWS_EPOCH
+
+        properties = root.find(_MAIN_NS + "workbookPr")
+        date1904 = properties is not None and properties.get("date1904") in (
+            "1",
+            "true",
+        )
+        self._epoch = MAC_EPOCH if date1904 else WINDOWS_EPOCH
+
+    @property
+    def sheet_names(self) -> List[str]:
+        """Names of the worksheets, in workbook order"""
+        return list(self._sheet_paths)
+
+    def _sheet_path(self, sheet: SheetRef) -> str:
+        names = self.sheet_names
+        if isinstance(sheet, int):
+            if not -len(names) <= sheet < len(names):
+                raise IndexError(f"Workbook has {len(names)} sheets, no sheet {sheet}")
+            sheet = names[sheet]
+        if sheet not in self._sheet_paths:
+            raise KeyError(f"Worksheet {sheet!r} not found; sheets are {names}")
+        return self._sheet_paths[sheet]
+
+    def _strings(self) -> List[str]:
+        """The shared strings table, parsed on first use"""
+        if self._shared_strings is None:
+            strings = []
+            path = self._parts.get("sharedStrings", "xl/sharedStrings.xml")
+            if path in self._zip.namelist():
+                with self._zip.open(path) as source:
+                    root = None
+                    for event, element in ElementTree.iterparse(
+                        source, events=("start", "end")
+                    ):
+                        if root is None:
+                            root = element
+                        elif event == "end" and element.tag == _STRING_ITEM:
+                            strings.append(_string_content(element))
+                            # Drop parsed items so the tree stays one item deep
+                            del root[:]
+            self._shared_strings = strings
+        return self._shared_strings
+
+    def _styles(self) -> Dict[int, bool]:
+        """Style index -> whether its format is a duration, for date styles only"""
+        if self._date_styles is None:
+            from openpyxl.styles.numbers import (
+                builtin_format_code,
+                is_date_format,
+                is_timedelta_format,
+            )
+
+            self._date_styles = {}
+            path = self._parts.get("styles", "xl/styles.xml")
+            if path not in self._zip.namelist():
+                return self._date_styles
+            root = ElementTree.fromstring(self._zip.read(path))
+            custom = {
+                int(fmt.get("numFmtId")): fmt.get("formatCode")
+                for fmt in root.iter(_MAIN_NS + "numFmt")
+            }
+            cell_xfs = root.find(_MAIN_NS + "cellXfs")
+            for idx, xf in enumerate(
+                [] if cell_xfs is None else cell_xfs.iter(_MAIN_NS + "xf")
+            ):
+                fmt_id = int(xf.get("numFmtId", 0))
+                fmt = custom.get(fmt_id) or builtin_format_code(fmt_id)
+                if fmt and is_date_format(fmt):
+                    self._date_styles[idx] = is_timedelta_format(fmt)
+        return self._date_styles
+
+    def dimension(self, sheet: SheetRef = 0) -> Optional[Tuple[int, int]]:
+        """
+        Used range recorded in the sheet's <dimension> element
+
+        Only the start of the sheet part is read.
+
+        Args:
+            sheet: Sheet name or 0-based position
+
+        Returns:
+            (rows, cols) extent of the range counted from A1, or None if the
+            sheet has no dimension hint
+        """
+        with self._zip.open(self._sheet_path(sheet)) as source:
+            for _, element in ElementTree.iterparse(source, events=("start",)):
+                if element.tag == _DIMENSION:
+                    last = element.get("ref", "").split(":")[-1]
+                    try:
+                        row, col = parse_excel_address(last)
+                    except ValueError:
+                        return None
+                    return row + 1, col + 1
+                if element.tag == _SHEET_DATA:
+                    return None
+        return None
+
+    def iter_cells(
+        self, sheet: SheetRef = 0, formulas: bool = False
+    ) -> Iterator[XlsxCell]:
+        """
+        Stream the non-empty cells of a sheet in row-major order
+
+        Args:
+            sheet: Sheet name or 0-based position
+            formulas: Also report formulas (as "=..." text); formula cells
+                without a cached value are then yielded with value None
+
+        Returns:
+            Iterator of XlsxCell
+        """
+        from openpyxl.utils.datetime import from_excel, from_ISO8601
+
+        path = self._sheet_path(sheet)
+        strings = self._strings()
+        date_styles = self._styles()
+        epoch = self._epoch
+        shared_formulas: Dict[str, Any] = {}
+
+        row = -1
+        sheet_data = None
+        with self._zip.open(path) as source:
+            # Rows are handled whole on their end event, then removed from
+            # <sheetData> so that memory does not grow with the row count
+            for event, element in ElementTree.iterparse(
+                source, events=("start", "end")
+            ):
+                if event == "start":
+                    if element.tag == _SHEET_DATA:
+                        sheet_data = element
+                    continue
+                if element.tag != _ROW:
+                    continue
+                # Writers may omit references; positions are then counted
+                number = element.get("r")
+                row = int(number) - 1 if number else row + 1
+                col = -1
+
+                for cell in element.iterfind(_CELL):
+                    ref = cell.get("r")
+                    if ref:
+                        letters = ref.rstrip(_DIGITS)
+                        row, col = int(ref[len(letters) :]) - 1, column_index(letters)
+                    else:
+                        col += 1
+
+                    data_type = cell.get("t", "n")
+                    if data_type == "inlineStr":
+                        child = cell.find(_INLINE_STRING)
+                        value = None if child is None else _string_content(child)
+                    else:
+                        value = cell.findtext(_VALUE) or None
+                        if value is not None:
+                            if data_type == "n":
+                                value = _cast_number(value)
+                                style = int(cell.get("s", 0))
+                                if style in date_styles:
+                                    try:
+                                        value = from_excel(
+                                            value, epoch, timedelta=date_styles[style]
+                                        )
+                                    except (OverflowError, ValueError):
+                                        value = "#VALUE!"
+                            elif data_type == "s":
+                                value = strings[int(value)]
+                            elif data_type == "b":
+                                value = bool(int(value))
+                            elif data_type == "d":
+                                value = from_ISO8601(value)
+
+                    formula = None
+                    if formulas:
+                        formula = self._formula(
+                            cell, ref or to_excel_address(row, col), shared_formulas
+                        )
+                    if formula is not None or (value is not None and value != ""):
+                        yield XlsxCell(row, col, value, formula)
+                if sheet_data is not None:
+                    del sheet_data[:]
+                else:
+                    element.clear()
+
+    @staticmethod
+    def _formula(
+        cell: ElementTree.Element, ref: str, shared: Dict[str, Any]
+    ) -> Optional[str]:
+        """Formula text of a cell, expanding shared formulas to this cell"""
+        element = cell.find(_FORMULA)
+        if element is None:
+            return None
+        text = "=" + (element.text or "")
+        if element.get("t") == "shared":
+            from openpyxl.formula.translate import Translator
+
+            index = element.get("si")
+            if element.text:
+                shared[index] = Translator(text, origin=ref)
+            elif index in shared:
+                text = shared[index].translate_formula(ref)
+        return text if text != "=" else None
+
+    def read_sheet(
+        self, sheet: SheetRef = 0, header: bool = True, trim: bool = False
+    ) -> SparseSheet:
+        """
+        Read a sheet into a SparseSheet without building a dense grid
+
+        The sheet is sized to its <dimension> used range, grown if cells lie
+        outside it. Sheets without the hint end at their last non-empty cell.
+
+        Args:
+            sheet: Sheet name or 0-based position
+            header: Use the first row as column labels, like pandas.read_excel
+            trim: Ignore the used range and size the sheet to its last
+                non-empty row and column, like pandas.read_excel
+
+        Returns:
+            Sparse sheet of the cell values
+        """
+        rows, cols, values = array("q"), array("q"), []
+        for cell in self.iter_cells(sheet):
+            rows.append(cell.row)
+            cols.append(cell.col)
+            values.append(cell.value)
+
+        rows = (
+            np.frombuffer(rows, dtype=np.int64) if rows else np.empty(0, dtype=np.int64)
+        )
+        cols = (
+            np.frombuffer(cols, dtype=np.int64) if cols else np.empty(0, dtype=np.int64)
+        )
+        values = _object_array(values)
+        n_rows = int(rows.max(initial=-1)) + 1
+        n_cols = int(cols.max(initial=-1)) + 1
+        if not trim:
+            hint = self.dimension(sheet)
+            if hint is not None:
+                n_rows, n_cols = max(n_rows, hint[0]), max(n_cols, hint[1])
+
+        columns = None
+        if header:
+            in_header = rows == 0
+            columns = self._header_labels(cols[in_header], values[in_header], n_cols)
+            rows, cols, values = (
+                rows[~in_header] - 1,
+                cols[~in_header],
+                values[~in_header],
+            )
+            n_rows = max(n_rows - 1, 0)
+
+        # iterparse yields cells in file order, which is row-major
+        order = np.lexsort((cols, rows))
+        return SparseSheet._from_sorted(
+            rows[order],
+            cols[order],
+            values[order],
+            (n_rows, n_cols),
+            pd.RangeIndex(n_rows),
+            pd.RangeIndex(n_cols) if columns is None else columns,
+        )
+
+    @staticmethod
+    def _header_labels(cols: np.ndarray, values: np.ndarray, n_cols: int) -> pd.Index:
+        """Column labels from the header cells, named and de-duplicated like pandas"""
+        labels: List[Any] = [f"Unnamed: {j}" for j in range(n_cols)]
+        for col, value in zip(cols, values):
+            labels[col] = value
+
+        seen: Dict[Any, int] = {}
+        for j, label in enumerate(labels):
+            count = seen.get(label, 0)
+            if count:
+                new_label = f"{label}.{count}"
+                while new_label in seen:
+                    count += 1
+                    new_label = f"{label}.{count}"
+                seen[label] = count + 1
+                label = labels[j] = new_label
+            seen[label] = seen.get(label, 0) + 1
+        return pd.Index(labels, dtype=object)
+
+
+def read_xlsx(
+    path: Union[str, "os.PathLike[str]"],
+    sheet: SheetRef = 0,
+    header: bool = True,
+    trim: bool = False,
+) -> SparseSheet:
+    """
+    Read one sheet of an .xlsx file into a SparseSheet
+
+    Args:
+        path: Path to the workbook
+        sheet: Sheet name or 0-based position
+        header: Use the first row as column labels
+        trim: Ignore the <dimension> used range, like pandas.read_excel
+
+    Returns:
+        Sparse sheet of the cell values
+    """
+    with XlsxReader(path) as reader:
+        return reader.read_sheet(sheet, header=header, trim=trim)
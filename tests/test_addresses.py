@@ -0,0 +1,66 @@
+"""Test the Excel address helpers."""
+
+import numpy as np
+import pytest
+
+from sheetwise.encoding.addresses import (
+    COLUMN_LETTERS,
+    column_index,
+    column_letter,
+    parse_excel_address,
+    parse_excel_addresses,
+    to_excel_address,
+    to_excel_addresses,
+    to_excel_ranges,
+)
+
+
+class TestAddresses:
+    """Test cases for address formatting and parsing."""
+
+    def test_column_letters(self):
+        """Test the column letter table, including the Excel limit."""
+        assert COLUMN_LETTERS[:3] == ("A", "B", "C")
+        assert column_letter(25) == "Z"
+        assert column_letter(26) == "AA"
+        assert column_letter(701) == "ZZ"
+        assert column_letter(16383) == "XFD"
+        assert column_letter(16384) == "XFE"
+        assert column_index("xfd") == 16383
+
+    def test_to_excel_address(self):
+        """Test formatting of single and many addresses."""
+        assert to_excel_address(0, 0) == "A1"
+        assert to_excel_address(9, 27) == "AB10"
+
+        addresses = to_excel_addresses([0, 2, 99], [0, 26, 16384])
+        assert addresses.tolist() == ["A1", "AA3", "XFE100"]
+        assert to_excel_ranges([1], [1], [39], [5]).tolist() == ["B2:F40"]
+
+    def test_parse_roundtrip(self):
+        """Test that parsing inverts formatting."""
+        rows = np.array([0, 5, 1048575])
+        cols = np.array([0, 51, 16383])
+        parsed_rows, parsed_cols = parse_excel_addresses(to_excel_addresses(rows, cols))
+
+        assert parsed_rows.tolist() == rows.tolist()
+        assert parsed_cols.tolist() == cols.tolist()
+        assert parse_excel_address("$b$3") == (2, 1)
+
+    def test_parse_invalid(self):
+        """Test that malformed addresses are rejected."""
+        with pytest.raises(ValueError):
+            parse_excel_address("A0")
+        with pytest.raises(ValueError):
+            parse_excel_addresses(["A1", "1A"])
+        with pytest.raises(ValueError, match="'B0'"):
+            parse_excel_addresses(["A1", "B0"])
+
+    def test_parse_many_edge_cases(self):
+        """Test empty input, lower case, padding and columns beyond XFD."""
+        rows, cols = parse_excel_addresses([])
+        assert rows.dtype == cols.dtype == np.int64 and rows.size == 0
+
+        rows, cols = parse_excel_addresses([" c7 ", "$AA$1", "XFE2"])
+        assert rows.tolist() == [6, 0, 1]
+        assert cols.tolist() == [2, 26, 16384]
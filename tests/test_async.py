@@ -0,0 +1,114 @@
+"""Test the asyncio interface to SpreadsheetLLM."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sheetwise.core.async_llm import AsyncSpreadsheetLLM
+from sheetwise.core.cache import CompressionCache
+from sheetwise.core.core import SpreadsheetLLM
+from sheetwise.tables.sparse import SparseSheet
+
+
+class TestAsyncSpreadsheetLLM:
+    """Test cases for the AsyncSpreadsheetLLM class."""
+
+    def test_matches_blocking_api(self, sparse_dataframe, tmp_path):
+        """Test that every coroutine returns what the blocking method returns."""
+        path = tmp_path / "sheet.csv"
+        sparse_dataframe.to_csv(path, index=False)
+        llm = SpreadsheetLLM()
+        allm = AsyncSpreadsheetLLM(cache=CompressionCache(tmp_path / "cache"))
+
+        async def scenario():
+            df = await allm.load_from_file(str(path))
+            sheet = await allm.load_from_file(str(path), sparse=True)
+            texts = [await allm.compress_and_encode_for_llm(df) for _ in range(2)]
+            answer = await allm.process_qa_query(df, "What is the revenue?")
+            compressed = await allm.compress_spreadsheet(df)
+            return df, sheet, texts, answer, compressed
+
+        df, sheet, texts, answer, compressed = asyncio.run(scenario())
+        assert df.equals(llm.load_from_file(str(path)))
+        assert isinstance(sheet, SparseSheet)
+        assert texts == [llm.compress_and_encode_for_llm(df)] * 2
+        assert allm.llm.cache.stats()["hits"] == 1
+        expected = llm.process_qa_query(df, "What is the revenue?")
+        assert answer["detected_tables"] == expected["detected_tables"]
+        assert answer["processing_stages"] == expected["processing_stages"]
+        assert (
+            compressed["inverted_index"]
+            == expected["compression_info"]["inverted_index"]
+        )
+
+    def test_concurrency_limit(self, sample_dataframe):
+        """Test that no more than max_concurrency requests run at once."""
+        executor = ThreadPoolExecutor(max_workers=4)
+        allm = AsyncSpreadsheetLLM(executor=executor, max_concurrency=2)
+        original = allm.llm.compress_spreadsheet
+        lock = threading.Lock()
+        active, peak = [0], [0]
+
+        def slow_compress(df):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return original(df)
+
+        allm.llm.compress_spreadsheet = slow_compress
+
+        async def scenario():
+            return await asyncio.gather(
+                *(allm.compress_and_encode_for_llm(sample_dataframe) for _ in range(5))
+            )
+
+        # Each asyncio.run starts a new loop; the limit must hold in both
+        texts = asyncio.run(scenario()) + asyncio.run(scenario())
+        executor.shutdown()
+        assert len(set(texts)) == 1
+        assert peak[0] == 2
+
+        with pytest.raises(ValueError):
+            AsyncSpreadsheetLLM(max_concurrency=0)
+
+    def test_cancellation_between_stages(self, sample_dataframe):
+        """Test that a cancelled request skips its later stages and frees its slot."""
+        allm = AsyncSpreadsheetLLM(max_concurrency=1)
+        started, release = threading.Event(), threading.Event()
+        original = allm.llm.compress_spreadsheet
+        encoded = []
+
+        def blocking_compress(df):
+            started.set()
+            release.wait(5)
+            return original(df)
+
+        def counting_encode(compressed):
+            encoded.append(compressed)
+            return "text"
+
+        async def scenario():
+            allm.llm.compress_spreadsheet = blocking_compress
+            allm.llm.encode_compressed_for_llm = counting_encode
+            task = asyncio.create_task(
+                allm.compress_and_encode_for_llm(sample_dataframe)
+            )
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            release.set()
+
+            allm.llm.compress_spreadsheet = original
+            return await asyncio.wait_for(
+                allm.compress_and_encode_for_llm(sample_dataframe), 5
+            )
+
+        assert asyncio.run(scenario()) == "text"
+        assert len(encoded) == 1
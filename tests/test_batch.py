@@ -0,0 +1,81 @@
+"""Test batch compression on a process pool."""
+
+import pandas as pd
+
+from sheetwise.core.batch import BatchCompressor
+from sheetwise.core.core import SpreadsheetLLM
+from sheetwise.tables.sparse import SparseSheet
+
+
+class TestBatchCompressor:
+    """Test cases for the BatchCompressor class."""
+
+    def test_matches_serial(self, sample_dataframe, sparse_dataframe, tmp_path):
+        """Test that frames, sparse sheets and paths give the serial run's text."""
+        path = tmp_path / "sheet.csv"
+        sample_dataframe.to_csv(path, index=False)
+        sheet = SparseSheet.from_dataframe(sparse_dataframe)
+        llm = SpreadsheetLLM()
+
+        with BatchCompressor(max_workers=2) as batch:
+            results = batch.compress_all(
+                [sample_dataframe, sparse_dataframe, path, sheet]
+            )
+
+        assert [result.index for result in results] == [0, 1, 2, 3]
+        assert all(result.ok for result in results)
+        assert results[0].source is None
+        assert results[2].source == str(path)
+        assert results[3].source is None
+        assert results[0].text == llm.compress_and_encode_for_llm(sample_dataframe)
+        assert results[1].text == llm.compress_and_encode_for_llm(sparse_dataframe)
+        assert results[2].text == llm.compress_and_encode_for_llm(pd.read_csv(path))
+        # A SparseSheet compresses to the same text as its DataFrame
+        assert results[3].text == results[1].text
+
+    def test_errors_are_captured(self, sample_dataframe, tmp_path):
+        """Test that a failing item does not stop the rest of the batch."""
+        with BatchCompressor(max_workers=1) as batch:
+            results = batch.compress_all(
+                [
+                    tmp_path / "missing.csv",
+                    tmp_path / "sheet.txt",
+                    sample_dataframe,
+                    None,
+                    42,
+                ]
+            )
+
+        assert not results[0].ok
+        assert results[0].error.startswith("FileNotFoundError")
+        assert "Traceback" in results[0].traceback
+        assert not results[1].ok
+        assert "Unsupported file format" in results[1].error
+        assert results[2].ok
+        # Items that are neither sheets nor paths fail without aborting the batch
+        assert [result.index for result in results] == list(range(5))
+        for result in results[3:]:
+            assert not result.ok
+            assert result.source is None
+            assert result.error.startswith("TypeError")
+
+    def test_bounded_in_flight_and_pool_reuse(self, sample_dataframe):
+        """Test lazy consumption of the input and reuse of the worker pool."""
+        consumed = []
+
+        def items():
+            for i in range(6):
+                consumed.append(i)
+                yield sample_dataframe
+
+        with BatchCompressor(max_workers=1, max_in_flight=2) as batch:
+            results = batch.run(items())
+            next(results)
+            assert len(consumed) <= 3
+            pool = batch._pool
+            assert len(list(results)) == 5
+
+            assert len(batch.compress_all([sample_dataframe])) == 1
+            assert batch._pool is pool
+
+        assert batch._pool is None
@@ -0,0 +1,109 @@
+"""Test the on-disk compression cache."""
+
+import os
+import time
+
+import pandas as pd
+
+from sheetwise.core.cache import CompressionCache
+from sheetwise.core.compressor import SheetCompressor
+from sheetwise.core.core import SpreadsheetLLM
+from sheetwise.tables.sparse import SparseSheet
+
+
+class TestCompressionCache:
+    """Test cases for the CompressionCache class."""
+
+    def test_sheet_key(self, sample_dataframe):
+        """Test that keys follow contents, cell types and parameters."""
+        key = CompressionCache.sheet_key(sample_dataframe, {"k": 4})
+
+        assert key == CompressionCache.sheet_key(sample_dataframe.copy(), {"k": 4})
+        assert key != CompressionCache.sheet_key(sample_dataframe, {"k": 2})
+        assert key != CompressionCache.sheet_key(
+            sample_dataframe, {"k": 4}, kind="llm_text"
+        )
+
+        changed = sample_dataframe.copy()
+        changed.iloc[1, 1] = 101
+        assert key != CompressionCache.sheet_key(changed, {"k": 4})
+
+        retyped = sample_dataframe.copy()
+        retyped.iloc[1, 1] = "100"
+        assert key != CompressionCache.sheet_key(retyped, {"k": 4})
+
+        # The same types in other cells are a different sheet too
+        swapped = pd.DataFrame({"A": [1, "1"]}, dtype=object)
+        assert CompressionCache.sheet_key(swapped, {}) != CompressionCache.sheet_key(
+            swapped.iloc[::-1].reset_index(drop=True), {}
+        )
+        sheet = SparseSheet.from_dataframe(swapped)
+        assert CompressionCache.sheet_key(sheet, {}) != CompressionCache.sheet_key(
+            SparseSheet.from_dataframe(swapped.iloc[::-1].reset_index(drop=True)), {}
+        )
+
+    def test_get_set_and_counters(self, tmp_path):
+        """Test round trips and hit/miss counting."""
+        cache = CompressionCache(tmp_path)
+
+        assert cache.get("missing") is None
+        cache.set("entry", {"value": [1, 2, 3]})
+        assert cache.get("entry") == {"value": [1, 2, 3]}
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+        assert not [name for name in os.listdir(tmp_path) if name.startswith(".tmp-")]
+
+    def test_eviction_keeps_recently_used(self, tmp_path):
+        """Test that least recently used entries are evicted over the size budget."""
+        cache = CompressionCache(tmp_path, max_bytes=2500)
+        payload = b"x" * 1000
+
+        cache.set("old", payload)
+        cache.set("used", payload)
+        past = time.time() - 100
+        os.utime(tmp_path / "old.pkl", (past, past))
+        os.utime(tmp_path / "used.pkl", (past, past))
+        cache.get("used")
+        cache.set("new", payload)
+
+        assert cache.get("old") is None
+        assert cache.get("used") == payload
+        assert cache.stats()["evictions"] == 1
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        """Test that unreadable entries are dropped instead of raising."""
+        cache = CompressionCache(tmp_path)
+        (tmp_path / "broken.pkl").write_bytes(b"not a pickle")
+        # Unknown protocol (ValueError) and a bad constructor call (TypeError)
+        (tmp_path / "protocol.pkl").write_bytes(b"\x80\x09K\x01.")
+        (tmp_path / "foreign.pkl").write_bytes(b"c__builtin__\nint\n(I1\nI2\nI3\ntR.")
+
+        for key in ("broken", "protocol", "foreign"):
+            assert cache.get(key) is None
+            assert not (tmp_path / f"{key}.pkl").exists()
+        assert cache.stats()["misses"] == 3
+
+    def test_compressor_uses_cache(self, tmp_path, sparse_dataframe):
+        """Test that repeated compression of unchanged sheets hits the cache."""
+        cache = CompressionCache(tmp_path)
+        compressor = SheetCompressor(k=2, cache=cache)
+
+        first = compressor.compress(sparse_dataframe)
+        second = compressor.compress(sparse_dataframe.copy())
+
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert second["inverted_index"] == first["inverted_index"]
+        pd.testing.assert_frame_equal(
+            second["compressed_data"], first["compressed_data"]
+        )
+
+    def test_llm_text_cache(self, tmp_path, sparse_dataframe):
+        """Test that the LLM text is served from the cache on a hit."""
+        cache = CompressionCache(tmp_path)
+        sllm = SpreadsheetLLM(cache=cache)
+
+        text = sllm.compress_and_encode_for_llm(sparse_dataframe)
+        assert sllm.compress_and_encode_for_llm(sparse_dataframe) == text
+        assert (cache.hits, cache.misses) == (1, 1)
@@ -128,3 +128,148 @@ class TestDataTypeClassifier:
         for value in other_values:
             result = classifier.classify_cell_type(value)
             assert result == "Others"
+
+    def test_classify_frame_matches_scalar(self, sample_dataframe, financial_dataframe):
+        """Test that batch classification agrees with per-cell classification."""
+        from sheetwise.encoding.classifiers import TYPE_NAMES
+
+        for df in (sample_dataframe, financial_dataframe):
+            type_codes = DataTypeClassifier.classify_frame(df)
+
+            assert type_codes.shape == df.shape
+            assert type_codes.dtype.name == "int8"
+            for i in range(df.shape[0]):
+                for j in range(df.shape[1]):
+                    expected = DataTypeClassifier.classify_cell_type(df.iat[i, j])
+                    assert TYPE_NAMES[type_codes[i, j]] == expected
+
+    def test_classify_values_edge_cases(self):
+        """Test batch classification of values that stress the int/float rules."""
+        from sheetwise.encoding.classifiers import TYPE_NAMES
+
+        values = [
+            None,
+            " ",
+            "1_000",
+            "1.",
+            ".5",
+            "nan",
+            "-inf",
+            "1,,2",
+            "2E10",
+            "3:45pm",
+            "1e5%",
+            "5%%",
+            "1800",
+            2023,
+            2023.0,
+            True,
+            "$",
+            "a@b.co",
+        ]
+        type_codes = DataTypeClassifier.classify_values(values)
+
+        for value, code in zip(values, type_codes):
+            assert TYPE_NAMES[code] == DataTypeClassifier.classify_cell_type(value)
+
+    def test_classify_native_dates(self):
+        """Test that native date values classify as dates."""
+        import datetime
+
+        import pandas as pd
+
+        classifier = DataTypeClassifier()
+
+        date_values = [pd.Timestamp("2023-01-15"), datetime.date(2023, 1, 15)]
+        for value in date_values:
+            assert classifier.classify_cell_type(value) == "Date"
+
+    def test_classify_frame_dtype_fast_paths(self):
+        """Test that typed columns classify like their individual cells."""
+        import numpy as np
+        import pandas as pd
+
+        from sheetwise.encoding.classifiers import TYPE_NAMES
+
+        df = pd.DataFrame(
+            {
+                "ints": [1999, 2023, 42, -7, 2101],
+                "floats": [1.5, np.nan, 1e-05, 2e16, 2023.0],
+                "bools": [True, False, True, True, False],
+                "dates": pd.to_datetime(
+                    ["2023-01-01", None, "2023-03-01", "2023-04-01", "2023-05-01"]
+                ),
+                "nullable": pd.array([2023, None, 5, 6, 7], dtype="Int64"),
+            }
+        )
+        type_codes = DataTypeClassifier.classify_frame(df)
+
+        for i in range(df.shape[0]):
+            for j in range(df.shape[1]):
+                expected = DataTypeClassifier.classify_cell_type(df.iat[i, j])
+                assert TYPE_NAMES[type_codes[i, j]] == expected
+
+
+class TestClassificationCache:
+    """Test cases for the classification memoization cache."""
+
+    def test_hits_misses_and_evictions(self):
+        """Test that repeated values hit and the size limit evicts."""
+        from sheetwise.encoding.classifiers import ClassificationCache
+
+        cache = ClassificationCache(maxsize=2)
+        classify = DataTypeClassifier._classify_cell_type
+
+        assert cache.classify("In Stock", classify) == "Others"
+        assert cache.classify("In Stock", classify) == "Others"
+        assert cache.classify("0", classify) == "Integer"
+        assert cache.classify("N/A", classify) == "Others"
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 3
+        assert stats["evictions"] == 1
+        assert stats["size"] == 2
+
+    def test_keyed_by_value_type(self):
+        """Test that equal values of different types are cached separately."""
+        from sheetwise.encoding.classifiers import ClassificationCache
+
+        cache = ClassificationCache()
+        classify = DataTypeClassifier._classify_cell_type
+
+        assert cache.classify(1, classify) == "Integer"
+        assert cache.classify(1.0, classify) == "Float"
+        assert cache.classify(True, classify) == "Others"
+        assert cache.stats()["hits"] == 0
+
+    def test_nan_and_unhashable_values(self):
+        """Test that NaN and unhashable values bypass the cache."""
+        from sheetwise.encoding.classifiers import ClassificationCache
+
+        cache = ClassificationCache()
+        classify = DataTypeClassifier._classify_cell_type
+
+        assert cache.classify(float("nan"), classify) == "Empty"
+        assert cache.classify(float("nan"), classify) == "Empty"
+        assert cache.classify({"a": 1}, classify) == "Others"
+
+        stats = cache.stats()
+        assert stats["size"] == 0
+        assert stats["hits"] == 0
+
+    def test_configure_cache(self):
+        """Test resizing and disabling the shared cache."""
+        original = DataTypeClassifier.cache
+        try:
+            DataTypeClassifier.configure_cache(8)
+            DataTypeClassifier.classify_cell_type("2023")
+            DataTypeClassifier.classify_cell_type("2023")
+            assert DataTypeClassifier.cache_stats()["hits"] == 1
+            assert DataTypeClassifier.cache_stats()["maxsize"] == 8
+
+            DataTypeClassifier.configure_cache(None)
+            assert DataTypeClassifier.classify_cell_type("2023") == "Year"
+            assert DataTypeClassifier.cache_stats() == {}
+        finally:
+            DataTypeClassifier.cache = original
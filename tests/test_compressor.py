@@ -1,9 +1,11 @@
 """Test the SheetCompressor class."""
 
+import numpy as np
 import pandas as pd
 import pytest
 
 from sheetwise.core.compressor import SheetCompressor
+from sheetwise.tables.context import CompressionContext
 
 
 class TestSheetCompressor:
@@ -108,3 +110,254 @@ class TestSheetCompressor:
         expected_ratio = original_cells / compressed_cells
 
         assert abs(result["compression_ratio"] - expected_ratio) < 0.01
+
+    def test_compress_chunked_matches_compress(self, sparse_dataframe):
+        """Test that block-wise compression matches whole-sheet compression."""
+        compressor = SheetCompressor(k=2)
+        expected = compressor.compress(sparse_dataframe)
+
+        blocks = [sparse_dataframe.iloc[i : i + 3] for i in range(0, 20, 3)]
+        result = compressor.compress_chunked(blocks)
+
+        assert result["original_shape"] == sparse_dataframe.shape
+        assert result["compression_ratio"] == expected["compression_ratio"]
+        assert result["inverted_index"] == expected["inverted_index"]
+        pd.testing.assert_frame_equal(
+            result["compressed_data"], expected["compressed_data"]
+        )
+
+    def test_compress_chunked_csv(self, tmp_path, sparse_dataframe):
+        """Test block-wise compression read directly from a CSV file."""
+        path = tmp_path / "sheet.csv"
+        sparse_dataframe.to_csv(path, index=False)
+
+        compressor = SheetCompressor(k=2)
+        expected = compressor.compress(pd.read_csv(path))
+        result = compressor.compress_chunked(path, chunksize=4)
+
+        assert result["original_shape"] == expected["original_shape"]
+        assert result["inverted_index"] == expected["inverted_index"]
+
+    def test_compress_chunked_dtype_drift(self, tmp_path):
+        """Test that blocks are classified with the concatenated sheet's dtypes."""
+        empty = {"C": [""] * 4, "D": [""] * 4, "E": [""] * 4}
+        first = pd.DataFrame({"A": list("abcd"), "B": [1, 2, 3, 4], **empty, "F": "x"})
+        second = pd.DataFrame(
+            {"A": list("efgh"), "B": [5, np.nan, 7, 8], **empty, "F": "y"},
+            index=range(4, 8),
+        )
+        blocks = [first, second]
+
+        compressor = SheetCompressor(k=1)
+        expected = compressor.compress(pd.concat(blocks))
+        result = compressor.compress_chunked(blocks)
+        assert result["inverted_index"] == expected["inverted_index"]
+        pd.testing.assert_frame_equal(
+            result["compressed_data"], expected["compressed_data"]
+        )
+
+        # CSV columns read as integers until 'n/a' appears in the last block
+        counts = list(range(100, 112))
+        path = tmp_path / "drift.csv"
+        pd.DataFrame(
+            {
+                "A": "",
+                "B": counts,
+                "C": counts[:8] + ["n/a"] + counts[9:],
+                "D": "",
+                "E": counts[:11] + ["n/a"],
+            }
+        ).to_csv(path, index=False)
+        expected = compressor.compress(pd.read_csv(path))
+        result = compressor.compress_chunked(path, chunksize=8)
+        assert result["inverted_index"] == expected["inverted_index"]
+        pd.testing.assert_frame_equal(
+            result["compressed_data"], expected["compressed_data"]
+        )
+
+    def test_compress_classifies_each_cell_once(self, monkeypatch, sparse_dataframe):
+        """Test that all stages share one classification of the sheet."""
+        from sheetwise.encoding.classifiers import DataTypeClassifier
+
+        classified = []
+        classify_frame = DataTypeClassifier.classify_frame
+
+        def counting_classify_frame(df, mask=None):
+            classified.append(df.size)
+            return classify_frame(df, mask)
+
+        monkeypatch.setattr(
+            DataTypeClassifier, "classify_frame", counting_classify_frame
+        )
+        SheetCompressor(k=2).compress(sparse_dataframe)
+
+        assert classified == [sparse_dataframe.size]
+
+    def test_compress_with_context(self, sparse_dataframe):
+        """Test that a caller-supplied context gives the same result."""
+        from sheetwise.tables.context import CompressionContext
+
+        compressor = SheetCompressor(k=2)
+        context = CompressionContext(sparse_dataframe)
+        result = compressor.compress(sparse_dataframe, context)
+        expected = compressor.compress(sparse_dataframe)
+
+        assert context.non_empty_count == 7
+        assert result["inverted_index"] == expected["inverted_index"]
+        pd.testing.assert_frame_equal(
+            result["compressed_data"], expected["compressed_data"]
+        )
+
+    def test_compressed_data_is_lazy(self, monkeypatch, sparse_dataframe):
+        """Test that the skeleton is only materialized when it is read."""
+        import pickle
+
+        from sheetwise.tables.context import CompressionContext
+
+        built = []
+        materialize = CompressionContext.df.fget
+
+        def counting_df(context):
+            if context._df is None:
+                built.append(context.shape)
+            return materialize(context)
+
+        monkeypatch.setattr(CompressionContext, "df", property(counting_df))
+        result = SheetCompressor(k=2).compress(sparse_dataframe)
+        assert built == []
+        assert "compressed_data" in result
+
+        skeleton = result["compressed_data"]
+        assert built == [skeleton.shape]
+        assert result.get("compressed_data") is skeleton
+
+        restored = pickle.loads(pickle.dumps(result))
+        pd.testing.assert_frame_equal(restored["compressed_data"], skeleton)
+        assert dict(result)["compressed_data"] is skeleton
+
+    def test_compress_does_not_modify_input(self, sparse_dataframe):
+        """Test that compressing without copying leaves the input untouched."""
+        original = sparse_dataframe.copy()
+        result = SheetCompressor(k=2).compress(sparse_dataframe)
+        result["compressed_data"]
+
+        pd.testing.assert_frame_equal(sparse_dataframe, original)
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_compress_concurrent_stages(self, executor, sparse_dataframe):
+        """Test that concurrent stages give the same result as serial ones."""
+        expected = SheetCompressor(k=2).compress(sparse_dataframe)
+
+        with SheetCompressor(k=2, executor=executor, max_workers=2) as compressor:
+            result = compressor.compress(sparse_dataframe)
+
+        assert result["inverted_index"] == expected["inverted_index"]
+        assert (
+            result["format_aggregation"].keys() == expected["format_aggregation"].keys()
+        )
+        for data_type, regions in expected["format_aggregation"].items():
+            assert result["format_aggregation"][data_type].tolist() == regions.tolist()
+
+        def without_metrics(steps):
+            metric_keys = {"wall_time", "cpu_time", "peak_bytes"}
+            return [
+                {k: v for k, v in step.items() if k not in metric_keys}
+                for step in steps
+            ]
+
+        assert without_metrics(result["compression_steps"]) == without_metrics(
+            expected["compression_steps"]
+        )
+        assert compressor._pool is None
+
+    def test_stage_metrics_and_hooks(self, sparse_dataframe):
+        """Test that every step records its resources and reaches the hooks."""
+        seen = []
+        compressor = SheetCompressor(k=2, trace_memory=True, hooks=[seen.append])
+        result = compressor.compress(sparse_dataframe)
+
+        steps = result["compression_steps"]
+        assert [step["step"] for step in steps] == [
+            "structural_extraction",
+            "inverted_translation",
+            "format_aggregation",
+        ]
+        for step in steps:
+            assert step["wall_time"] >= 0
+            assert step["cpu_time"] >= 0
+            assert step["peak_bytes"] > 0
+        assert [metrics.stage for metrics in seen] == [step["step"] for step in steps]
+        assert seen[0].as_dict() == {
+            key: steps[0][key] for key in ("wall_time", "cpu_time", "peak_bytes")
+        }
+
+        untraced = SheetCompressor(k=2).compress(sparse_dataframe)
+        assert all(step["peak_bytes"] is None for step in untraced["compression_steps"])
+
+    def test_invalid_executor(self):
+        """Test that unknown executor names are rejected."""
+        with pytest.raises(ValueError):
+            SheetCompressor(executor="gpu")
+
+    def test_compress_to_budget(self, sparse_dataframe):
+        """Test that the least lossy setting within the budget is chosen."""
+        compressor = SheetCompressor(k=4)
+        full = SheetCompressor(use_extraction=False).compress(sparse_dataframe)
+
+        roomy = compressor.compress_to_budget(sparse_dataframe, max_tokens=1000)
+        assert roomy["budget"]["use_extraction"] is False
+        assert roomy["budget"]["fits"] is True
+        assert SheetCompressor.count_tokens(roomy) == SheetCompressor.count_tokens(full)
+
+        result = compressor.compress_to_budget(sparse_dataframe, min_ratio=5)
+        budget = result["budget"]
+        assert budget["fits"] and result["compression_ratio"] >= 5
+        assert all(not trial["fits"] for trial in budget["trials"][:-1])
+        expected = SheetCompressor(k=budget["k"]).compress(sparse_dataframe)
+        assert result["inverted_index"] == expected["inverted_index"]
+        assert budget["tokens"] == SheetCompressor.count_tokens(expected)
+
+    def test_compress_to_budget_unreachable(self, sparse_dataframe):
+        """Test that the most compact setting is returned when nothing fits."""
+        result = SheetCompressor(k=2).compress_to_budget(sparse_dataframe, max_tokens=1)
+
+        assert result["budget"]["fits"] is False
+        assert result["budget"]["k"] == 0
+        assert result["budget"]["use_aggregation"] is False
+        with pytest.raises(ValueError):
+            SheetCompressor().compress_to_budget(sparse_dataframe)
+
+    def test_compress_to_budget_counts_addresses(self):
+        """Test that a value repeated in scattered cells costs one token per cell."""
+        checkerboard = pd.DataFrame(
+            [["x" if (i + j) % 2 else "" for j in range(8)] for i in range(8)]
+        )
+        compressor = SheetCompressor(k=1, use_aggregation=False)
+
+        result = compressor.compress_to_budget(checkerboard, max_tokens=20)
+        assert result["budget"]["fits"] is False
+        for trial in result["budget"]["trials"]:
+            expected = SheetCompressor(
+                k=trial["k"] or 0,
+                use_extraction=trial["k"] is not None,
+                use_aggregation=False,
+            ).compress(checkerboard)
+            assert trial["tokens"] == SheetCompressor.count_tokens(expected)
+        assert result["budget"]["trials"][0]["tokens"] == 1 + 32
+
+    def test_compress_to_budget_reuses_skeletons(self, sparse_dataframe, monkeypatch):
+        """Test that each distinct skeleton is sliced once across all trials."""
+        subsets = []
+        original = CompressionContext.subset
+
+        def counting_subset(context, rows, cols):
+            subsets.append((tuple(rows), tuple(cols)))
+            return original(context, rows, cols)
+
+        monkeypatch.setattr(CompressionContext, "subset", counting_subset)
+        result = SheetCompressor(k=2).compress_to_budget(sparse_dataframe, max_tokens=1)
+
+        assert len(result["budget"]["trials"]) == 8
+        # One subset per distinct skeleton, plus one for the final compression
+        assert len(set(subsets[:-1])) == len(subsets) - 1
+        assert subsets[-1] in subsets[:-1]
@@ -0,0 +1,71 @@
+"""Test the CompressionContext shared by the compression stages."""
+
+import numpy as np
+import pandas as pd
+
+from sheetwise.tables.context import CompressionContext
+
+
+class TestCompressionContext:
+    """Test cases for the CompressionContext class."""
+
+    def test_cell_facts(self, sample_dataframe):
+        """Test the mask, coordinates and factorized values."""
+        context = CompressionContext(sample_dataframe)
+
+        assert context.shape == (5, 4)
+        assert context.non_empty_count == 12
+        rows, cols = context.coordinates
+        assert (rows[:3].tolist(), cols[:3].tolist()) == ([0, 0, 0], [0, 1, 2])
+        assert context.values[context.value_codes[:4]].tolist() == [
+            "Header1",
+            "Header2",
+            "Header3",
+            "Data1",
+        ]
+
+    def test_sheet_statistics(self):
+        """Test non-empty counting and sparsity over mixed missing markers."""
+        df = pd.DataFrame(
+            {
+                "A": [1.0, np.nan, 3.0, np.nan],
+                "B": ["x", "", None, " "],
+                "C": [pd.NA, 0, "", pd.Timestamp("2024-01-01")],
+            }
+        )
+        context = CompressionContext(df)
+
+        assert context.non_empty_count == 6
+        assert context.sparsity == 0.5
+        assert CompressionContext(pd.DataFrame()).sparsity == 0
+
+    def test_subset_reuses_computed_facts(self, sample_dataframe):
+        """Test that a subset slices facts instead of recomputing them."""
+        context = CompressionContext(sample_dataframe)
+        context.type_codes, context.values
+        sub = context.subset(np.array([2, 4]), np.array([1, 2]))
+        fresh = CompressionContext(sample_dataframe.iloc[[2, 4], [1, 2]])
+
+        assert sub._type_codes is not None and sub._values is not None
+        np.testing.assert_array_equal(sub.type_codes, fresh.type_codes)
+        np.testing.assert_array_equal(sub.mask, fresh.mask)
+        assert (
+            sub.values[sub.value_codes].tolist()
+            == fresh.values[fresh.value_codes].tolist()
+        )
+        assert sub.row_numbers.tolist() == [2, 4]
+
+        # Unordered positions and subsets of subsets keep codes aligned with cells
+        rows, cols = np.array([4, 0, 2, 3]), np.array([3, 0, 2])
+        sub = context.subset(rows, cols).subset(np.array([2, 0, 1]), np.array([1, 2]))
+        fresh = CompressionContext(sample_dataframe.iloc[rows[[2, 0, 1]], cols[[1, 2]]])
+        assert (
+            sub.values[sub.value_codes].tolist()
+            == fresh.values[fresh.value_codes].tolist()
+        )
+
+    def test_row_numbers_fall_back_to_positions(self):
+        """Test that non-integer row labels are addressed by position."""
+        df = pd.DataFrame({"A": [1, 2]}, index=["x", "y"])
+
+        assert CompressionContext(df).row_numbers.tolist() == [0, 1]
@@ -1,9 +1,15 @@
 """Test the main SpreadsheetLLM class."""
 
+import io
+import json
+from itertools import product
+
 import pandas as pd
 import pytest
-import json
+
 from sheetwise.core.core import SpreadsheetLLM
+from sheetwise.encoding.encoders import write_lines
+from sheetwise.workbook.workbook import WorkbookManager
 
 
 class TestSpreadsheetLLM:
@@ -118,6 +124,50 @@ class TestSpreadsheetLLM:
         assert stats["compression_ratio"] >= 1.0
         assert 0 <= stats["sparsity_percentage"] <= 100
 
+    def test_encoding_stats_match_materialized_text(
+        self, sample_dataframe, sparse_dataframe, financial_dataframe
+    ):
+        """Test that the token estimates equal those of the encoded text."""
+        sllm = SpreadsheetLLM()
+        edge_cases = pd.DataFrame(
+            {
+                "a | b": ["x|y", None, 'say "hi"'],
+                "n": [1.5, float("nan"), 2],
+                "flag": [True, False, True],
+            }
+        )
+
+        for df in (sample_dataframe, sparse_dataframe, financial_dataframe, edge_cases):
+            stats = sllm.get_encoding_stats(df)
+            vanilla = sllm.vanilla_encoder.estimate_tokens(sllm.encode_vanilla(df))
+            json_tokens = sllm.json_encoder.estimate_tokens(sllm.encode_json(df))
+            assert stats["vanilla_tokens_estimate"] == vanilla
+            assert stats["json_tokens_estimate"] == json_tokens
+
+    def test_encoding_stats_keep_skeleton_lazy(self, sparse_dataframe, monkeypatch):
+        """Test that the stats report the skeleton shape without building it."""
+        for use_extraction, use_translation in product((True, False), repeat=2):
+            sllm = SpreadsheetLLM(
+                {
+                    "use_extraction": use_extraction,
+                    "use_translation": use_translation,
+                    "use_aggregation": use_translation,
+                }
+            )
+            results = []
+            compress = sllm.compressor.compress
+
+            def recording_compress(*args):
+                results.append(compress(*args))
+                return results[-1]
+
+            monkeypatch.setattr(sllm.compressor, "compress", recording_compress)
+            stats = sllm.get_encoding_stats(sparse_dataframe)
+
+            assert "compressed_data" in results[0]._factories
+            assert stats["compressed_tokens_estimate"] > 0
+            assert stats["compressed_shape"] == results[0]["compressed_data"].shape
+
     def test_load_from_file_unsupported_format(self):
         """Test loading from unsupported file format."""
         sllm = SpreadsheetLLM()
@@ -134,3 +184,26 @@ class TestSpreadsheetLLM:
         assert isinstance(encoded, str)
         assert "Spreadsheet Data" in encoded
         assert len(encoded) > 0
+
+    def test_streaming_encoders(self, sample_dataframe, sparse_dataframe):
+        """Test that the streaming variants produce the same text as the string ones."""
+        sllm = SpreadsheetLLM()
+        compressed = sllm.compress_spreadsheet(sparse_dataframe)
+
+        sink = io.StringIO()
+        written = sllm.write_compressed_for_llm(compressed, sink)
+        assert sink.getvalue() == sllm.encode_compressed_for_llm(compressed)
+        assert written == len(sink.getvalue())
+
+        sink = io.StringIO()
+        write_lines(sllm.vanilla_encoder.iter_encode(sample_dataframe), sink)
+        assert sink.getvalue() == sllm.encode_vanilla(sample_dataframe)
+
+        manager = WorkbookManager()
+        manager.sheets = {"First": sample_dataframe, "Second": sparse_dataframe}
+        results = manager.compress_workbook(sllm.compressor)
+        sink = io.StringIO()
+        manager.write_workbook_for_llm(results, sink)
+        assert sink.getvalue() == manager.encode_workbook_for_llm(results)
+        with pytest.raises(ValueError):
+            manager.iter_workbook_for_llm({})
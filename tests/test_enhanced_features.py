@@ -1,8 +1,10 @@
 """Test the enhanced features of SheetWise."""
 
-import pytest
 import pandas as pd
+import pytest
+
 from sheetwise.core.core import SpreadsheetLLM
+from sheetwise.tables.context import CompressionContext
 from sheetwise.utils.utils import create_realistic_spreadsheet
 
 
@@ -37,6 +39,55 @@ class TestEnhancedFeatures:
         assert isinstance(result, str)
         assert len(result) > 0
         assert "Spreadsheet Data" in result
+
+    def test_auto_config_scans_cells_once(self, monkeypatch, sparse_dataframe):
+        """Test that configuring and compressing share one non-empty scan."""
+        import sheetwise.tables.context as context_module
+
+        calls = []
+        original = context_module.non_empty_mask
+
+        def counting_mask(df):
+            calls.append(df.shape)
+            return original(df)
+
+        monkeypatch.setattr(context_module, "non_empty_mask", counting_mask)
+        SpreadsheetLLM().compress_with_auto_config(sparse_dataframe)
+
+        assert calls == [sparse_dataframe.shape]
+
+    def test_auto_config_samples_large_sheets(self, monkeypatch):
+        """Test sampled sparsity and the full-scan fallback near a threshold."""
+        import numpy as np
+
+        import sheetwise.core.core as core_module
+
+        monkeypatch.setattr(core_module, "_SAMPLE_MIN_CELLS", 10_000)
+        monkeypatch.setattr(core_module, "_SAMPLE_CELLS", 2_000)
+        sllm = SpreadsheetLLM()
+        rng = np.random.default_rng(0)
+
+        # Far from every threshold: the sample decides, the sheet is not scanned
+        df = pd.DataFrame(np.where(rng.random((5000, 10)) < 0.2, "x", ""))
+        estimate, margin = sllm._sample_sparsity(df)
+        assert abs(estimate - 0.8) <= margin < 0.05
+        scans = []
+
+        def counting_context(sheet):
+            scans.append(sheet.shape)
+            return CompressionContext(sheet)
+
+        monkeypatch.setattr(core_module, "CompressionContext", counting_context)
+        assert sllm.auto_configure(df)["k"] == 3
+        assert scans == []
+
+        # Exactly at the 0.9 threshold: the bound straddles it, so scan everything
+        df = pd.DataFrame(
+            np.where(np.arange(50_000).reshape(5000, 10) % 10 == 0, "x", "")
+        )
+        assert sllm.auto_configure(df)["k"] == 3
+        assert scans == [df.shape]
+
     def test_logging_enabled(self):
         """Test logging functionality."""
         sllm = SpreadsheetLLM(enable_logging=True)
@@ -0,0 +1,150 @@
+"""Test the SheetCompressor extraction, translation and aggregation modules."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sheetwise.tables.extractors import (
+    DataFormatAggregator,
+    InvertedIndexTranslator,
+    StructuralAnchorExtractor,
+)
+
+
+class TestStructuralAnchorExtractor:
+    """Test cases for the StructuralAnchorExtractor class."""
+
+    def test_find_structural_anchors(self, sparse_dataframe):
+        """Test anchors on heterogeneous rows/columns and the sheet boundary."""
+        extractor = StructuralAnchorExtractor(k=2)
+        anchor_rows, anchor_cols = extractor.find_structural_anchors(sparse_dataframe)
+
+        # Rows 2 and 3 mix Empty, Others and Integer cells
+        assert anchor_rows == [0, 2, 3, 19]
+        assert anchor_cols == [0, 9]
+
+    def test_find_structural_anchors_single_cell(self):
+        """Test that a one-cell sheet is its own boundary anchor."""
+        extractor = StructuralAnchorExtractor()
+        assert extractor.find_structural_anchors(pd.DataFrame({"A": [1]})) == ([0], [0])
+
+    def test_extract_skeleton(self, sparse_dataframe):
+        """Test that content and anchor neighborhoods are kept."""
+        extractor = StructuralAnchorExtractor(k=2)
+        skeleton = extractor.extract_skeleton(sparse_dataframe)
+
+        # Rows 1 and 4 are kept as neighbors of the anchors on rows 2 and 3
+        assert list(skeleton.index) == [0, 1, 2, 3, 4, 5]
+        assert list(skeleton.columns) == ["Col_0", "Col_1", "Col_2", "Col_5", "Col_6"]
+
+    def test_extract_skeleton_empty_sheet(self):
+        """Test that an empty sheet keeps a minimal structure."""
+        df = pd.DataFrame("", index=range(10), columns=range(10))
+        rows, cols = StructuralAnchorExtractor(k=2).select_skeleton(df)
+
+        assert rows.tolist() == [0, 5]
+        assert cols.tolist() == [0, 5]
+
+    def test_dilate(self):
+        """Test the 1-D neighborhood dilation."""
+        flags = pd.Series([0, 0, 1, 0, 0, 0, 0, 1]).astype(bool).to_numpy()
+        dilated = StructuralAnchorExtractor._dilate(flags, 1)
+
+        assert dilated.astype(int).tolist() == [0, 1, 1, 1, 0, 0, 1, 1]
+
+
+class TestInvertedIndexTranslator:
+    """Test cases for the InvertedIndexTranslator class."""
+
+    def test_translate(self, sample_dataframe):
+        """Test that non-empty cells are indexed by value in reading order."""
+        index = InvertedIndexTranslator().translate(sample_dataframe)
+
+        assert list(index)[:4] == ["Header1", "Header2", "Header3", "Data1"]
+        assert index["100"] == ["B2"]
+        assert index["Data3"] == ["A5"]
+        assert "" not in index
+
+    def test_translate_merges_runs(self):
+        """Test that contiguous cells with the same value become ranges."""
+        df = pd.DataFrame([["x", "x", "x"], ["x", " ", "y"], ["x", "y", "y"]])
+        index = InvertedIndexTranslator().translate(df)
+
+        assert index == {"x": ["A1:A3", "B1", "C1"], "y": ["B3", "C2", "C3"]}
+
+    def test_translate_merges_rectangles(self):
+        """Test that a filled block of one value becomes a single range."""
+        df = pd.DataFrame([["h", "h", "h", "h"]] + [["a", "v", "v", "v"]] * 4)
+        df.iloc[2, 3] = "w"
+        index = InvertedIndexTranslator().translate(df)
+
+        assert index["h"] == ["A1:D1"]
+        assert index["v"] == ["B2:C5", "D2", "D4", "D5"]
+        assert index["w"] == ["D3"]
+
+    def test_merge_address_ranges(self):
+        """Test merging of address strings into ranges."""
+        translator = InvertedIndexTranslator()
+        addresses = ["A1", "B1", "A2", "B2", "D7", "AA3", "AA4"]
+
+        assert translator._merge_address_ranges(addresses) == [
+            "A1:B2",
+            "D7",
+            "AA3",
+            "AA4",
+        ]
+
+    def test_translate_uses_row_labels(self, sparse_dataframe):
+        """Test that addresses of a row subset keep the original row numbers."""
+        subset = sparse_dataframe.iloc[[2, 3, 5]]
+        index = InvertedIndexTranslator().translate(subset)
+
+        assert index["Revenue"] == ["B3"]
+        assert index["Product A"] == ["F6"]
+
+
+class TestDataFormatAggregator:
+    """Test cases for the DataFormatAggregator class."""
+
+    def test_aggregate_regions(self, sample_dataframe):
+        """Test that cells are grouped into connected regions per type."""
+        aggregated = DataFormatAggregator().aggregate(sample_dataframe)
+
+        assert set(aggregated) == {"Others", "Integer", "Date"}
+        # Headers and the first column form one L-shaped region
+        assert aggregated["Others"][:, 1:].tolist() == [
+            [0, 0, 2, 2, 5],
+            [4, 0, 4, 0, 1],
+        ]
+        assert aggregated["Integer"][:, 1:].tolist() == [
+            [1, 1, 2, 1, 2],
+            [4, 1, 4, 1, 1],
+        ]
+        assert sum(int(regions[:, -1].sum()) for regions in aggregated.values()) == 12
+
+    def test_find_regions(self):
+        """Test labelling of regions that touch only through later rows."""
+        types = np.array([[1, 0, 1], [1, 0, 1], [1, 1, 1], [0, 0, 0]])
+        mask = np.ones_like(types, dtype=bool)
+        regions = DataFormatAggregator.find_regions(types, mask)
+
+        assert regions.tolist() == [
+            [0, 0, 1, 1, 1, 2],
+            [0, 3, 0, 3, 2, 3],
+            [1, 0, 0, 2, 2, 7],
+        ]
+
+    def test_find_regions_row_gaps(self):
+        """Test that rows with non-consecutive row numbers are not joined."""
+        types = np.zeros((3, 2), dtype=np.int8)
+        mask = np.ones_like(types, dtype=bool)
+        regions = DataFormatAggregator.find_regions(types, mask, np.array([0, 1, 5]))
+
+        assert regions[:, 1:].tolist() == [[0, 0, 1, 1, 4], [5, 0, 5, 1, 2]]
+
+    def test_find_regions_empty(self):
+        """Test that no cells give no regions."""
+        mask = np.zeros((2, 2), dtype=bool)
+        regions = DataFormatAggregator.find_regions(mask.astype(np.int8), mask)
+
+        assert regions.shape == (0, len(DataFormatAggregator.REGION_FIELDS))
@@ -0,0 +1,52 @@
+"""Test that importing sheetwise stays cheap."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+import sheetwise
+
+# Generous enough for slow CI machines; importing pandas alone exceeds it
+IMPORT_BUDGET_SECONDS = 0.25
+
+
+def _run(code: str) -> dict:
+    """Run code in a fresh interpreter and return the JSON it prints"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+class TestLazyImports:
+    """Test cases for the lazily resolved package namespace."""
+
+    def test_import_budget(self):
+        """Test that import sheetwise loads no heavy dependency, within budget."""
+        report = _run(
+            "import json, sys, time\n"
+            "start = time.perf_counter()\n"
+            "import sheetwise\n"
+            "elapsed = time.perf_counter() - start\n"
+            "heavy = [m for m in ('pandas', 'matplotlib', 'rich', 'openpyxl')\n"
+            "         if m in sys.modules]\n"
+            "sheetwise.CompressionVisualizer\n"
+            "print(json.dumps({'elapsed': elapsed, 'heavy': heavy,\n"
+            "                  'plotting': 'matplotlib' in sys.modules}))\n"
+        )
+        assert report["heavy"] == []
+        assert report["elapsed"] < IMPORT_BUDGET_SECONDS
+        # Even the visualizer defers matplotlib until a figure is drawn
+        assert report["plotting"] is False
+
+    def test_public_names_resolve(self):
+        """Test that every name in __all__ resolves and unknown names still fail."""
+        for name in sheetwise.__all__:
+            assert getattr(sheetwise, name).__name__ == name
+        assert set(sheetwise.__all__) <= set(dir(sheetwise))
+        assert isinstance(sheetwise.__version__, str)
+
+        with pytest.raises(AttributeError, match="NotAName"):
+            sheetwise.NotAName
@@ -0,0 +1,89 @@
+"""Test the stage-dependency scheduler."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sheetwise.core.scheduler import StageScheduler
+
+
+class TestStageScheduler:
+    """Test cases for the StageScheduler class."""
+
+    def test_run_in_dependency_order(self):
+        """Test that stages receive their inputs and publish their results."""
+        scheduler = StageScheduler()
+        scheduler.add("total", lambda a, b: a + b, ("double", "square"))
+        scheduler.add("double", lambda x: 2 * x, ("x",))
+        scheduler.add("square", lambda x: x * x, ("x",))
+
+        assert scheduler.order(("x",)) == ["double", "square", "total"]
+        assert scheduler.run({"x": 3}) == {"double": 6, "square": 9, "total": 15}
+
+    def test_stage_metrics(self):
+        """Test that every stage run records its timings."""
+        scheduler = StageScheduler(trace_memory=True)
+        scheduler.add("rows", lambda n: [[0] * 100 for _ in range(n)], ("n",))
+        scheduler.add("count", len, ("rows",))
+        scheduler.run({"n": 1000})
+
+        assert set(scheduler.metrics) == {"rows", "count"}
+        rows = scheduler.metrics["rows"]
+        assert rows.stage == "rows"
+        assert rows.wall_time >= 0 and rows.cpu_time >= 0
+        assert rows.peak_bytes > 100 * 1000 * 8
+
+        untraced = StageScheduler().add("count", len, ("x",))
+        untraced.run({"x": []})
+        assert untraced.metrics["count"].peak_bytes is None
+
+        # Concurrent threads would reset each other's process-wide peak
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            threaded = StageScheduler(executor, trace_memory=True)
+            threaded.add("rows", lambda n: [[0] * 100 for _ in range(n)], ("n",))
+            threaded.run({"n": 1000})
+        assert threaded.trace_memory is False
+        assert threaded.metrics["rows"].peak_bytes is None
+        assert threaded.metrics["rows"].wall_time >= 0
+
+    def test_invalid_dependencies(self):
+        """Test that unknown inputs and cycles are rejected."""
+        scheduler = StageScheduler().add("a", lambda y: y, ("missing",))
+        with pytest.raises(ValueError, match="Unknown"):
+            scheduler.run()
+
+        scheduler = (
+            StageScheduler().add("a", lambda b: b, ("b",)).add("b", lambda a: a, ("a",))
+        )
+        with pytest.raises(ValueError, match="Cyclic"):
+            scheduler.run()
+
+        with pytest.raises(ValueError, match="already registered"):
+            scheduler.add("a", lambda: None)
+
+    def test_independent_stages_overlap(self):
+        """Test that ready stages run at the same time on an executor."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def meet(x):
+            barrier.wait()
+            return x
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            scheduler = StageScheduler(executor)
+            scheduler.add("left", meet, ("x",)).add("right", meet, ("x",))
+            scheduler.add("both", lambda a, b: (a, b), ("left", "right"))
+
+            assert scheduler.run({"x": 1})["both"] == (1, 1)
+
+    def test_stage_errors_propagate(self):
+        """Test that an exception in a concurrent stage reaches the caller."""
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            scheduler = StageScheduler(executor).add("fail", fail)
+            with pytest.raises(RuntimeError, match="boom"):
+                scheduler.run()
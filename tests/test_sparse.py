@@ -0,0 +1,169 @@
+"""Test the sparse sheet representation and the stages that accept it."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sheetwise.core.cache import CompressionCache
+from sheetwise.core.compressor import SheetCompressor
+from sheetwise.core.core import SpreadsheetLLM
+from sheetwise.tables.context import CompressionContext
+from sheetwise.tables.extractors import DataFormatAggregator
+from sheetwise.tables.smart_tables import SmartTableDetector
+from sheetwise.tables.sparse import SparseSheet
+
+
+class TestSparseSheet:
+    """Test cases for the SparseSheet class."""
+
+    def test_construction(self):
+        """Test that cells are filtered, sorted and validated."""
+        sheet = SparseSheet(
+            [2, 0, 1, 1], [0, 1, 1, 0], ["c", "a", "", "b"], shape=(4, 3)
+        )
+
+        assert sheet.shape == (4, 3)
+        assert sheet.nnz == 3
+        assert sheet.rows.tolist() == [0, 1, 2]
+        assert sheet.cols.tolist() == [1, 0, 0]
+        assert sheet.values.tolist() == ["a", "b", "c"]
+        assert sheet.density == 3 / 12
+
+        with pytest.raises(ValueError):
+            SparseSheet([0, 0], [1, 1], ["a", "b"])
+        with pytest.raises(ValueError):
+            SparseSheet([5], [0], ["a"], shape=(2, 2))
+
+    def test_dataframe_round_trip(self, sample_dataframe):
+        """Test conversion from and to a dense DataFrame."""
+        sheet = SparseSheet.from_dataframe(sample_dataframe)
+
+        assert sheet.shape == sample_dataframe.shape
+        assert sheet.nnz == 12
+        assert list(sheet.columns) == list(sample_dataframe.columns)
+
+        dense = sheet.to_dataframe()
+        expected = sample_dataframe.mask(sample_dataframe == "")
+        assert dense.isna().equals(expected.isna())
+        assert dense.stack().tolist() == expected.stack().tolist()
+
+    def test_read_csv_and_subset(self, sparse_dataframe, tmp_path):
+        """Test block-wise CSV reading and positional selection."""
+        path = tmp_path / "sheet.csv"
+        sparse_dataframe.to_csv(path, index=False)
+
+        sheet = SparseSheet.read_csv(path, chunksize=3)
+        expected = SparseSheet.from_dataframe(pd.read_csv(path))
+        assert sheet.shape == expected.shape
+        assert sheet.rows.tolist() == expected.rows.tolist()
+        assert sheet.values.tolist() == expected.values.tolist()
+        assert list(sheet.index) == list(range(20))
+
+        subset = sheet.subset([3, 2], [2, 1])
+        assert subset.shape == (2, 2)
+        assert list(zip(subset.rows, subset.cols, subset.values)) == [
+            (0, 0, 800),
+            (0, 1, "Expenses"),
+            (1, 0, 1000),
+            (1, 1, "Revenue"),
+        ]
+
+
+class TestSparseStages:
+    """Test that every stage gives the same answer for sparse and dense sheets."""
+
+    @pytest.mark.parametrize("k", [0, 2, 4])
+    def test_compress_matches_dense(self, k, sparse_dataframe, financial_dataframe):
+        """Test that compressing a SparseSheet matches compressing the DataFrame."""
+        for df in (sparse_dataframe, financial_dataframe):
+            dense = SheetCompressor(k=k).compress(df)
+            sparse = SheetCompressor(k=k).compress(SparseSheet.from_dataframe(df))
+
+            assert sparse["inverted_index"] == dense["inverted_index"]
+            assert sparse["compression_ratio"] == dense["compression_ratio"]
+            assert (
+                sparse["format_aggregation"].keys()
+                == dense["format_aggregation"].keys()
+            )
+            for data_type, regions in dense["format_aggregation"].items():
+                assert (
+                    sparse["format_aggregation"][data_type].tolist() == regions.tolist()
+                )
+
+    def test_datetime_columns_match_dense(self, tmp_path):
+        """Test that datetime64 columns keep their Timestamps when made sparse."""
+        df = pd.DataFrame(
+            {
+                "Date": pd.to_datetime(["2020-01-01", None, "2020-03-01"]),
+                "Amount": [10, 20, 30],
+            }
+        )
+        sheet = SparseSheet.from_dataframe(df)
+        dates = pd.to_datetime(["2020-01-01", "2020-03-01"])
+        assert sheet.values.tolist() == [dates[0], 10, 20, dates[1], 30]
+
+        llm = SpreadsheetLLM()
+        assert llm.compress_and_encode_for_llm(
+            sheet
+        ) == llm.compress_and_encode_for_llm(df)
+
+        path = tmp_path / "dates.csv"
+        df.to_csv(path, index=False)
+        blocks = SparseSheet.read_csv(path, chunksize=2, parse_dates=["Date"])
+        assert blocks.values.tolist() == sheet.values.tolist()
+
+    def test_context_is_cell_based(self, sparse_dataframe):
+        """Test that a sparse context answers from its cells, not dense matrices."""
+        context = CompressionContext(SparseSheet.from_dataframe(sparse_dataframe))
+        dense = CompressionContext(sparse_dataframe)
+
+        assert context.is_sparse
+        assert context.non_empty_count == dense.non_empty_count
+        assert context.cell_types.tolist() == dense.cell_types.tolist()
+        assert context.line_counts(1).tolist() == dense.line_counts(1).tolist()
+        assert DataFormatAggregator.find_context_regions(context).tolist() == (
+            DataFormatAggregator.find_context_regions(dense).tolist()
+        )
+        assert context._mask is None and context._type_codes is None
+
+        # The dense views remain available on request
+        assert (context.type_codes == dense.type_codes).all()
+
+    def test_find_cell_regions_row_gaps(self):
+        """Test that non-consecutive row indices split regions."""
+        regions = DataFormatAggregator.find_cell_regions(
+            np.array([0, 1, 2]),
+            np.array([0, 0, 0]),
+            np.array([2, 2, 2]),
+            np.array([5, 6, 8]),
+        )
+        assert regions.tolist() == [[2, 5, 0, 6, 0, 2], [2, 8, 0, 8, 0, 1]]
+
+    def test_table_detection(self, sparse_dataframe, sample_dataframe):
+        """Test table detection on sparse sheets."""
+        detector = SmartTableDetector()
+        for df in (sparse_dataframe, sample_dataframe):
+            assert detector.detect_tables(SparseSheet.from_dataframe(df)) == (
+                detector.detect_tables(df.mask(df == ""))
+            )
+
+    def test_llm_entry_points(self, sparse_dataframe, tmp_path):
+        """Test loading, caching and encoding sparse sheets."""
+        path = tmp_path / "sheet.csv"
+        sparse_dataframe.to_csv(path, index=False)
+        llm = SpreadsheetLLM(cache=CompressionCache(tmp_path / "cache"))
+
+        sheet = llm.load_from_file(str(path), sparse=True)
+        assert isinstance(sheet, SparseSheet)
+        dense = llm.load_from_file(str(path))
+        assert llm.compress_and_encode_for_llm(
+            sheet
+        ) == llm.compress_and_encode_for_llm(dense)
+        assert llm.compress_and_encode_for_llm(
+            sheet
+        ) == llm.compress_and_encode_for_llm(sheet)
+        assert llm.cache.stats()["hits"] == 2
+
+        stats = llm.get_encoding_stats(sheet)
+        assert stats["non_empty_cells"] == sheet.nnz
+        assert stats["original_shape"] == (20, 10)
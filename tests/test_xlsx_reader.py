@@ -0,0 +1,213 @@
+"""Test the streaming xlsx reader."""
+
+import datetime
+import tracemalloc
+import zipfile
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from sheetwise.core.core import SpreadsheetLLM
+from sheetwise.tables.sparse import SparseSheet
+from sheetwise.workbook.workbook import WorkbookManager
+from sheetwise.workbook.xlsx_reader import XlsxCell, XlsxReader, read_xlsx
+
+_MAIN = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+_RELS = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+_PACKAGE = 'xmlns="http://schemas.openxmlformats.org/package/2006/relationships"'
+_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/"
+
+
+@pytest.fixture
+def openpyxl_workbook(tmp_path):
+    """Two-sheet workbook written by openpyxl"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Data"
+    for j, label in enumerate(["Name", "Name", 2024, None, "Date"]):
+        ws.cell(1, j + 1, label)
+    ws["B2"], ws["C2"], ws["E2"] = "alpha", 1.5, datetime.datetime(2023, 1, 2)
+    ws["B3"], ws["C3"], ws["E3"] = "beta", 7, datetime.datetime(2023, 5, 6, 12, 30)
+    ws["C6"] = "=C2+C3"
+    ws["A9"].number_format = "0.00"  # formatted but empty
+    other = wb.create_sheet("Other")
+    other["A1"], other["A2"] = "Total", "=Data!C3"
+    path = tmp_path / "book.xlsx"
+    wb.save(path)
+    return path
+
+
+@pytest.fixture
+def handmade_workbook(tmp_path):
+    """Workbook using shared strings, rich text, shared formulas and 1904 dates"""
+    parts = {
+        "xl/workbook.xml": (
+            f'<workbook {_MAIN} {_RELS}><workbookPr date1904="1"/>'
+            '<sheets><sheet name="Only" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ),
+        "xl/_rels/workbook.xml.rels": (
+            f"<Relationships {_PACKAGE}>"
+            f'<Relationship Id="rId1" Type="{_TYPE}worksheet"'
+            ' Target="worksheets/sheet1.xml"/>'
+            f'<Relationship Id="rId2" Type="{_TYPE}sharedStrings"'
+            ' Target="/xl/sharedStrings.xml"/>'
+            f'<Relationship Id="rId3" Type="{_TYPE}styles" Target="styles.xml"/>'
+            "</Relationships>"
+        ),
+        "xl/sharedStrings.xml": (
+            f"<sst {_MAIN}><si><t>plain</t></si>"
+            "<si><r><t>ri</t></r><r><t>ch</t></r><rPh><t>skip</t></rPh></si>"
+            "<si><t></t></si></sst>"
+        ),
+        "xl/styles.xml": (
+            f"<styleSheet {_MAIN}>"
+            '<numFmts><numFmt numFmtId="164" formatCode="[h]:mm"/></numFmts>'
+            '<cellXfs><xf numFmtId="0"/><xf numFmtId="14"/><xf numFmtId="164"/>'
+            "</cellXfs></styleSheet>"
+        ),
+        "xl/worksheets/sheet1.xml": (
+            f'<worksheet {_MAIN}><dimension ref="A1:F20"/><sheetData>'
+            '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c>'
+            '<c r="C1" t="s"><v>2</v></c></row>'
+            '<row r="3"><c t="n"><v>1</v></c><c s="1"><v>1</v></c>'
+            '<c s="2"><v>1.5</v></c>'
+            '<c t="b"><v>0</v></c><c t="e"><v>#DIV/0!</v></c></row>'
+            '<row r="4"><c r="A4"><f t="shared" ref="A4:A5" si="0">A3*2</f>'
+            "<v>2</v></c></row>"
+            '<row r="5"><c r="A5"><f t="shared" si="0"/><v>4</v></c>'
+            '<c r="B5" t="str"><f>"x"&amp;"y"</f><v>xy</v></c></row>'
+            "</sheetData></worksheet>"
+        ),
+    }
+    path = tmp_path / "handmade.xlsx"
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, xml in parts.items():
+            archive.writestr(name, xml)
+    return path
+
+
+def _write_rows(path, n_rows):
+    """Minimal workbook with one number per row in column A"""
+    rows = "".join(
+        f'<row r="{i}"><c r="A{i}"><v>{i}</v></c></row>' for i in range(1, n_rows + 1)
+    )
+    parts = {
+        "xl/workbook.xml": (
+            f"<workbook {_MAIN} {_RELS}>"
+            '<sheets><sheet name="Rows" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ),
+        "xl/_rels/workbook.xml.rels": (
+            f"<Relationships {_PACKAGE}>"
+            f'<Relationship Id="rId1" Type="{_TYPE}worksheet"'
+            ' Target="worksheets/sheet1.xml"/></Relationships>'
+        ),
+        "xl/worksheets/sheet1.xml": (
+            f"<worksheet {_MAIN}><sheetData>{rows}</sheetData></worksheet>"
+        ),
+    }
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in parts.items():
+            archive.writestr(name, xml)
+    return path
+
+
+class TestXlsxReader:
+    """Test cases for the XlsxReader class."""
+
+    def test_matches_pandas_and_openpyxl(self, openpyxl_workbook):
+        """Test cell values, header labels and shape against the dense readers."""
+        with XlsxReader(openpyxl_workbook) as reader:
+            assert reader.sheet_names == ["Data", "Other"]
+            cells = [cell[:3] for cell in reader.iter_cells("Data")]
+            sheet = reader.read_sheet("Data", trim=True)
+
+        wb = openpyxl.load_workbook(openpyxl_workbook, read_only=True, data_only=True)
+        expected = [
+            (cell.row - 1, cell.column - 1, cell.value)
+            for row in wb["Data"].iter_rows()
+            for cell in row
+            if getattr(cell, "value", None) is not None
+        ]
+        wb.close()
+        assert cells == expected
+
+        dense = SparseSheet.from_dataframe(
+            pd.read_excel(openpyxl_workbook).astype(object)
+        )
+        assert sheet.shape == dense.shape == (2, 5)
+        assert list(sheet.columns) == list(dense.columns)
+        assert list(sheet.columns) == ["Name", "Name.1", 2024, "Unnamed: 3", "Date"]
+        assert sheet.rows.tolist() == dense.rows.tolist()
+        assert sheet.cols.tolist() == dense.cols.tolist()
+        assert [
+            pd.Timestamp(v) if isinstance(v, datetime.datetime) else v
+            for v in sheet.values
+        ] == (dense.values.tolist())
+
+        with XlsxReader(openpyxl_workbook) as reader:
+            other = reader.read_sheet("Other", trim=True)
+        assert list(other.columns) == ["Total"]
+        assert other.shape == (0, 1)
+
+    def test_formulas_and_encodings(self, handmade_workbook):
+        """Test shared strings, positions without references and formula expansion."""
+        with XlsxReader(handmade_workbook) as reader:
+            assert reader.dimension(0) == (20, 6)
+            cells = list(reader.iter_cells(formulas=True))
+
+        assert cells == [
+            XlsxCell(0, 0, "plain"),
+            XlsxCell(0, 1, "rich"),
+            XlsxCell(2, 0, 1),
+            XlsxCell(2, 1, datetime.datetime(1904, 1, 2)),
+            XlsxCell(2, 2, datetime.timedelta(days=1.5)),
+            XlsxCell(2, 3, False),
+            XlsxCell(2, 4, "#DIV/0!"),
+            XlsxCell(3, 0, 2, "=A3*2"),
+            XlsxCell(4, 0, 4, "=A4*2"),
+            XlsxCell(4, 1, "xy", '="x"&"y"'),
+        ]
+
+    def test_read_sheet_shape(self, handmade_workbook):
+        """Test trimming to the cells versus honouring the dimension hint."""
+        with XlsxReader(handmade_workbook) as reader:
+            hinted = reader.read_sheet(header=False)
+            trimmed = reader.read_sheet(header=False, trim=True)
+            with pytest.raises(KeyError):
+                reader.read_sheet("Missing")
+
+        assert trimmed.shape == (5, 5)
+        assert hinted.shape == (20, 6)
+        assert trimmed.nnz == hinted.nnz == 10
+
+    def test_loaders_stream_xlsx(self, openpyxl_workbook):
+        """Test the sparse loaders of SpreadsheetLLM and WorkbookManager."""
+        sheet = SpreadsheetLLM().load_from_file(str(openpyxl_workbook), sparse=True)
+        assert isinstance(sheet, SparseSheet)
+        assert sheet.nnz == read_xlsx(openpyxl_workbook).nnz
+
+        manager = WorkbookManager()
+        sheets = manager.load_workbook(str(openpyxl_workbook), sparse=True)
+        assert list(sheets) == ["Data", "Other"]
+        assert all(isinstance(sheet, SparseSheet) for sheet in sheets.values())
+        assert manager.sheet_metadata["Data"]["non_empty_cells"] == sheets["Data"].nnz
+        # Sized by the used range, which includes the formatted cell A9
+        assert manager.sheet_metadata["Data"]["shape"] == (8, 5)
+
+    def test_streaming_memory_is_flat(self, tmp_path):
+        """Test that parsed rows are released rather than kept in the tree."""
+        peaks = []
+        for n_rows in (2_000, 20_000):
+            path = _write_rows(tmp_path / f"rows{n_rows}.xlsx", n_rows)
+            with XlsxReader(path) as reader:
+                tracemalloc.start()
+                try:
+                    count = sum(1 for _ in reader.iter_cells())
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                finally:
+                    tracemalloc.stop()
+            assert count == n_rows
+
+        # Keeping each emptied row would add about 80 bytes per row
+        assert peaks[1] < peaks[0] * 1.5